@@ -0,0 +1,237 @@
+import glob
+import json
+import multiprocessing
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from multiprocessing.connection import wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from threedi_schema import ThreediDatabase
+from threedi_schema.domain.models import DECLARED_MODELS
+
+from .checks.base import CheckLevel
+from .config import Config
+from .model_checks import ThreediModelChecker
+
+__all__ = ["FileResult", "check_batch", "check_file", "expand_paths"]
+
+
+@dataclass
+class FileResult:
+    """The result of checking a single schematisation in a batch.
+
+    The status is "ok" if all checks were applied, "error" if checking failed
+    (``message`` holds the reason) and "timeout" if it took too long.
+    """
+
+    path: str
+    status: str
+    duration: float
+    errors: List[Dict] = field(default_factory=list)
+    message: str = ""
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+def expand_paths(patterns: Iterable[str]) -> List[str]:
+    """Expand glob patterns (recursive, with **) into sorted paths.
+
+    Patterns without magic characters are returned as is, even if they do not exist,
+    so that they show up in the results as errors.
+    """
+    result = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            result += sorted(glob.glob(pattern, recursive=True))
+        else:
+            result.append(pattern)
+    return result
+
+
+def check_file(
+    path,
+    level=CheckLevel.ERROR,
+    ignore_checks=None,
+    allow_beta_features=False,
+    context: Optional[Dict] = None,
+    snapshot: Optional[str] = None,
+    config: Optional[Config] = None,
+) -> FileResult:
+    """Apply the checks to a single schematisation, catching any exception.
+
+    Supply a Config to reuse its checks instead of building them again.
+    """
+    start = time.perf_counter()
+    errors = []
+    try:
+        model_checker = ThreediModelChecker(
+            ThreediDatabase(path),
+            context=context,
+            allow_beta_features=allow_beta_features,
+            snapshot=snapshot,
+            config=config,
+        )
+        for check, row in model_checker.errors(
+            level=level, ignore_checks=ignore_checks
+        ):
+            errors.append(
+                {
+                    "error_code": check.error_code,
+                    "level": check.level.name,
+                    "table": check.table.name,
+                    "column": check.column.name,
+                    "id": row.id,
+                    "description": check.description(),
+                }
+            )
+    except Exception as e:
+        return FileResult(
+            path=str(path),
+            status="error",
+            duration=time.perf_counter() - start,
+            errors=errors,
+            message=f"{e.__class__.__name__}: {e}",
+        )
+    return FileResult(
+        path=str(path),
+        status="ok",
+        duration=time.perf_counter() - start,
+        errors=errors,
+    )
+
+
+def _worker_main(connection, kwargs):
+    """Check the paths received on ``connection`` until None is received.
+
+    The Config is built once for all files.
+    """
+    config = Config(
+        models=DECLARED_MODELS,
+        allow_beta_features=kwargs.get("allow_beta_features", False),
+    )
+    while (path := connection.recv()) is not None:
+        connection.send(check_file(path, config=config, **kwargs))
+
+
+class _Worker:
+    """A long-lived worker process, receiving paths and sending FileResults"""
+
+    def __init__(self, kwargs):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_main, args=(child_connection, kwargs), daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.path = None
+        self.start = None
+
+    def submit(self, path):
+        self.path, self.start = path, time.perf_counter()
+        self.connection.send(path)
+
+    def receive(self) -> FileResult:
+        try:
+            return self.connection.recv()
+        except EOFError:
+            # the process died, e.g. due to a crash in a native library
+            self.process.join()
+            return FileResult(
+                path=self.path,
+                status="error",
+                duration=time.perf_counter() - self.start,
+                message=f"Worker exited with code {self.process.exitcode}",
+            )
+        finally:
+            self.path = self.start = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+
+
+def check_batch(
+    paths: Iterable,
+    workers: int = 1,
+    timeout: Optional[float] = None,
+    level=CheckLevel.ERROR,
+    ignore_checks=None,
+    allow_beta_features=False,
+    context: Optional[Dict] = None,
+    snapshot: Optional[str] = None,
+) -> Iterator[FileResult]:
+    """Check many schematisations with a pool of long-lived worker processes.
+
+    Every worker builds the Config once and then checks one file at a time (see
+    check_file). The results are yielded as soon as a file is finished, so not
+    necessarily in the order of ``paths``.
+
+    Failures are isolated per file: an exception yields a result with status
+    "error". A file that takes longer than ``timeout`` seconds yields a result with
+    status "timeout"; its worker is killed and replaced by a new one. The same
+    happens if a worker dies.
+    """
+    kwargs = {
+        "level": level,
+        "ignore_checks": ignore_checks,
+        "allow_beta_features": allow_beta_features,
+        "context": context,
+        "snapshot": snapshot,
+    }
+    pending = deque(str(path) for path in paths)
+    if not pending:
+        return
+    pool = [_Worker(kwargs) for _ in range(min(workers, len(pending)))]
+    try:
+        while pending or any(worker.path is not None for worker in pool):
+            for worker in pool:
+                if worker.path is None and pending:
+                    worker.submit(pending.popleft())
+            running = [worker for worker in pool if worker.path is not None]
+            wait_time = None
+            if timeout is not None:
+                now = time.perf_counter()
+                wait_time = max(min(w.start for w in running) + timeout - now, 0)
+            ready = wait([worker.connection for worker in running], timeout=wait_time)
+            for i, worker in enumerate(pool):
+                if worker.path is None:
+                    continue
+                if worker.connection in ready:
+                    yield worker.receive()
+                    if worker.alive:
+                        continue
+                elif timeout is not None and (
+                    time.perf_counter() - worker.start >= timeout
+                ):
+                    yield FileResult(
+                        path=worker.path,
+                        status="timeout",
+                        duration=time.perf_counter() - worker.start,
+                        message=f"Checking took longer than {timeout} seconds",
+                    )
+                else:
+                    continue
+                worker.kill()
+                pool[i] = _Worker(kwargs)
+    finally:
+        for worker in pool:
+            worker.stop()
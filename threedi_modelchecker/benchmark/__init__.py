@@ -0,0 +1,3 @@
+from .compare import *  # NOQA
+from .generate import *  # NOQA
+from .run import *  # NOQA
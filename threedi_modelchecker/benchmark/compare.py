@@ -0,0 +1,185 @@
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..checks.base import BaseCheck
+
+__all__ = [
+    "Comparison",
+    "Measurement",
+    "compare",
+    "format_comparison",
+    "load_measurements",
+]
+
+# Metrics that are compared between a baseline and the current results
+METRICS = ("wall_time", "sql_statements")
+
+
+@dataclass
+class Measurement:
+    """The cost of a run or of a single check within a run.
+
+    ``noise`` is the relative spread ((max - min) / min) of the wall time of the run
+    over its repetitions (0 for a single repetition). Checks take the noise of the
+    run they were measured in.
+    """
+
+    name: str
+    wall_time: float
+    sql_statements: int
+    noise: float = 0.0
+    error_code: Optional[int] = None
+    level: Optional[str] = None
+    check: Optional[str] = None
+    column: Optional[str] = None
+
+
+@dataclass
+class Comparison:
+    key: Tuple
+    metric: str
+    baseline: Measurement
+    current: Measurement
+    ratio: float
+    threshold: float
+
+    @property
+    def regressed(self) -> bool:
+        return self.ratio > self.threshold
+
+
+def _noise(wall_times: List[float]) -> float:
+    if len(wall_times) < 2 or min(wall_times) <= 0:
+        return 0.0
+    return (max(wall_times) - min(wall_times)) / min(wall_times)
+
+
+def _add_checks(result: Dict, prefix: Tuple, checks: Iterable[Dict], noise: float):
+    """Add the check profiles of a run to ``result``.
+
+    Checks are identified by error code, class, column and description. Checks with
+    the same identity are summed.
+    """
+    for profile in checks:
+        key = prefix + (
+            profile["error_code"],
+            profile["check"],
+            profile["column"],
+            profile.get("description", ""),
+        )
+        if key in result:
+            result[key].wall_time += profile["wall_time"]
+            result[key].sql_statements += profile["sql_statements"]
+            continue
+        result[key] = Measurement(
+            name=f"{profile['check']} on {profile['column']}",
+            wall_time=profile["wall_time"],
+            sql_statements=profile["sql_statements"],
+            noise=noise,
+            error_code=profile["error_code"],
+            level=profile["level"],
+            check=profile["check"],
+            column=profile["column"],
+        )
+
+
+def load_measurements(path) -> Dict[Tuple, Measurement]:
+    """Load the measurements from a benchmark (see write_json) or profile JSON file.
+
+    Profile files are written by ThreediModelChecker.errors (see ProfileReport).
+    Runs are keyed by (schematisation, run name). Checks are keyed by (schematisation,
+    error code, check, column, description) and are only taken from the runs of all
+    checks, as the category runs measure the same checks again.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    result = {}
+    if "benchmarks" not in data:
+        total = data["total"]
+        result[("profile", "full")] = Measurement(
+            name="profile full",
+            wall_time=total["wall_time"],
+            sql_statements=total["sql_statements"],
+        )
+        _add_checks(result, ("profile",), data["checks"], 0.0)
+        return result
+    for benchmark in data["benchmarks"]:
+        schematisation = benchmark["schematisation"]["name"]
+        for run in benchmark["runs"]:
+            noise = _noise(run.get("wall_times", []))
+            result[(schematisation, run["name"])] = Measurement(
+                name=f"{schematisation} {run['name']}",
+                wall_time=run["wall_time"],
+                sql_statements=run["sql_statements"],
+                noise=noise,
+            )
+            if run["name"] == "full":
+                _add_checks(result, (schematisation,), run["checks"], noise)
+    return result
+
+
+def compare(
+    baseline: Dict[Tuple, Measurement],
+    current: Dict[Tuple, Measurement],
+    factor: float = 1.2,
+    min_time: float = 0.01,
+) -> List[Comparison]:
+    """Compare the measurements that are present in both the baseline and current.
+
+    A metric regresses if it grows by more than ``factor``. For wall times, the
+    threshold is widened by the noise of the runs: ``factor * (1 + noise)``, with
+    the largest noise of the baseline and current. Wall times are only compared if
+    either is at least ``min_time`` seconds, as shorter times are mostly noise.
+
+    Returns the comparisons, the largest relative increase first.
+    """
+    result = []
+    for key in baseline.keys() & current.keys():
+        old, new = baseline[key], current[key]
+        for metric in METRICS:
+            old_value, new_value = getattr(old, metric), getattr(new, metric)
+            if metric == "wall_time":
+                if max(old_value, new_value) < min_time:
+                    continue
+                threshold = factor * (1 + max(old.noise, new.noise))
+            else:
+                threshold = factor
+            if old_value > 0:
+                ratio = new_value / old_value
+            else:
+                ratio = float("inf") if new_value > 0 else 1.0
+            result.append(Comparison(key, metric, old, new, ratio, threshold))
+    return sorted(result, key=lambda x: x.ratio, reverse=True)
+
+
+def format_comparison(
+    comparison: Comparison, checks: Optional[Dict[Tuple, BaseCheck]] = None
+) -> str:
+    """Format a comparison as a single line.
+
+    Comparisons of a check are prefixed with the level and error code (like in the
+    output of the check command). If the check is found in ``checks`` (by error
+    code, class and column name), its current description is included.
+    """
+    measurement = comparison.current
+    name = measurement.name
+    if measurement.error_code is not None:
+        check = (checks or {}).get(
+            (measurement.error_code, measurement.check, measurement.column)
+        )
+        level = check.level.name if check is not None else measurement.level
+        name = f"{level[:1]}{measurement.error_code:04d} {name}"
+        if check is not None:
+            name += f" ({check.description()})"
+    if comparison.metric == "wall_time":
+        values = f"{comparison.baseline.wall_time:.3f}s -> {measurement.wall_time:.3f}s"
+    else:
+        values = (
+            f"{comparison.baseline.sql_statements} -> "
+            f"{measurement.sql_statements} statements"
+        )
+    return (
+        f"{name}: {comparison.metric} {values} "
+        f"(x{comparison.ratio:.2f}, threshold x{comparison.threshold:.2f})"
+    )
@@ -0,0 +1,498 @@
+import math
+from dataclasses import asdict, dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator
+
+import numpy as np
+from sqlalchemy import insert
+from threedi_schema import constants, models, ModelSchema, ThreediDatabase
+
+try:
+    from osgeo import gdal, osr
+except ImportError:
+    gdal = osr = None
+
+try:
+    import rasterio
+except ImportError:
+    rasterio = None
+
+__all__ = ["SchematisationSpec", "generate_schematisation", "write_geotiff"]
+
+EPSG_CODE = 28992
+# Lower left corner of the synthetic schematisation and distance between nodes
+ORIGIN = (140000.0, 460000.0)
+NODE_DISTANCE = 50.0
+# Number of rows per INSERT statement
+CHUNK_SIZE = 10000
+
+# The single row of every settings table
+SETTINGS = {
+    models.ModelSettings: {
+        "friction_averaging": 0,
+        "minimum_cell_size": 20,
+        "calculation_point_distance_1d": 15,
+        "minimum_table_step_size": 0.05,
+        "use_1d_flow": True,
+        "use_2d_rain": 1,
+        "nr_grid_levels": 4,
+        "friction_coefficient": 0.03,
+        "use_2d_flow": True,
+        "friction_type": constants.FrictionType.CHEZY,
+    },
+    models.TimeStepSettings: {
+        "time_step": 30,
+        "min_time_step": 1,
+        "max_time_step": 100,
+        "output_time_step": 300,
+        "use_time_step_stretch": False,
+    },
+    models.NumericalSettings: {
+        "max_degree_gauss_seidel": 1,
+        "use_of_cg": 20,
+        "use_nested_newton": 0,
+        "flooding_threshold": 0.01,
+    },
+    models.SimulationTemplateSettings: {
+        "name": "benchmark",
+        "use_0d_inflow": constants.InflowType.NO_INFLOW,
+    },
+    models.SurfaceParameters: {
+        "outflow_delay": 10.0,
+        "surface_layer_thickness": 5.0,
+        "infiltration": True,
+        "max_infiltration_capacity": 10.0,
+        "min_infiltration_capacity": 5.0,
+        "infiltration_decay_constant": 3.0,
+        "infiltration_recovery_constant": 2.0,
+    },
+}
+
+# Cross section shapes of the channels, cycling through open, closed and tabulated
+CROSS_SECTIONS = [
+    {"cross_section_shape": constants.CrossSectionShape.RECTANGLE, "width": 2.0},
+    {"cross_section_shape": constants.CrossSectionShape.CIRCLE, "width": 1.5},
+    {
+        "cross_section_shape": constants.CrossSectionShape.CLOSED_RECTANGLE,
+        "width": 2.0,
+        "height": 1.5,
+    },
+    {
+        "cross_section_shape": constants.CrossSectionShape.TABULATED_TRAPEZIUM,
+        "table": "0,1.0\n1.0,3.0\n2.0,4.0",
+    },
+    {
+        "cross_section_shape": constants.CrossSectionShape.TABULATED_YZ,
+        "table": "0,2.0\n1.0,0.5\n2.0,0\n3.0,0.5\n4.0,2.0",
+    },
+]
+
+
+@dataclass
+class SchematisationSpec:
+    """Size of a synthetic schematisation, see generate_schematisation.
+
+    The connection nodes are laid out on a square grid. Neighbouring nodes on a row
+    are connected by channels (60%), pipes (30%) and weirs (10%). Every channel has a
+    cross section location halfway. Every other node drains a surface, every tenth
+    node has a lateral with a timeseries of ``timeseries_length`` steps. The DEM is a
+    square GeoTIFF of ``raster_size`` pixels wide, covering all nodes.
+
+    Optionally, the extent is covered by ``grid_refinement_areas`` square grid
+    refinement areas, and ``boundary_conditions_2d`` short 2D boundary condition
+    lines are spread over them, half of which cross the edge of an area.
+    """
+
+    connection_nodes: int = 1000
+    timeseries_length: int = 1000
+    raster_size: int = 1000
+    seed: int = 0
+    grid_refinement_areas: int = 0
+    boundary_conditions_2d: int = 0
+
+    @property
+    def name(self) -> str:
+        name = (
+            f"bench_{self.connection_nodes}_{self.timeseries_length}"
+            f"_{self.raster_size}_{self.seed}"
+        )
+        if self.grid_refinement_areas or self.boundary_conditions_2d:
+            name += f"_{self.grid_refinement_areas}_{self.boundary_conditions_2d}"
+        return name
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _insert(session, model, rows: Iterable[Dict]):
+    """Insert rows in chunks of CHUNK_SIZE, without constructing ORM objects"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        session.execute(insert(model.__table__), chunk)
+
+
+def _point(x, y) -> str:
+    return f"SRID={EPSG_CODE};POINT ({x} {y})"
+
+
+def _line(*coords) -> str:
+    points = ", ".join(f"{x} {y}" for (x, y) in coords)
+    return f"SRID={EPSG_CODE};LINESTRING ({points})"
+
+
+def _square(x, y, size) -> str:
+    points = [(x, y), (x + size, y), (x + size, y + size), (x, y + size), (x, y)]
+    points = ", ".join(f"{x} {y}" for (x, y) in points)
+    return f"SRID={EPSG_CODE};POLYGON (({points}))"
+
+
+def _timeseries(rng: np.random.Generator, length: int) -> str:
+    values = np.round(rng.uniform(0.0, 1.0, size=length), 3)
+    return "\n".join(f"{i * 60},{value}" for (i, value) in enumerate(values))
+
+
+class _Grid:
+    """Positions of the connection nodes, in row-major order"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.columns = max(math.ceil(math.sqrt(n)), 1)
+
+    def position(self, node_id: int):
+        row, column = divmod(node_id - 1, self.columns)
+        return (
+            ORIGIN[0] + column * NODE_DISTANCE,
+            ORIGIN[1] + row * NODE_DISTANCE,
+        )
+
+    def links(self) -> Iterator[int]:
+        """Yield the start node ids of the links between neighbours on a row"""
+        for node_id in range(1, self.n):
+            if node_id % self.columns != 0:
+                yield node_id
+
+    @property
+    def extent(self):
+        rows = math.ceil(self.n / self.columns)
+        return (
+            ORIGIN[0] - NODE_DISTANCE,
+            ORIGIN[1] - NODE_DISTANCE,
+            ORIGIN[0] + self.columns * NODE_DISTANCE,
+            ORIGIN[1] + rows * NODE_DISTANCE,
+        )
+
+
+def _connection_nodes(grid: _Grid, rng: np.random.Generator) -> Iterator[Dict]:
+    bottom_levels = np.round(rng.uniform(-3.0, -1.0, size=grid.n), 2)
+    for node_id in range(1, grid.n + 1):
+        yield {
+            "id": node_id,
+            "code": f"node {node_id}",
+            "geom": _point(*grid.position(node_id)),
+            "bottom_level": bottom_levels[node_id - 1],
+            "storage_area": 1.0,
+        }
+
+
+def _insert_links(session, grid: _Grid):
+    """Insert channels (with cross section locations), pipes and weirs"""
+    channels, locations, pipes, weirs = [], [], [], []
+    for i, start in enumerate(grid.links()):
+        (x1, y1), (x2, y2) = grid.position(start), grid.position(start + 1)
+        common = {
+            "id": i + 1,
+            "code": f"link {i + 1}",
+            "geom": _line((x1, y1), (x2, y2)),
+            "connection_node_id_start": start,
+            "connection_node_id_end": start + 1,
+        }
+        kind = i % 10
+        if kind < 6:
+            cross_section = CROSS_SECTIONS[i % len(CROSS_SECTIONS)]
+            channels.append(
+                {
+                    **common,
+                    "display_name": f"channel {i + 1}",
+                    "exchange_type": constants.CalculationType.CONNECTED,
+                }
+            )
+            locations.append(
+                {
+                    "id": i + 1,
+                    "code": f"location {i + 1}",
+                    "channel_id": i + 1,
+                    "geom": _point((x1 + x2) / 2, (y1 + y2) / 2),
+                    "reference_level": -2.0,
+                    "bank_level": 0.5,
+                    "friction_type": constants.FrictionType.CHEZY,
+                    "friction_value": 0.03,
+                    "cross_section_shape": cross_section["cross_section_shape"],
+                    "cross_section_width": cross_section.get("width"),
+                    "cross_section_height": cross_section.get("height"),
+                    "cross_section_table": cross_section.get("table"),
+                }
+            )
+        elif kind < 9:
+            pipes.append(
+                {
+                    **common,
+                    "display_name": f"pipe {i + 1}",
+                    "exchange_type": constants.PipeCalculationType.ISOLATED,
+                    "invert_level_start": -1.5,
+                    "invert_level_end": -1.5,
+                    "friction_type": constants.FrictionType.MANNING,
+                    "friction_value": 0.013,
+                    "cross_section_shape": constants.CrossSectionShape.CIRCLE,
+                    "cross_section_width": 0.5,
+                }
+            )
+        else:
+            weirs.append(
+                {
+                    **common,
+                    "display_name": f"weir {i + 1}",
+                    "crest_level": 1.0,
+                    "crest_type": constants.CrestType.BROAD_CRESTED,
+                    "friction_type": constants.FrictionType.CHEZY,
+                    "friction_value": 2.0,
+                    "sewerage": False,
+                    "cross_section_shape": constants.CrossSectionShape.RECTANGLE,
+                    "cross_section_width": 2.0,
+                }
+            )
+        if len(channels) + len(pipes) + len(weirs) >= CHUNK_SIZE:
+            _flush_links(session, channels, locations, pipes, weirs)
+    _flush_links(session, channels, locations, pipes, weirs)
+
+
+def _flush_links(session, channels, locations, pipes, weirs):
+    for model, rows in (
+        (models.Channel, channels),
+        (models.CrossSectionLocation, locations),
+        (models.Pipe, pipes),
+        (models.Weir, weirs),
+    ):
+        if rows:
+            _insert(session, model, rows)
+            rows.clear()
+
+
+def _surfaces(grid: _Grid) -> Iterator[Dict]:
+    for i, node_id in enumerate(range(1, grid.n + 1, 2)):
+        x, y = grid.position(node_id)
+        yield {
+            "id": i + 1,
+            "code": f"surface {i + 1}",
+            "surface_parameters_id": 1,
+            "area": 100.0,
+            "geom": _square(x + 5.0, y + 5.0, 10.0),
+        }
+
+
+def _surface_maps(grid: _Grid) -> Iterator[Dict]:
+    for i, node_id in enumerate(range(1, grid.n + 1, 2)):
+        x, y = grid.position(node_id)
+        yield {
+            "id": i + 1,
+            "surface_id": i + 1,
+            "percentage": 100.0,
+            "connection_node_id": node_id,
+            "geom": _line((x + 10.0, y + 10.0), (x, y)),
+        }
+
+
+def _laterals(
+    grid: _Grid, rng: np.random.Generator, timeseries_length: int
+) -> Iterator[Dict]:
+    for i, node_id in enumerate(range(1, grid.n + 1, 10)):
+        yield {
+            "id": i + 1,
+            "code": f"lateral {i + 1}",
+            "connection_node_id": node_id,
+            "geom": _point(*grid.position(node_id)),
+            "timeseries": _timeseries(rng, timeseries_length),
+            "time_units": "seconds",
+            "units": "m3/s",
+            "interpolate": False,
+            "offset": 0,
+        }
+
+
+class _AreaGrid:
+    """Square cells covering an extent, in row-major order"""
+
+    def __init__(self, extent, n: int):
+        self.n = n
+        self.columns = max(math.ceil(math.sqrt(n)), 1)
+        self.origin = extent[:2]
+        self.size = max(extent[2] - extent[0], extent[3] - extent[1]) / self.columns
+
+    def corner(self, i: int):
+        row, column = divmod(i % self.n, self.columns)
+        return (
+            self.origin[0] + column * self.size,
+            self.origin[1] + row * self.size,
+        )
+
+
+def _grid_refinement_areas(cells: _AreaGrid) -> Iterator[Dict]:
+    for i in range(cells.n):
+        # leave a margin between the areas
+        x, y = cells.corner(i)
+        yield {
+            "id": i + 1,
+            "code": f"grid refinement area {i + 1}",
+            "grid_level": 2,
+            "geom": _square(x, y, 0.9 * cells.size),
+        }
+
+
+def _boundary_conditions_2d(cells: _AreaGrid, n: int) -> Iterator[Dict]:
+    step = max(cells.n // max(n, 1), 1)
+    for i in range(n):
+        x, y = cells.corner(i * step)
+        y += 0.5 * cells.size
+        # every other line crosses the edge of the area, the others are within it
+        if i % 2:
+            coords = (x + 0.2 * cells.size, y), (x + 0.6 * cells.size, y)
+        else:
+            coords = (x + 0.6 * cells.size, y), (x + 0.95 * cells.size, y)
+        yield {
+            "id": i + 1,
+            "code": f"boundary condition 2d {i + 1}",
+            "display_name": f"boundary condition 2d {i + 1}",
+            "type": constants.BoundaryType.WATERLEVEL,
+            "timeseries": "0,-0.5",
+            "geom": _line(*coords),
+        }
+
+
+def write_geotiff(path, extent, size: int, seed: int = 0) -> bool:
+    """Write a square, tiled and compressed float32 GeoTIFF covering ``extent``.
+
+    The values are a smooth surface with noise, written in strips so that large
+    rasters do not have to fit in memory. GDAL is used if available, else rasterio.
+    Returns False if neither is available.
+    """
+    if gdal is None and rasterio is None:
+        return False
+    xmin, ymin, xmax, ymax = extent
+    dx, dy = (xmax - xmin) / size, (ymax - ymin) / size
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 2 * np.pi, size, dtype=np.float32)
+    strip = 256
+
+    def strips():
+        for row in range(0, size, strip):
+            y = np.linspace(row, min(row + strip, size) - 1, min(strip, size - row))
+            y = y[:, np.newaxis].astype(np.float32) * (2 * np.pi / size)
+            noise = rng.normal(0.0, 0.05, size=(len(y), size)).astype(np.float32)
+            yield row, np.sin(x)[np.newaxis, :] + np.cos(y) + noise
+
+    if gdal is not None:
+        dataset = gdal.GetDriverByName("GTiff").Create(
+            str(path),
+            size,
+            size,
+            1,
+            gdal.GDT_Float32,
+            options=["TILED=YES", "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER"],
+        )
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(EPSG_CODE)
+        dataset.SetProjection(srs.ExportToWkt())
+        dataset.SetGeoTransform((xmin, dx, 0, ymax, 0, -dy))
+        band = dataset.GetRasterBand(1)
+        band.SetNoDataValue(-9999.0)
+        for row, data in strips():
+            band.WriteArray(data, 0, row)
+        dataset.FlushCache()
+        dataset = None
+    else:
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            width=size,
+            height=size,
+            count=1,
+            dtype="float32",
+            crs=f"EPSG:{EPSG_CODE}",
+            transform=rasterio.transform.from_origin(xmin, ymax, dx, dy),
+            nodata=-9999.0,
+            tiled=True,
+            compress="deflate",
+        ) as dataset:
+            for row, data in strips():
+                window = rasterio.windows.Window(0, row, size, len(data))
+                dataset.write(data, 1, window=window)
+    return True
+
+
+def generate_schematisation(path, spec: SchematisationSpec) -> ThreediDatabase:
+    """Generate a synthetic schematisation of the size in ``spec`` at ``path``.
+
+    The schema is created from scratch by upgrading an empty database (see
+    ModelSchema.upgrade), which converts it into a GeoPackage with the same name and
+    a .gpkg suffix; the returned ThreediDatabase refers to that. An existing database
+    at either path is replaced. For speed at large scale, the rows are inserted with
+    bulk INSERT statements. The DEM is written as rasters/<database name>_dem.tif
+    next to the database (see write_geotiff); it is left out if neither GDAL nor
+    rasterio is available.
+    """
+    path = Path(path)
+    for existing in (path, path.with_suffix(".gpkg")):
+        existing.unlink(missing_ok=True)
+    db = ThreediDatabase(path)
+    schema = ModelSchema(db)
+    schema.upgrade(backup=False, epsg_code_override=EPSG_CODE)
+
+    grid = _Grid(spec.connection_nodes)
+    rng = np.random.default_rng(spec.seed)
+    raster_dir = path.parent / "rasters"
+    raster_dir.mkdir(exist_ok=True)
+    dem_file = f"{path.stem}_dem.tif"
+    if not write_geotiff(
+        raster_dir / dem_file, grid.extent, spec.raster_size, spec.seed
+    ):
+        dem_file = None
+
+    session = db.get_session()
+    try:
+        for model, row in SETTINGS.items():
+            if model is models.ModelSettings:
+                row = {**row, "dem_file": dem_file}
+            _insert(session, model, [{"id": 1, **row}])
+        _insert(session, models.ConnectionNode, _connection_nodes(grid, rng))
+        _insert_links(session, grid)
+        _insert(session, models.Surface, _surfaces(grid))
+        _insert(session, models.SurfaceMap, _surface_maps(grid))
+        _insert(session, models.Lateral1D, _laterals(grid, rng, spec.timeseries_length))
+        if spec.grid_refinement_areas:
+            cells = _AreaGrid(grid.extent, spec.grid_refinement_areas)
+            _insert(session, models.GridRefinementArea, _grid_refinement_areas(cells))
+            _insert(
+                session,
+                models.BoundaryConditions2D,
+                _boundary_conditions_2d(cells, spec.boundary_conditions_2d),
+            )
+        _insert(
+            session,
+            models.BoundaryCondition1D,
+            [
+                {
+                    "id": 1,
+                    "connection_node_id": 1,
+                    "geom": _point(*grid.position(1)),
+                    "type": constants.BoundaryType.WATERLEVEL,
+                    "timeseries": "0,-0.5",
+                }
+            ],
+        )
+        session.commit()
+    finally:
+        session.close()
+    # creating the spatial indexes after inserting is faster than updating them
+    schema.set_spatial_indexes()
+    return db
@@ -0,0 +1,206 @@
+import json
+import platform
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from threedi_schema import ThreediDatabase
+
+from .. import __version__
+from ..checks.base import (
+    BaseCheck,
+    CheckLevel,
+    EPSGGeomCheck,
+    GeometryCheck,
+    GeometryTypeCheck,
+)
+from ..checks.cross_section_definitions import CrossSectionBaseCheck
+from ..checks.location import LinestringLocationCheck, PointLocationCheck
+from ..checks.other import (
+    ConnectionNodesDistance,
+    ConnectionNodesLength,
+    DefinedAreaCheck,
+    GridRefinementPartialOverlap2DBoundaryCheck,
+    PotentialBreachInterdistanceCheck,
+    PotentialBreachStartEndCheck,
+    SpatialIndexCheck,
+)
+from ..checks.raster import BaseRasterCheck
+from ..checks.timeseries import BaseTimeseriesCheck, TimeUnitsValidCheck
+from ..model_checks import ThreediModelChecker
+from ..profiling import ProfileReport
+from .generate import generate_schematisation, SchematisationSpec
+
+__all__ = [
+    "CATEGORIES",
+    "SCALES",
+    "environment",
+    "get_categories",
+    "run_benchmark",
+    "write_json",
+]
+
+# Number of connection nodes per named scale
+SCALES = {"1k": 1000, "10k": 10000, "100k": 100000, "1M": 1000000}
+
+SPATIAL_CHECKS = (
+    GeometryCheck,
+    GeometryTypeCheck,
+    EPSGGeomCheck,
+    PointLocationCheck,
+    LinestringLocationCheck,
+    ConnectionNodesDistance,
+    ConnectionNodesLength,
+    DefinedAreaCheck,
+    GridRefinementPartialOverlap2DBoundaryCheck,
+    PotentialBreachInterdistanceCheck,
+    PotentialBreachStartEndCheck,
+    SpatialIndexCheck,
+)
+
+# Predicates that select the checks of a category. The factory category holds the
+# checks generated per column by checks.factories (error codes 1 to 10).
+CATEGORIES: Dict[str, Callable[[BaseCheck], bool]] = {
+    "factory": lambda check: check.error_code <= 10,
+    "raster": lambda check: isinstance(check, BaseRasterCheck),
+    "timeseries": lambda check: isinstance(
+        check, (BaseTimeseriesCheck, TimeUnitsValidCheck)
+    ),
+    "spatial": lambda check: isinstance(check, SPATIAL_CHECKS),
+    "cross-section": lambda check: isinstance(check, CrossSectionBaseCheck),
+}
+
+
+def get_categories(check: BaseCheck) -> List[str]:
+    """Return the names of the categories (see CATEGORIES) that a check belongs to"""
+    return [name for (name, predicate) in CATEGORIES.items() if predicate(check)]
+
+
+def _ignore_other_codes(error_codes: Iterable[int]):
+    """Return an ignore_checks pattern that ignores all but the given error codes"""
+    codes = "|".join(str(code).zfill(4) for code in sorted(set(error_codes)))
+    return re.compile(f"(?!(?:{codes})$)")
+
+
+def _timed_run(model_checker: ThreediModelChecker, level, ignore_checks, **kwargs):
+    """Apply the checks once, returning the wall time and the ProfileReport.
+
+    Setting up the model checker is not included in the time.
+    """
+    report = ProfileReport()
+    start = time.perf_counter()
+    for _ in model_checker.errors(
+        level=level, ignore_checks=ignore_checks, profile=report, **kwargs
+    ):
+        pass
+    return time.perf_counter() - start, report
+
+
+def _benchmark_run(
+    name: str, get_model_checker, level, ignore_checks, repeat: int, **kwargs
+) -> Dict:
+    """Time a run ``repeat`` times, keeping the fastest to reduce noise.
+
+    Every run gets a fresh model checker, so that no caches are shared between runs.
+    """
+    times, best = [], None
+    for _ in range(repeat):
+        wall_time, report = _timed_run(
+            get_model_checker(), level, ignore_checks, **kwargs
+        )
+        times.append(wall_time)
+        if best is None or wall_time <= min(times):
+            best = report
+    profile = best.to_dict()
+    total = profile["total"]
+    return {
+        "name": name,
+        "wall_time": min(times),
+        "wall_times": times,
+        "cpu_time": total["cpu_time"],
+        "sql_statements": total["sql_statements"],
+        "invalid_rows": total["invalid_rows"],
+        "raster_bytes": total["raster_bytes"],
+        "checks": profile["checks"],
+    }
+
+
+def run_benchmark(
+    spec: SchematisationSpec,
+    workdir,
+    level=CheckLevel.INFO,
+    categories: Optional[Iterable[str]] = None,
+    repeat: int = 1,
+    regenerate: bool = False,
+    snapshot: Optional[str] = None,
+    workers: int = 1,
+) -> Dict:
+    """Generate (or reuse) a synthetic schematisation and time the checks on it.
+
+    First all checks are run, then only the checks of every category (see
+    CATEGORIES). Each run is repeated ``repeat`` times and the fastest is reported,
+    together with its per-check profile (see ProfileReport).
+
+    The schematisation is kept in ``workdir`` under a name derived from ``spec``, so
+    that subsequent benchmarks of the same size reuse it, unless ``regenerate``.
+    """
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    # the schematisation is generated as spatialite and converted into a geopackage
+    path = workdir / f"{spec.name}.gpkg"
+    generate_time = None
+    if regenerate or not path.exists():
+        start = time.perf_counter()
+        generate_schematisation(path.with_suffix(".sqlite"), spec)
+        generate_time = time.perf_counter() - start
+
+    def get_model_checker():
+        return ThreediModelChecker(ThreediDatabase(path), snapshot=snapshot)
+
+    checks = list(get_model_checker().checks(level=level))
+    runs = [
+        _benchmark_run("full", get_model_checker, level, None, repeat, workers=workers)
+    ]
+    for name in CATEGORIES if categories is None else categories:
+        codes = [x.error_code for x in checks if CATEGORIES[name](x)]
+        if not codes:
+            continue
+        runs.append(
+            _benchmark_run(
+                name,
+                get_model_checker,
+                level,
+                _ignore_other_codes(codes),
+                repeat,
+                workers=workers,
+            )
+        )
+    return {
+        "schematisation": {
+            **spec.to_dict(),
+            "name": spec.name,
+            "generate_time": generate_time,
+        },
+        "level": CheckLevel.get(level).name,
+        "snapshot": snapshot,
+        "workers": workers,
+        "runs": runs,
+    }
+
+
+def environment() -> Dict:
+    """Describe the environment of a benchmark, to be stored along with the results"""
+    return {
+        "threedi_modelchecker": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def write_json(results: List[Dict], path):
+    """Write the results of benchmarks (see run_benchmark) to a JSON file"""
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "benchmarks": results}, f, indent=2)
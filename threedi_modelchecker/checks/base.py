@@ -1,12 +1,15 @@
 from abc import ABC, abstractmethod
 from enum import IntEnum
-from typing import List, NamedTuple
+from typing import Iterator, List, NamedTuple, Optional
 
-from geoalchemy2.functions import ST_SRID
-from sqlalchemy import and_, false, func, types
+from sqlalchemy import and_, false, func, inspect, Table, types
+from sqlalchemy.orm import Query
 from sqlalchemy.orm.session import Session
 from threedi_schema.domain import custom_types
 
+from .geometry import GeometryColumnCache
+from .tags import TagsCache
+
 
 class CheckLevel(IntEnum):
     ERROR = 40
@@ -25,14 +28,35 @@ class CheckLevel(IntEnum):
             return cls(value)
 
 
+class InvalidRow(NamedTuple):
+    """Reference to an invalid row: the name of its table and its id"""
+
+    table: str
+    id: int
+
+
+def _queried_id_column(query: Query):
+    """Return the id column of the rows returned by query, or None if unknown"""
+    entity = query.column_descriptions[0]["entity"]
+    if entity is not None:
+        return inspect(entity).mapper.local_table.name, entity.id
+    table = getattr(query.column_descriptions[0]["expr"], "table", None)
+    if isinstance(table, Table):
+        return table.name, table.c.id
+
+
 class BaseCheck(ABC):
     """Base class for all checks.
 
     A Check defines a constraint on a specific column and its table.
     One can validate if the constrain holds using the method `get_invalid()`.
     This method will return a list of rows (as named_tuples) which are invalid.
+    Use `iter_invalid()` to fetch the invalid rows in batches instead.
     """
 
+    MAX_IDS_PER_QUERY = 10000
+    BATCH_SIZE = 1000
+
     def __init__(
         self,
         column,
@@ -67,13 +91,71 @@ class BaseCheck(ABC):
         :param session: sqlalchemy.orm.session.Session
         :return: list of named_tuples or empty list if there are no valid rows
         """
-        all_rows = self.to_check(session)
-        invalid_row_ids = set([row.id for row in self.get_invalid(session)])
-        valid = []
-        for row in all_rows:
-            if row.id not in invalid_row_ids:
-                valid.append(row)
-        return valid
+        invalid_row_ids = {row.id for row in self.iter_invalid(session)}
+        return [
+            row
+            for row in self.to_check(session).yield_per(self.BATCH_SIZE)
+            if row.id not in invalid_row_ids
+        ]
+
+    def iter_invalid(
+        self, session: Session, batch_size: int = BATCH_SIZE
+    ) -> Iterator[NamedTuple]:
+        """Iterate over the rows (named_tuples) which are invalid.
+
+        For checks that are a single query (see get_invalid_query), the rows are
+        fetched in batches of ``batch_size``, so that not all invalid rows are kept
+        in memory at once. Other checks yield the result of get_invalid.
+
+        A row is yielded once, also if the query joins it to several other rows
+        (Query.all() de-duplicates those, but yield_per does not).
+        """
+        query = self.get_invalid_query(session)
+        if query is None:
+            yield from self.get_invalid(session)
+            return
+        seen = set()
+        for row in query.yield_per(batch_size):
+            if row.id not in seen:
+                seen.add(row.id)
+                yield row
+
+    def iter_invalid_refs(
+        self, session: Session, batch_size: int = BATCH_SIZE
+    ) -> Iterator[InvalidRow]:
+        """Iterate over references (table name, id) to the rows which are invalid.
+
+        For checks that are a single query (see get_invalid_query), only the
+        (distinct) ids are fetched, in batches of ``batch_size``.
+        """
+        query = self.get_invalid_query(session)
+        id_column = None if query is None else _queried_id_column(query)
+        if id_column is None:
+            for row in self.iter_invalid(session, batch_size=batch_size):
+                table_name = getattr(row, "__tablename__", self.table.name)
+                yield InvalidRow(table_name, row.id)
+            return
+        table_name, column = id_column
+        # a row that is joined to several other rows is only referred to once
+        for (id,) in query.with_entities(column).distinct().yield_per(batch_size):
+            yield InvalidRow(table_name, id)
+
+    def get_index_columns(self) -> List:
+        """Return the columns this check joins or looks up rows by.
+
+        Indexes on these columns speed up the check (see MemorySnapshot).
+        """
+        return []
+
+    def get_invalid_query(self, session: Session) -> Optional[Query]:
+        """Return a Query of the invalid rows, or None if this check is no single query.
+
+        By default, this is the query of get_invalid_clause, if there is one.
+        """
+        clause = self.get_invalid_clause(session)
+        if clause is None:
+            return None
+        return self.to_check(session).filter(clause)
 
     def to_check(self, session):
         """Return a Query object filtering on the rows this check is applied.
@@ -86,6 +168,37 @@ class BaseCheck(ABC):
             query = query.filter(self.filters)
         return query
 
+    def get_invalid_clause(self, session):
+        """Return an SQL expression on this check's table that is true for invalid rows.
+
+        Checks that can be expressed as such a predicate can be applied together with
+        the other checks on the same table in a single query (see FusedTableScan).
+        Returns None for checks that cannot.
+        """
+        return None
+
+    def get_rows(self, session, ids) -> List[NamedTuple]:
+        """Return the rows this check is applied to that have the given ids.
+
+        For checks that evaluate (cached) values in Python and only need to
+        fetch the invalid rows.
+        """
+        return list(self.iter_rows(session, ids, batch_size=self.MAX_IDS_PER_QUERY))
+
+    def iter_rows(
+        self, session, ids, batch_size: int = BATCH_SIZE
+    ) -> Iterator[NamedTuple]:
+        """Iterate over the rows with the given ids, fetching batch_size rows at once"""
+        ids = sorted(set(ids))
+        # query in chunks to stay below the maximum number of SQL variables
+        batch_size = min(batch_size, self.MAX_IDS_PER_QUERY)
+        for i in range(0, len(ids), batch_size):
+            yield from (
+                self.to_check(session)
+                .filter(self.table.c.id.in_(ids[i : i + batch_size]))
+                .order_by(self.table.c.id)
+            )
+
     @property
     def column_name(self) -> str:
         return f"{self.table.name}.{self.column.name}"
@@ -123,10 +236,13 @@ class QueryCheck(BaseCheck):
         self.filters = filters
 
     def get_invalid(self, session):
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session):
         query = self.invalid.with_session(session)
         if self.filters is not None:
             query = query.filter(self.filters)
-        return query.all()
+        return query
 
     def description(self):
         return self.message
@@ -141,13 +257,17 @@ class ForeignKeyCheck(BaseCheck):
         super().__init__(*args, **kwargs)
         self.reference_column = reference_column
 
+    def get_index_columns(self):
+        return [self.column, self.reference_column]
+
     def get_invalid(self, session):
-        q_invalid = self.to_check(session)
-        invalid_foreign_keys_query = q_invalid.filter(
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session):
+        return self.to_check(session).filter(
             self.column.notin_(session.query(self.reference_column)),
             self.column != None,
         )
-        return invalid_foreign_keys_query.all()
 
     def description(self):
         return "%s refers to a non-existing %s" % (
@@ -169,6 +289,9 @@ class UniqueCheck(BaseCheck):
         super().__init__(column=columns[0], **kwargs)
 
     def get_invalid(self, session):
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session):
         duplicate_values = (
             session.query(*self.columns)
             .group_by(*self.columns)
@@ -177,8 +300,7 @@ class UniqueCheck(BaseCheck):
         join_clause = and_(
             *[getattr(duplicate_values.c, c.name) == c for c in self.columns]
         )
-        q_invalid = self.to_check(session).join(duplicate_values, join_clause)
-        return q_invalid.all()
+        return self.to_check(session).join(duplicate_values, join_clause)
 
     def description(self):
         if self.message:
@@ -193,12 +315,15 @@ class AllEqualCheck(BaseCheck):
     """Check all values in `column` are the same, including NULL values."""
 
     def get_invalid(self, session):
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session):
         val = session.query(self.column).limit(1).scalar()
         if val is None:
             clause = self.column != None
         else:
             clause = (self.column != val) | (self.column == None)
-        return self.to_check(session).filter(clause).all()
+        return self.to_check(session).filter(clause)
 
     def description(self):
         return f"{self.column_name} is different and is ignored if it is not in the first record"
@@ -208,9 +333,10 @@ class NotNullCheck(BaseCheck):
     """ "Check all values in `column` that are not null"""
 
     def get_invalid(self, session):
-        q_invalid = self.to_check(session)
-        not_null_query = q_invalid.filter(self.column == None)
-        return not_null_query.all()
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_clause(self, session):
+        return self.column == None
 
     def description(self):
         return f"{self.column_name} cannot be null"
@@ -226,16 +352,17 @@ class TypeCheck(BaseCheck):
         self.expected_types = _sqlalchemy_to_sqlite_types(self.column.type)
 
     def get_invalid(self, session):
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_clause(self, session):
         if ("sqlite" not in session.bind.dialect.dialect_description) and (
             "geopackage" not in session.bind.dialect.dialect_description
         ):
-            return []
-        q_invalid = self.to_check(session)
-        invalid_type_query = q_invalid.filter(
+            return false()
+        return and_(
             func.typeof(self.column).notin_(self.expected_types),
             func.typeof(self.column) != "null",
         )
-        return invalid_type_query.all()
 
     def description(self):
         return f"{self.column_name} is not of type {self.expected_types}"
@@ -278,11 +405,10 @@ class GeometryCheck(BaseCheck):
     Null values are ignored."""
 
     def get_invalid(self, session):
-        q_invalid = self.to_check(session)
-        invalid_geometries = q_invalid.filter(
-            func.ST_IsValid(self.column) != True, self.column != None
+        invalid_ids = GeometryColumnCache.for_session(session).get_invalid_ids(
+            session, self.column
         )
-        return invalid_geometries.all()
+        return self.get_rows(session, invalid_ids.tolist())
 
     def description(self):
         return f"{self.column_name} is an invalid geometry"
@@ -298,15 +424,13 @@ class GeometryTypeCheck(BaseCheck):
         expected_geometry_type = _get_geometry_type(
             self.column, dialect=session.bind.dialect.name
         )
-        q_invalid = self.to_check(session)
         if expected_geometry_type is None:
             # skip in case of generic GEOMETRY column
-            return q_invalid.filter(false())
-        invalid_geometry_types_q = q_invalid.filter(
-            func.ST_GeometryType(self.column) != expected_geometry_type,
-            self.column != None,
+            return []
+        summary = GeometryColumnCache.for_session(session).get(session, self.column)
+        return self.get_rows(
+            session, summary.ids_with_other_type(expected_geometry_type).tolist()
         )
-        return invalid_geometry_types_q.all()
 
     def description(self):
         return "%s has invalid geometry type, expected %s" % (
@@ -336,11 +460,10 @@ class EnumCheck(BaseCheck):
     Null values are ignored"""
 
     def get_invalid(self, session):
-        q_invalid = self.to_check(session)
-        invalid_values_q = q_invalid.filter(
-            self.column.notin_(list(self.column.type.enum_class))
-        )
-        return invalid_values_q.all()
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_clause(self, session):
+        return self.column.notin_(list(self.column.type.enum_class))
 
     def description(self):
         allowed = sorted({x.value for x in self.column.type.enum_class})
@@ -375,6 +498,9 @@ class RangeCheck(BaseCheck):
         super().__init__(*args, **kwargs)
 
     def get_invalid(self, session):
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_clause(self, session):
         conditions = []
         if self.min_value is not None:
             if self.left_inclusive:
@@ -386,7 +512,7 @@ class RangeCheck(BaseCheck):
                 conditions.append(self.column <= self.max_value)
             else:
                 conditions.append(self.column < self.max_value)
-        return self.to_check(session).filter(~and_(*conditions)).all()
+        return ~and_(*conditions)
 
     def description(self):
         if self.message:
@@ -401,16 +527,8 @@ class RangeCheck(BaseCheck):
 
 class ListOfIntsCheck(BaseCheck):
     def get_invalid(self, session):
-        invalids = []
-        for record in self.to_check(session).filter(
-            (self.column != None) & (self.column != "")
-        ):
-            # check if casting to int works
-            try:
-                [int(x) for x in getattr(record, self.column.name).split(",")]
-            except ValueError:
-                invalids.append(record)
-        return invalids
+        summary = TagsCache.for_session(session).get(session, self.column)
+        return self.get_rows(session, summary.ids_not_list_of_ints().tolist())
 
     def description(self) -> str:
         return (
@@ -429,12 +547,12 @@ class EPSGGeomCheck(BaseCheck):
 
     def get_invalid(self, session: Session) -> List[NamedTuple]:
         self.epsg_ref_name = session.model_checker_context.epsg_ref_name
-        if session.model_checker_context.epsg_ref_code is None:
+        epsg_ref_code = session.model_checker_context.epsg_ref_code
+        if epsg_ref_code is None:
             return []
-        return (
-            self.to_check(session)
-            .filter(ST_SRID(self.column) != session.model_checker_context.epsg_ref_code)
-            .all()
+        summary = GeometryColumnCache.for_session(session).get(session, self.column)
+        return self.get_rows(
+            session, summary.ids_with_other_srid(epsg_ref_code).tolist()
         )
 
     def description(self) -> str:
@@ -0,0 +1,65 @@
+from typing import Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm.session import Session
+
+T = TypeVar("T")
+
+# The keys of the caches that checks keep in session.info, see clear_session_caches
+SESSION_CACHES = (
+    "cross_section_cache",
+    "geometry_column_cache",
+    "network_index",
+    "tags_cache",
+    "timeseries_cache",
+    "topology_index",
+)
+
+
+def clear_session_caches(session: Session):
+    """Drop the caches that checks keep on the session (e.g. TagsCache).
+
+    ThreediModelChecker.errors does this after every run. The caches are also
+    dropped when rows are added to, changed in or deleted from the session and when
+    it is rolled back, so that checks do not report on outdated data.
+    """
+    for key in SESSION_CACHES:
+        session.info.pop(key, None)
+
+
+def get_session_cache(session: Session, key: str, factory: Callable[[], T]) -> T:
+    """Return the cache stored in session.info under key, creating it if needed.
+
+    The listeners that drop the caches on changes are registered on the session
+    the first time it gets a cache; other sessions are not affected.
+    """
+    if key not in SESSION_CACHES:
+        raise ValueError(f"Unknown session cache '{key}'")
+    if key not in session.info:
+        if not event.contains(session, "after_attach", _clear_session_caches):
+            _watch_session(session)
+        session.info[key] = factory()
+    return session.info[key]
+
+
+def _watch_session(session: Session):
+    event.listen(session, "after_attach", _clear_session_caches)
+    event.listen(session, "after_rollback", _clear_session_caches)
+    event.listen(session, "after_flush", _clear_session_caches_after_flush)
+    event.listen(session, "do_orm_execute", _clear_session_caches_after_dml)
+
+
+def _clear_session_caches(session, *args):
+    clear_session_caches(session)
+
+
+def _clear_session_caches_after_flush(session, flush_context):
+    # new rows were already handled when they were attached
+    if session.dirty or session.deleted:
+        clear_session_caches(session)
+
+
+def _clear_session_caches_after_dml(orm_execute_state):
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        clear_session_caches(state.session)
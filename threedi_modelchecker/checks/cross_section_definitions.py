@@ -1,11 +1,15 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from enum import IntEnum
-from typing import Union
+from functools import cached_property
+from typing import Dict, Iterator, NamedTuple, Optional, Sequence, Tuple, Union
 
+import numpy as np
 from sqlalchemy import func
 from threedi_schema import constants, models
 
 from .base import BaseCheck
+from .caches import get_session_cache
 
 
 class CrossSectionTableColumnIdx(IntEnum):
@@ -28,6 +32,147 @@ def parse_csv_table(str_data):
     return [[float(item) for item in line.split(",")] for line in str_data.splitlines()]
 
 
+@dataclass(eq=False)
+class ParsedCrossSection:
+    """The cross section definition of a record, with its table parsed once.
+
+    ``columns`` contains the first two columns of the cross_section_table (height and
+    width, or Y and Z) as float arrays. A column that could not be parsed is None and
+    the reason is in ``errors``.
+    """
+
+    shape: Optional[constants.CrossSectionShape] = None
+    width: Optional[float] = None
+    height: Optional[float] = None
+    table: Optional[str] = None
+    columns: Tuple[Optional[np.ndarray], Optional[np.ndarray]] = (None, None)
+    errors: Tuple[Optional[str], Optional[str]] = (None, None)
+
+    @classmethod
+    def from_record(cls, record) -> "ParsedCrossSection":
+        result = cls(
+            shape=record.cross_section_shape,
+            width=record.cross_section_width,
+            height=record.cross_section_height,
+            table=record.cross_section_table,
+        )
+        if not result.table:
+            return result
+        rows = [line.split(",") for line in result.table.splitlines()]
+        columns = []
+        errors = []
+        for idx in range(2):
+            try:
+                columns.append(np.array([row[idx] for row in rows], dtype=np.float64))
+                errors.append(None)
+            except (IndexError, ValueError) as e:
+                columns.append(None)
+                errors.append(str(e) or type(e).__name__)
+        result.columns = tuple(columns)
+        result.errors = tuple(errors)
+        return result
+
+    def get_column(
+        self, col_idx: Union[CrossSectionTableColumnIdx, CrossSectionTableXYColumnIdx]
+    ):
+        """Return a parsed column, or a tuple of both columns for the 'all' index.
+
+        Returns None if (one of) the column(s) could not be parsed.
+        """
+        if col_idx.name != "all":
+            return self.columns[col_idx.value]
+        if any(column is None for column in self.columns):
+            return None
+        return self.columns
+
+    @property
+    def widths_heights(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return the widths and heights of a tabulated shape, None if not parsable"""
+        if self.shape == constants.CrossSectionShape.TABULATED_YZ:
+            widths, heights = self.columns
+        else:
+            heights, widths = self.columns
+        if widths is None or heights is None:
+            return None
+        return widths, heights
+
+    @cached_property
+    def configuration(self):
+        """The (max_width, max_height, configuration) of this cross section.
+
+        See cross_section_configurations; unknown values are None.
+        """
+        configurations = cross_section_configurations([self])
+        max_width, max_height = (
+            None if np.isnan(x[0]) else float(x[0])
+            for x in (configurations.max_width, configurations.max_height)
+        )
+        if configurations.closed[0]:
+            configuration = "closed"
+        elif configurations.open[0]:
+            configuration = "open"
+        else:
+            configuration = None
+        return max_width, max_height, configuration
+
+
+class CrossSectionCache:
+    """Parsed cross section definitions per (table, id).
+
+    The cache is kept on the session (see ``for_session``) and thus lives as long as
+    a check run. It serves the tables that have a cross section definition
+    (cross_section_location, culvert, orifice, pipe and weir); a table is loaded with
+    a single query when it is first requested.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, Dict[int, ParsedCrossSection]] = {}
+        self._configurations: Dict[
+            str, Tuple[np.ndarray, CrossSectionConfigurations]
+        ] = {}
+
+    @classmethod
+    def for_session(cls, session) -> "CrossSectionCache":
+        return get_session_cache(session, "cross_section_cache", cls)
+
+    def get(self, session, table) -> Dict[int, ParsedCrossSection]:
+        """Return the parsed cross sections of a table, as {id: ParsedCrossSection}"""
+        if table.name not in self._tables:
+            records = session.query(
+                table.c.id,
+                table.c.cross_section_shape,
+                table.c.cross_section_width,
+                table.c.cross_section_height,
+                table.c.cross_section_table,
+            ).order_by(table.c.id)
+            self._tables[table.name] = {
+                record.id: ParsedCrossSection.from_record(record) for record in records
+            }
+        return self._tables[table.name]
+
+    def get_configurations(
+        self, session, table, ids: np.ndarray
+    ) -> "CrossSectionConfigurations":
+        """Return the configurations of the records in a table with the given ids.
+
+        The configurations of all records in the table are computed at once, when
+        they are first requested.
+        """
+        if table.name not in self._configurations:
+            parsed = self.get(session, table)
+            self._configurations[table.name] = (
+                np.fromiter(parsed.keys(), dtype=np.int64, count=len(parsed)),
+                cross_section_configurations(list(parsed.values())),
+            )
+        all_ids, configurations = self._configurations[table.name]
+        idx = np.searchsorted(all_ids, ids)
+        return CrossSectionConfigurations(*(x[idx] for x in configurations))
+
+    def clear(self):
+        self._tables.clear()
+        self._configurations.clear()
+
+
 class CrossSectionBaseCheck(BaseCheck):
     """Base class for all cross section definition checks."""
 
@@ -61,31 +206,45 @@ class CrossSectionBaseCheck(BaseCheck):
             except (IndexError, ValueError):
                 continue  # Skip records with errors
 
+    def parsed_cross_sections(
+        self, session, query=None
+    ) -> Iterator[Tuple[int, ParsedCrossSection]]:
+        """Iterate over (id, ParsedCrossSection) of the records this check is applied to
+
+        Optionally supply a query (based on to_check) to further filter the records.
+        """
+        parsed = CrossSectionCache.for_session(session).get(session, self.table)
+        if query is None:
+            query = self.to_check(session)
+        for (id,) in query.with_entities(self.table.c.id):
+            yield id, parsed[id]
+
+    def get_ids(self, session, query=None) -> np.ndarray:
+        """Return the ids of the records this check is applied to, as an array
+
+        Optionally supply a query (based on to_check) to further filter the records.
+        """
+        if query is None:
+            query = self.to_check(session)
+        return np.array(
+            [id for (id,) in query.with_entities(self.table.c.id)], dtype=np.int64
+        )
+
     def parse_cross_section_table(
         self,
         session,
         col_idx: Union[CrossSectionTableColumnIdx, CrossSectionTableXYColumnIdx],
     ):
+        """Iterate over (id, values) of the records with a parsable cross_section_table
+
+        The values are taken from the CrossSectionCache on the session.
+        """
         column = self.table.c.cross_section_table
-        records = self.to_check(session).filter((column != None) & (column != ""))
-        for record in records:
-            try:
-                if col_idx.name == "all":
-                    str = getattr(record, column.name)
-                    values = tuple(
-                        [
-                            parse_csv_table_col(str, _col_idx.value)
-                            for _col_idx in type(col_idx)
-                            if _col_idx != col_idx
-                        ]
-                    )
-                else:
-                    values = parse_csv_table_col(
-                        getattr(record, column.name), col_idx.value
-                    )
-                yield (record, values)  # Yield the parsed values as a generator
-            except (IndexError, ValueError):
-                continue  # Skip records with errors
+        query = self.to_check(session).filter((column != None) & (column != ""))
+        for id, parsed in self.parsed_cross_sections(session, query):
+            values = parsed.get_column(col_idx)
+            if values is not None:  # skip records with errors
+                yield (id, values)
 
 
 class CrossSectionNullCheck(CrossSectionBaseCheck):
@@ -201,13 +360,13 @@ class CrossSectionIncreasingCheck(CrossSectionBaseCheck):
 
     def get_invalid(self, session):
         invalids = []
-        for record, values in self.parse_cross_section_table(
+        for id, values in self.parse_cross_section_table(
             session, col_idx=CrossSectionTableColumnIdx.height
         ):
-            if values != sorted(values):
-                invalids.append(record)
+            if np.any(np.diff(values) < 0):
+                invalids.append(id)
 
-        return invalids
+        return self.get_rows(session, invalids)
 
     def description(self):
         return f"{self.column_name} should be monotonically increasing for shapes {self.shape_msg}. Maybe the width and height have been interchanged?"
@@ -218,13 +377,13 @@ class CrossSectionFirstElementZeroCheck(CrossSectionBaseCheck):
 
     def get_invalid(self, session):
         invalids = []
-        for record, values in self.parse_cross_section_table(
+        for id, values in self.parse_cross_section_table(
             session, col_idx=CrossSectionTableColumnIdx.height
         ):
             if abs(values[0]) != 0:
-                invalids.append(record)
+                invalids.append(id)
 
-        return invalids
+        return self.get_rows(session, invalids)
 
     def description(self):
         return f"The first element of {self.column_name} should equal 0 for shapes {self.shape_msg}. Note that heights are relative to 'reference_level'."
@@ -235,13 +394,13 @@ class CrossSectionFirstElementNonZeroCheck(CrossSectionBaseCheck):
 
     def get_invalid(self, session):
         invalids = []
-        for record, values in self.parse_cross_section_table(
+        for id, values in self.parse_cross_section_table(
             session, col_idx=CrossSectionTableColumnIdx.width
         ):
             if abs(values[0]) <= 0:
-                invalids.append(record)
+                invalids.append(id)
 
-        return invalids
+        return self.get_rows(session, invalids)
 
     def description(self):
         return f"The first element of {self.column_name} must be larger than 0 for tabulated rectangle shapes. Consider using tabulated trapezium."
@@ -254,13 +413,13 @@ class CrossSectionYZHeightCheck(CrossSectionBaseCheck):
 
     def get_invalid(self, session):
         invalids = []
-        for record, values in self.parse_cross_section_table(
+        for id, values in self.parse_cross_section_table(
             session, col_idx=CrossSectionTableXYColumnIdx.Z
         ):
-            if any(x < 0 for x in values) or not any(x == 0 for x in values):
-                invalids.append(record)
+            if np.any(values < 0) or not np.any(values == 0):
+                invalids.append(id)
 
-        return invalids
+        return self.get_rows(session, invalids)
 
     def description(self):
         return f"{self.column_name} for YZ profiles should include 0.0 and should not include negative values."
@@ -271,16 +430,16 @@ class CrossSectionYZCoordinateCountCheck(CrossSectionBaseCheck):
 
     def get_invalid(self, session):
         invalids = []
-        for record, (Y, Z) in self.parse_cross_section_table(
+        for id, (Y, Z) in self.parse_cross_section_table(
             session, col_idx=CrossSectionTableXYColumnIdx.all
         ):
             if len(Y) == 0 or len(Y) != len(Z):
                 continue
             is_closed = Z[0] == Z[-1] and Y[0] == Y[-1]
             if len(Z) < (4 if is_closed else 3):
-                invalids.append(record)
+                invalids.append(id)
 
-        return invalids
+        return self.get_rows(session, invalids)
 
     def description(self):
         return f"{self.table.name} width and height should contain at least 3 coordinates (excluding closing coordinate) for YZ profiles"
@@ -291,23 +450,114 @@ class CrossSectionYZIncreasingWidthIfOpenCheck(CrossSectionBaseCheck):
 
     def get_invalid(self, session):
         invalids = []
-        for record, (Y, Z) in self.parse_cross_section_table(
+        for id, (Y, Z) in self.parse_cross_section_table(
             session, col_idx=CrossSectionTableXYColumnIdx.all
         ):
             if Y[0] == Y[-1] and Z[0] == Z[-1]:
                 continue
-            elif len(Y) > 1 and any(
-                previous_width >= next_width
-                for (previous_width, next_width) in zip(Y[:-1], Y[1:])
-            ):
-                invalids.append(record)
+            elif len(Y) > 1 and np.any(np.diff(Y) <= 0):
+                invalids.append(id)
 
-        return invalids
+        return self.get_rows(session, invalids)
 
     def description(self):
         return f"{self.column_name} should be strictly increasing for open YZ profiles. Perhaps this is actually a closed profile?"
 
 
+class CrossSectionConfigurations(NamedTuple):
+    """Maximum widths, maximum heights and open/closed flags of cross sections.
+
+    Unknown widths and heights are NaN; if the configuration is unknown (e.g. no
+    shape, or an invalid table) a cross section is neither open nor closed.
+    """
+
+    max_width: np.ndarray
+    max_height: np.ndarray
+    closed: np.ndarray
+    open: np.ndarray
+
+
+def cross_section_configurations(
+    cross_sections: Sequence[ParsedCrossSection],
+) -> CrossSectionConfigurations:
+    """Vectorised version of cross_section_configuration_for_record.
+
+    Computes the configurations of many (parsed) cross sections at once. The tables
+    of the tabulated shapes are concatenated, so that their minima and maxima can be
+    computed with a single reduction per property.
+    """
+    Shape = constants.CrossSectionShape
+    n = len(cross_sections)
+    shape = np.array(
+        [-1 if x.shape is None else x.shape.value for x in cross_sections],
+        dtype=np.int64,
+    )
+    width = np.array(
+        [np.nan if x.width is None else x.width for x in cross_sections],
+        dtype=np.float64,
+    )
+    height = np.array(
+        [np.nan if x.height is None else x.height for x in cross_sections],
+        dtype=np.float64,
+    )
+    max_width = np.full(n, np.nan)
+    max_height = np.full(n, np.nan)
+    closed = np.zeros(n, dtype=bool)
+    is_open = np.zeros(n, dtype=bool)
+
+    # not tabulated: the dimensions follow from the width and height
+    width_or_zero = np.where(np.isnan(width) | (width == 0), 0.0, width)
+    height_or_zero = np.where(np.isnan(height) | (height == 0), 0.0, height)
+    for shapes, heights in [
+        ([Shape.CLOSED_RECTANGLE], height_or_zero),
+        ([Shape.RECTANGLE], height),
+        ([Shape.CIRCLE], width_or_zero),
+        ([Shape.EGG, Shape.INVERTED_EGG], 1.5 * width_or_zero),
+    ]:
+        mask = np.isin(shape, [x.value for x in shapes])
+        max_width[mask] = width_or_zero[mask]
+        max_height[mask] = heights[mask]
+        closed[mask] = shapes[0] != Shape.RECTANGLE
+        is_open[mask] = shapes[0] == Shape.RECTANGLE
+
+    # tabulated: the dimensions follow from the (concatenated) tables
+    tabulated = [
+        (i, x.widths_heights)
+        for (i, x) in enumerate(cross_sections)
+        if x.shape is not None and x.shape.is_tabulated and x.widths_heights
+    ]
+    if not tabulated:
+        return CrossSectionConfigurations(max_width, max_height, closed, is_open)
+    idx = np.array([i for (i, _) in tabulated], dtype=np.int64)
+    lengths = np.array([len(widths) for (_, (widths, _)) in tabulated])
+    start = np.cumsum(lengths) - lengths
+    end = start + lengths - 1
+    widths = np.concatenate([widths for (_, (widths, _)) in tabulated])
+    heights = np.concatenate([heights for (_, (_, heights)) in tabulated])
+    widths_max = np.maximum.reduceat(widths, start)
+    heights_max = np.maximum.reduceat(heights, start)
+
+    yz = shape[idx] == Shape.TABULATED_YZ.value
+    last_width = widths[end]
+    # tabulated rectangles and trapeziums are closed if the last width is 0
+    max_width[idx] = widths_max
+    max_height[idx] = heights_max
+    closed[idx] = ~yz & (last_width == 0)
+    is_open[idx] = ~yz & (last_width > 0)
+    # yz profiles are closed if the first and last coordinates are equal;
+    # without the rounding, floating-point errors occur
+    max_width[idx[yz]] = np.round(
+        widths_max[yz] - np.minimum.reduceat(widths, start)[yz], 9
+    )
+    max_height[idx[yz]] = np.round(
+        heights_max[yz] - np.minimum.reduceat(heights, start)[yz], 9
+    )
+    yz_closed = (widths[start] == last_width) & (heights[start] == heights[end])
+    closed[idx[yz]] = yz_closed[yz]
+    is_open[idx[yz]] = ~yz_closed[yz]
+    return CrossSectionConfigurations(max_width, max_height, closed, is_open)
+
+
 def get_widths_heights_for_tabulated_record(record):
     if (
         record.cross_section_shape is None
@@ -316,41 +566,20 @@ def get_widths_heights_for_tabulated_record(record):
         raise ValueError(
             "get_widths_heighs_for_tabulated_record cannot handle tabulated shaptes"
         )
-    if record.cross_section_shape == constants.CrossSectionShape.TABULATED_YZ:
-        widths = parse_csv_table_col(
-            record.cross_section_table, CrossSectionTableXYColumnIdx.Y
-        )
-        heights = parse_csv_table_col(
-            record.cross_section_table, CrossSectionTableXYColumnIdx.Z
-        )
-    else:
-        widths = parse_csv_table_col(
-            record.cross_section_table, CrossSectionTableColumnIdx.width
-        )
-        heights = parse_csv_table_col(
-            record.cross_section_table, CrossSectionTableColumnIdx.height
-        )
-    return widths, heights
+    widths_heights = ParsedCrossSection.from_record(record).widths_heights
+    if widths_heights is None:
+        raise ValueError("The cross_section_table could not be parsed")
+    widths, heights = widths_heights
+    return widths.tolist(), heights.tolist()
 
 
 def cross_section_configuration_for_record(record):
-    if record.cross_section_shape is None:
-        return None, None, None
-    if record.cross_section_shape.is_tabulated:
-        # Handle empty cross section table by returning all None to prevent issues in parsing
-        # Note that CrossSectionNullCheck already checks for this
-        if record.cross_section_table is None or record.cross_section_table == "":
-            return None, None, None
-        widths, heights = get_widths_heights_for_tabulated_record(record)
-        return cross_section_configuration_tabulated(
-            shape=record.cross_section_shape, widths=widths, heights=heights
-        )
-    else:
-        return cross_section_configuration_not_tabulated(
-            shape=record.cross_section_shape,
-            width=record.cross_section_width,
-            height=record.cross_section_height,
-        )
+    """Retrieve maximum width, maximum height and open/closed configuration.
+
+    All are None if the shape is unknown or if the cross_section_table is empty or
+    invalid (see CrossSectionNullCheck and CrossSectionCSVFormatCheck).
+    """
+    return ParsedCrossSection.from_record(record).configuration
 
 
 def cross_section_configuration_not_tabulated(shape, width, height):
@@ -360,20 +589,7 @@ def cross_section_configuration_not_tabulated(shape, width, height):
     """
     if shape.is_tabulated:
         raise ValueError("cross_section_configuration cannot handle tabulated shaptes")
-    max_width = 0 if not width else width
-    if shape == constants.CrossSectionShape.CLOSED_RECTANGLE:
-        max_height = 0 if not height else height
-    elif shape == constants.CrossSectionShape.RECTANGLE:
-        max_height = height
-    elif shape == constants.CrossSectionShape.CIRCLE:
-        max_height = max_width
-    elif shape in [
-        constants.CrossSectionShape.EGG,
-        constants.CrossSectionShape.INVERTED_EGG,
-    ]:
-        max_height = 1.5 * max_width
-    configuration = "closed" if shape.is_closed else "open"
-    return max_width, max_height, configuration
+    return ParsedCrossSection(shape=shape, width=width, height=height).configuration
 
 
 def cross_section_configuration_tabulated(shape, widths, heights):
@@ -384,67 +600,36 @@ def cross_section_configuration_tabulated(shape, widths, heights):
         raise ValueError(
             "cross_section_configuration_tabulated can only handle tabulated shaptes"
         )
-    if not widths:
-        widths = [0]
-    if not heights:
-        heights = [0]
-    if shape in [
-        constants.CrossSectionShape.TABULATED_RECTANGLE,
-        constants.CrossSectionShape.TABULATED_TRAPEZIUM,
-    ]:
-        last_width = widths[-1]
-        max_height = max(heights)
-        max_width = max(widths)
-        if last_width == 0:
-            configuration = "closed"
-        elif last_width > 0:
-            configuration = "open"
-        else:
-            raise ValueError(
-                "A tabulated rectangle or trapezium cannot have a negative last width"
-            )
-    elif shape == constants.CrossSectionShape.TABULATED_YZ:
-        # without the rounding, floating-point errors occur
-        max_width = round((max(widths) - min(widths)), 9)
-        max_height = round((max(heights) - min(heights)), 9)
-        first_width = widths[0]
-        last_width = widths[-1]
-        first_height = heights[0]
-        last_height = heights[-1]
-        if (first_width, first_height) == (last_width, last_height):
-            configuration = "closed"
-        else:
-            configuration = "open"
-    else:
+    widths = np.array(widths or [0], dtype=np.float64)
+    heights = np.array(heights or [0], dtype=np.float64)
+    if shape != constants.CrossSectionShape.TABULATED_YZ and widths[-1] < 0:
         raise ValueError(
-            "cross_section_configuration_tabulated was called for a tabulated shape other "
-            "than TABULATED_YZ, TABULATED_RECTANGLE or TABULATED_TRAPEZIUM"
+            "A tabulated rectangle or trapezium cannot have a negative last width"
         )
-    return max_width, max_height, configuration
+    if shape == constants.CrossSectionShape.TABULATED_YZ:
+        columns = (widths, heights)
+    else:
+        columns = (heights, widths)
+    return ParsedCrossSection(shape=shape, columns=columns).configuration
 
 
 class CrossSectionMinimumDiameterCheck(CrossSectionBaseCheck):
     """Check if cross section widths and heights are large enough"""
 
     def get_invalid(self, session):
-        invalids = []
-        for record in self.to_check(session):
-            (
-                max_width,
-                max_height,
-                configuration,
-            ) = cross_section_configuration_for_record(record)
-            # See nens/threedi-modelchecker#251
-            minimum_diameter = 0.1
-            if configuration == "closed":
-                if (max_height < minimum_diameter) or (max_width < minimum_diameter):
-                    invalids.append(record)
-            # the profile height does not need checking on an open cross-section
-            elif configuration == "open":
-                if max_width < minimum_diameter:
-                    invalids.append(record)
-
-        return invalids
+        ids = self.get_ids(session)
+        configurations = CrossSectionCache.for_session(session).get_configurations(
+            session, self.table, ids
+        )
+        # See nens/threedi-modelchecker#251
+        minimum_diameter = 0.1
+        too_small = configurations.max_width < minimum_diameter
+        # the profile height does not need checking on an open cross-section
+        too_small[configurations.closed] |= (
+            configurations.max_height[configurations.closed] < minimum_diameter
+        )
+        invalid = too_small & (configurations.closed | configurations.open)
+        return self.get_rows(session, ids[invalid].tolist())
 
     def description(self):
         return f"{self.table.name}.cross_section_width and/or cross_section_height should be at least 0.1m"
@@ -461,33 +646,19 @@ class CrossSectionMinimumDiameterCheck(CrossSectionBaseCheck):
 
 class OpenIncreasingCrossSectionCheck(CrossSectionBaseCheck):
     def get_invalid(self, session):
-        invalids = []
-        for record in self.to_check(session):
-            # friction with conveyance can only be used for cross-sections
-            # which are open *and* have a monotonically increasing width
-            if record.cross_section_shape.is_tabulated:
-                if (
-                    record.cross_section_shape
-                    == constants.CrossSectionShape.TABULATED_YZ
-                ):
-                    widths = parse_csv_table_col(
-                        record.cross_section_table, CrossSectionTableXYColumnIdx.Y.value
-                    )
-                else:
-                    widths = parse_csv_table_col(
-                        record.cross_section_table, CrossSectionTableColumnIdx.width
-                    )
-                if any(
-                    next_width < previous_width
-                    for (previous_width, next_width) in zip(widths[:-1], widths[1:])
-                ):
-                    invalids.append(record)
-                    continue
-            _, _, configuration = cross_section_configuration_for_record(record)
-            if configuration == "closed":
-                invalids.append(record)
-
-        return invalids
+        cache = CrossSectionCache.for_session(session)
+        ids = self.get_ids(session)
+        # friction with conveyance can only be used for cross-sections
+        # which are open *and* have a monotonically increasing width
+        invalid = cache.get_configurations(session, self.table, ids).closed
+        parsed = cache.get(session, self.table)
+        for i in np.flatnonzero(~invalid):
+            cross_section = parsed[ids[i]]
+            if cross_section.shape.is_tabulated and cross_section.widths_heights:
+                widths, _ = cross_section.widths_heights
+                invalid[i] = np.any(np.diff(widths) < 0)
+
+        return self.get_rows(session, ids[invalid].tolist())
 
     def description(self):
         return f"{self.column_name} can only be used in an open channel with monotonically increasing width values"
@@ -555,17 +726,22 @@ class CrossSectionVariableCorrectLengthCheck(CrossSectionBaseCheck, ABC):
 
     def get_invalid(self, session):
         invalids = []
-        for record, widths in self.parse_cross_section_table(
-            session, col_idx=CrossSectionTableColumnIdx.width
-        ):
+        widths = dict(
+            self.parse_cross_section_table(
+                session, col_idx=CrossSectionTableColumnIdx.width
+            )
+        )
+        records = self.to_check(session).with_entities(self.table.c.id, self.column)
+        for id, str_value in records:
+            if id not in widths:
+                continue
             try:
-                values = self.parse_str_value(getattr(record, self.column.name))
-
+                values = self.parse_str_value(str_value)
             except ValueError:
                 continue  # other check catches this
-            if not (len(widths) - 1 == len(values)):
-                invalids.append(record)
-        return invalids
+            if not (len(widths[id]) - 1 == len(values)):
+                invalids.append(id)
+        return self.get_rows(session, invalids)
 
     def description(self):
         return f"{self.column_name} should contain 1 value for each element."
@@ -23,6 +23,14 @@ class ForeignKeyCheckSetting:
     filter: Optional[bool] = None
 
 
+def _column_keys(columns):
+    """Return a set of (table name, column name) of columns (or model attributes).
+
+    Looking up columns in this set is much faster than comparing SQL expressions.
+    """
+    return {(column.table.name, column.name) for column in columns}
+
+
 def get_level(table, column, level_map):
     level = level_map.get(f"*.{column.name}")
     level = level_map.get(f"{table.name}.{column.name}", level)
@@ -58,13 +66,12 @@ def generate_unique_checks(
 ):
     custom_level_map = custom_level_map or {}
     unique_checks = []
-    if extra_unique_columns is None:
-        extra_unique_columns = []
+    extra_unique_columns = _column_keys(extra_unique_columns or [])
     for column in table.columns:
         if (
             column.unique
             or column.primary_key
-            or any(col.compare(column) for col in extra_unique_columns)
+            or (table.name, column.name) in extra_unique_columns
         ):
             level = get_level(table, column, custom_level_map)
             unique_checks.append(UniqueCheck(column, level=level, **kwargs))
@@ -76,12 +83,9 @@ def generate_not_null_checks(
 ):
     custom_level_map = custom_level_map or {}
     not_null_checks = []
-    if extra_not_null_columns is None:
-        extra_not_null_columns = []
+    extra_not_null_columns = _column_keys(extra_not_null_columns or [])
     for column in table.columns:
-        if not column.nullable or any(
-            col.compare(column) for col in extra_not_null_columns
-        ):
+        if not column.nullable or (table.name, column.name) in extra_not_null_columns:
             level = get_level(table, column, custom_level_map)
             not_null_checks.append(NotNullCheck(column, level=level, **kwargs))
     return not_null_checks
@@ -141,8 +145,9 @@ def generate_epsg_geom_checks(table, custom_level_map=None, **kwargs):
 def generate_epsg_raster_checks(table, raster_columns, custom_level_map=None, **kwargs):
     custom_level_map = custom_level_map or {}
     checks = []
+    raster_columns = _column_keys(raster_columns)
     for column in table.columns:
-        if column in raster_columns:
+        if (table.name, column.name) in raster_columns:
             level = get_level(table, column, custom_level_map)
             checks.append(
                 RasterHasMatchingEPSGCheck(column=column, level=level, **kwargs)
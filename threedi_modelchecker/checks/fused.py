@@ -0,0 +1,107 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, NamedTuple
+
+from sqlalchemy import and_, case, or_, select
+from sqlalchemy.orm.session import Session
+
+from .base import BaseCheck, InvalidRow
+
+
+def get_fused_clause(check: BaseCheck, session: Session):
+    """Return the invalid clause of a check including its filters.
+
+    Returns None if the check cannot be fused: if it does not provide an invalid
+    clause, if it selects its rows in another way than BaseCheck.to_check or if the
+    clause refers to other tables than the table of the check.
+    """
+    if type(check).to_check is not BaseCheck.to_check:
+        return
+    clause = check.get_invalid_clause(session)
+    if clause is None:
+        return
+    if check.filters is not None:
+        clause = and_(check.filters, clause)
+    # joining other tables would change the rows of the fused query
+    if select(check.table.c.id).where(clause).get_final_froms() != [check.table]:
+        return
+    return clause
+
+
+class FusedTableScan:
+    """Apply the simple checks on a table together, in a single query.
+
+    Checks that provide an invalid clause (see BaseCheck.get_invalid_clause) are
+    grouped per table. When the result of one of them is requested, the table is
+    scanned once for all of them, with a flag per check::
+
+        SELECT id, CASE WHEN <clause 0> THEN 1 ELSE 0 END AS flag_0, ...
+        FROM table WHERE <clause 0> OR <clause 1> OR ...
+
+    The flagged ids are kept per check, until the result of that check is requested.
+    Then the rows are fetched by id (see BaseCheck.iter_rows), so that every check
+    returns the same rows as its get_invalid. Other checks are applied as usual.
+    """
+
+    def __init__(self, checks: Iterable[BaseCheck]):
+        self._checks: Dict[str, List[BaseCheck]] = defaultdict(list)
+        for check in checks:
+            self._checks[check.table.name].append(check)
+        self._invalid: Dict[int, List[int]] = {}
+
+    def get_invalid(self, session: Session, check: BaseCheck) -> List[NamedTuple]:
+        if id(check) not in self._invalid and not self._scan(session, check):
+            return check.get_invalid(session)
+        return check.get_rows(session, self._invalid.pop(id(check)))
+
+    def iter_invalid(
+        self, session: Session, check: BaseCheck, batch_size: int = BaseCheck.BATCH_SIZE
+    ) -> Iterator[NamedTuple]:
+        """Like get_invalid, but fetching the rows in batches (see BaseCheck.iter_invalid)"""
+        if id(check) not in self._invalid and not self._scan(session, check):
+            yield from check.iter_invalid(session, batch_size=batch_size)
+        else:
+            ids = self._invalid.pop(id(check))
+            yield from check.iter_rows(session, ids, batch_size=batch_size)
+
+    def iter_invalid_refs(
+        self, session: Session, check: BaseCheck, batch_size: int = BaseCheck.BATCH_SIZE
+    ) -> Iterator[InvalidRow]:
+        """Like BaseCheck.iter_invalid_refs, without fetching the rows of fused checks"""
+        if id(check) not in self._invalid and not self._scan(session, check):
+            yield from check.iter_invalid_refs(session, batch_size=batch_size)
+        else:
+            ids = self._invalid.pop(id(check))
+            yield from (InvalidRow(check.table.name, id_) for id_ in ids)
+
+    def _scan(self, session: Session, check: BaseCheck) -> bool:
+        """Scan the table of a check for all its pending checks.
+
+        Returns False if the check cannot be fused.
+        """
+        clauses = {}
+        for other in self._checks.get(check.table.name, []):
+            if id(other) in self._invalid:
+                continue  # scanned before, but not requested yet
+            clause = get_fused_clause(other, session)
+            if clause is not None:
+                clauses[id(other)] = clause
+        if id(check) not in clauses:
+            return False
+
+        table = check.table
+        flags = [
+            case((clause, 1), else_=0).label(f"flag_{i}")
+            for (i, clause) in enumerate(clauses.values())
+        ]
+        query = (
+            session.query(table.c.id, *flags)
+            .filter(or_(*clauses.values()))
+            .order_by(table.c.id)
+        )
+        invalid_ids = [[] for _ in clauses]
+        for id_, *row_flags in query:
+            for ids, flag in zip(invalid_ids, row_flags):
+                if flag:
+                    ids.append(id_)
+        self._invalid.update(zip(clauses, invalid_ids))
+        return True
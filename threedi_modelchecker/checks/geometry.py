@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from geoalchemy2.functions import ST_SRID
+from sqlalchemy import func
+
+from .caches import get_session_cache
+
+
+@dataclass(eq=False)
+class GeometryColumnSummary:
+    """Geometry type and SRID of all (non-null) geometries in a column.
+
+    The arrays are aligned with ``ids`` (sorted). Geometry types are stored as codes
+    into ``geometry_types``. Results that could not be computed (NULL in SQL) are
+    masked out, so that they never count as invalid, just like in SQL.
+    """
+
+    ids: np.ndarray
+    geometry_type_codes: np.ndarray
+    geometry_types: List[Optional[str]]
+    srids: np.ndarray
+    has_srid: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows) -> "GeometryColumnSummary":
+        """Construct from (id, geometry_type, srid) rows"""
+        ids, type_codes, srids, has_srid = [], [], [], []
+        geometry_types: Dict[Optional[str], int] = {}
+        for id, geometry_type, srid in rows:
+            ids.append(id)
+            type_codes.append(
+                geometry_types.setdefault(geometry_type, len(geometry_types))
+            )
+            srids.append(-1 if srid is None else srid)
+            has_srid.append(srid is not None)
+        return cls(
+            ids=np.array(ids, dtype=np.int64),
+            geometry_type_codes=np.array(type_codes, dtype=np.int64),
+            geometry_types=list(geometry_types),
+            srids=np.array(srids, dtype=np.int64),
+            has_srid=np.array(has_srid, dtype=bool),
+        )
+
+    def ids_with_other_type(self, geometry_type: str) -> np.ndarray:
+        """Return the ids of geometries of another type than ``geometry_type``"""
+        other = [
+            code
+            for (code, x) in enumerate(self.geometry_types)
+            if x is not None and x != geometry_type
+        ]
+        return self.ids[np.isin(self.geometry_type_codes, other)]
+
+    def ids_with_other_srid(self, srid: int) -> np.ndarray:
+        """Return the ids of geometries with another SRID than ``srid``"""
+        return self.ids[self.has_srid & (self.srids != srid)]
+
+
+def invalid_ids_from_rows(rows) -> np.ndarray:
+    """Return the ids of the invalid geometries from (id, is_valid) rows"""
+    return np.array(
+        [
+            id
+            for (id, is_valid) in rows
+            # like "ST_IsValid(column) != True" in SQL, which is NULL for NULL
+            if is_valid is not None and is_valid != True
+        ],
+        dtype=np.int64,
+    )
+
+
+class GeometryColumnCache:
+    """Type, SRID and validity per geometry column, so that every column is read once.
+
+    The cache is kept on the session (see ``for_session``) and thus lives as long as
+    a check run. The type and SRID of a column are loaded with a single query when
+    they are first requested. The (expensive) validity is only computed when a
+    validity check asks for it, see get_invalid_ids.
+    """
+
+    def __init__(self):
+        self._columns: Dict[Tuple[str, str], GeometryColumnSummary] = {}
+        self._invalid_ids: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def for_session(cls, session) -> "GeometryColumnCache":
+        return get_session_cache(session, "geometry_column_cache", cls)
+
+    def get(self, session, column) -> GeometryColumnSummary:
+        key = (column.table.name, column.name)
+        if key not in self._columns:
+            query = self._query(
+                session, column, func.ST_GeometryType(column), ST_SRID(column)
+            )
+            self._columns[key] = GeometryColumnSummary.from_rows(query)
+        return self._columns[key]
+
+    def get_invalid_ids(self, session, column) -> np.ndarray:
+        """Return the (sorted) ids of the invalid geometries in a column"""
+        key = (column.table.name, column.name)
+        if key not in self._invalid_ids:
+            query = self._query(session, column, func.ST_IsValid(column))
+            self._invalid_ids[key] = invalid_ids_from_rows(query)
+        return self._invalid_ids[key]
+
+    @staticmethod
+    def _query(session, column, *expressions):
+        id_column = column.table.c.id
+        return (
+            session.query(id_column, *expressions)
+            .filter(column != None)
+            .order_by(id_column)
+        )
+
+    def clear(self):
+        self._columns.clear()
+        self._invalid_ids.clear()
@@ -1,7 +1,7 @@
 from typing import List, NamedTuple
 
 from geoalchemy2.functions import ST_Distance, ST_NPoints, ST_PointN
-from sqlalchemy.orm import aliased, Session
+from sqlalchemy.orm import aliased, Query, Session
 from threedi_schema.domain import models
 
 from threedi_modelchecker.checks.base import BaseCheck
@@ -23,7 +23,13 @@ class PointLocationCheck(BaseCheck):
         self.ref_table = ref_table
         super().__init__(*args, **kwargs)
 
+    def get_index_columns(self):
+        return [self.ref_column]
+
     def get_invalid(self, session):
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session):
         # get all channels with more than 1 cross section location
         return (
             self.to_check(session)
@@ -32,7 +38,6 @@ class PointLocationCheck(BaseCheck):
                 self.ref_table.id == self.ref_column,
             )
             .filter(ST_Distance(self.column, self.ref_table.geom) > self.max_distance)
-            .all()
         )
 
     def description(self):
@@ -66,7 +71,13 @@ class LinestringLocationCheck(BaseCheck):
         self.ref_table_end = ref_table_end
         super().__init__(*args, **kwargs)
 
+    def get_index_columns(self):
+        return [self.ref_column_start, self.ref_column_end]
+
     def get_invalid(self, session: Session) -> List[NamedTuple]:
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session: Session) -> Query:
         start_node = aliased(self.ref_table_start)
         end_node = aliased(self.ref_table_end)
         tol = self.max_distance
@@ -84,7 +95,6 @@ class LinestringLocationCheck(BaseCheck):
                 ~(start_ok & end_ok),
                 ~(start_ok_if_reversed & end_ok_if_reversed),
             )
-            .all()
         )
 
     def description(self) -> str:
@@ -0,0 +1,226 @@
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+from threedi_schema.domain import constants, models
+
+from .base import BaseCheck
+from .caches import get_session_cache
+from .topology import TopologyIndex
+
+# The exchange types of objects that do not exchange water with the 2D domain
+NO_EXCHANGE = {
+    models.ConnectionNode: (constants.CalculationTypeNode.ISOLATED,),
+    models.Channel: (constants.CalculationType.STANDALONE,),
+    models.Pipe: (constants.PipeCalculationType.ISOLATED,),
+    models.Culvert: (
+        constants.CalculationTypeCulvert.ISOLATED_NODE,
+        constants.CalculationTypeCulvert.STANDALONE,
+    ),
+}
+
+
+def connected_components(n: int, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Return the component of each of n nodes, given the edges (starts, ends).
+
+    Components are labeled by their lowest node. This is a union-find with union by
+    size and path halving, so it runs in (almost) O(nodes + edges).
+    """
+    parent = list(range(n))
+    size = [1] * n
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(starts.tolist(), ends.tolist()):
+        a, b = find(a), find(b)
+        if a == b:
+            continue
+        if size[a] < size[b]:
+            a, b = b, a
+        parent[b] = a
+        size[a] += size[b]
+
+    roots = np.array([find(x) for x in range(n)], dtype=np.int64)
+    # relabel every component to its lowest node
+    lowest = np.full(n, n, dtype=np.int64)
+    np.minimum.at(lowest, roots, np.arange(n, dtype=np.int64))
+    return lowest[roots]
+
+
+class NetworkIndex:
+    """The connected components of the 1D network.
+
+    The network consists of the connection nodes and the channels, pipes, culverts,
+    weirs, orifices and pumps (with a pump map) between them. It is built from the
+    TopologyIndex in O(nodes + links); the index is kept on the session (see
+    ``for_session``) and thus lives as long as a check run.
+
+    ``labels`` holds the component of every node in ``TopologyIndex.node_ids``: the
+    position of its lowest node. Per component, ``has_links``, ``has_boundary``,
+    ``has_storage`` and ``has_exchange`` tell whether it contains any link, a 1D
+    boundary condition, a connection node with storage or an object that exchanges
+    with the 2D domain.
+    """
+
+    def __init__(self, session: Session):
+        self.topology = topology = TopologyIndex.for_session(session)
+        n = len(topology.node_ids)
+        starts = [start for (_, start, _) in topology.links.values()]
+        ends = [end for (_, _, end) in topology.links.values()]
+        pump_links = np.array(
+            [
+                [x if x is not None else -1 for x in row]
+                for row in session.query(
+                    models.Pump.connection_node_id,
+                    models.PumpMap.connection_node_id_end,
+                ).join(models.PumpMap, models.PumpMap.pump_id == models.Pump.id)
+            ],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        starts.append(topology.node_index(pump_links[:, 0]))
+        ends.append(topology.node_index(pump_links[:, 1]))
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        # links with an unknown node do not connect anything
+        mask = (starts != -1) & (ends != -1)
+        starts, ends = starts[mask], ends[mask]
+
+        self.labels = connected_components(n, starts, ends)
+        self.has_links = np.zeros(n, dtype=bool)
+        self.has_links[self.labels[starts]] = True
+        self.has_boundary = self._any(
+            session.query(models.BoundaryCondition1D.connection_node_id)
+        )
+        self.has_storage = self._any(
+            session.query(models.ConnectionNode.id).filter(
+                models.ConnectionNode.storage_area > 0
+            )
+        )
+        self.has_exchange = np.zeros(n, dtype=bool)
+        for model, no_exchange in NO_EXCHANGE.items():
+            if model is models.ConnectionNode:
+                columns = [models.ConnectionNode.id]
+            else:
+                columns = [model.connection_node_id_start, model.connection_node_id_end]
+            query = session.query(*columns).filter(
+                model.exchange_type.isnot(None),
+                model.exchange_type.notin_(no_exchange),
+            )
+            self.has_exchange |= self._any(query)
+
+    def _any(self, query) -> np.ndarray:
+        """Return per component whether it contains a node returned by the query"""
+        idx = self.topology.node_index([x for row in query for x in row])
+        result = np.zeros(len(self.labels), dtype=bool)
+        result[self.labels[idx[idx != -1]]] = True
+        return result
+
+    @classmethod
+    def for_session(cls, session) -> "NetworkIndex":
+        return get_session_cache(session, "network_index", lambda: cls(session))
+
+    def component_sizes(self) -> Dict[int, int]:
+        """Return the number of nodes per component with links, by its lowest node id"""
+        sizes = np.bincount(self.labels, minlength=len(self.labels))
+        components = np.flatnonzero(self.has_links)
+        return dict(
+            zip(
+                self.topology.node_ids[components].tolist(),
+                sizes[components].tolist(),
+            )
+        )
+
+
+class NetworkWithoutOutletCheck(BaseCheck):
+    """Check that every 1D network has a boundary condition, storage or exchange
+    with the 2D domain.
+
+    Every such network is reported once, by its connection node with the lowest id.
+    The number of connection nodes of these networks is listed in the description.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(column=models.ConnectionNode.id, *args, **kwargs)
+        self.network_sizes = ""
+
+    def get_invalid(self, session: Session) -> List[NamedTuple]:
+        network = NetworkIndex.for_session(session)
+        invalid = network.has_links & ~(
+            network.has_boundary | network.has_storage | network.has_exchange
+        )
+        ids = network.topology.node_ids[np.flatnonzero(invalid)].tolist()
+        sizes = network.component_sizes()
+        self.network_sizes = ", ".join(f"{id}: {sizes[id]}" for id in ids)
+        return self.get_rows(session, ids)
+
+    def description(self) -> str:
+        description = (
+            "The 1D network connected to this connection node has no boundary "
+            "condition, no storage and no exchange with the 2D domain."
+        )
+        if self.network_sizes:
+            description += (
+                " Number of connection nodes per network (by its connection node): "
+                f"{self.network_sizes}."
+            )
+        return description
+
+
+class PumpCycleCheck(BaseCheck):
+    """Check that pumps do not pump in a cycle.
+
+    A pump pumps from its connection node to the connection_node_id_end of its pump
+    map. Pumps are invalid if they are on a cycle (or between cycles) of pumps. A
+    pump that pumps to its own connection node is checked separately.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(column=models.Pump.id, *args, **kwargs)
+
+    def get_invalid(self, session: Session) -> List[NamedTuple]:
+        records = (
+            session.query(
+                models.Pump.id,
+                models.Pump.connection_node_id,
+                models.PumpMap.connection_node_id_end,
+            )
+            .join(models.PumpMap, models.PumpMap.pump_id == models.Pump.id)
+            .filter(
+                models.Pump.connection_node_id != models.PumpMap.connection_node_id_end
+            )
+            .all()
+        )
+        edges = [(start, end) for (_, start, end) in records]
+        # remove the pumps that are not on a cycle: edges that start at a node that is
+        # not pumped to, or that end at a node that is not pumped from (Kahn)
+        remaining = _prune(_prune(edges, 0, 1), 1, 0)
+        ids = {id for (id, start, end) in records if (start, end) in remaining}
+        return self.get_rows(session, ids)
+
+    def description(self) -> str:
+        return "This pump is part of a cycle of pumps."
+
+
+def _prune(edges, source: int, target: int):
+    """Remove edges whose source has no incoming edges, repeatedly.
+
+    ``source`` and ``target`` are the positions of the nodes in the edge tuples.
+    Runs in O(edges). Returns the set of remaining edges.
+    """
+    incoming: Dict[int, int] = {}
+    outgoing: Dict[int, List] = {}
+    for edge in edges:
+        incoming[edge[target]] = incoming.get(edge[target], 0) + 1
+        outgoing.setdefault(edge[source], []).append(edge)
+    remaining = set(edges)
+    stack = [node for node in outgoing if incoming.get(node, 0) == 0]
+    while stack:
+        for edge in outgoing.pop(stack.pop(), []):
+            remaining.discard(edge)
+            incoming[edge[target]] -= 1
+            if incoming[edge[target]] == 0:
+                stack.append(edge[target])
+    return remaining
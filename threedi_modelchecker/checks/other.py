@@ -3,6 +3,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import List, Literal, NamedTuple
 
+import numpy as np
 import pyproj
 from geoalchemy2.functions import ST_Distance, ST_Length
 from sqlalchemy import (
@@ -21,7 +22,9 @@ from sqlalchemy.orm import aliased, Query, Session
 from threedi_schema.domain import constants, models
 
 from .base import BaseCheck, CheckLevel
-from .cross_section_definitions import cross_section_configuration_for_record
+from .cross_section_definitions import CrossSectionCache
+from .tags import TagsCache
+from .topology import BaseTopologyCheck, LINK_TABLES
 
 
 class CorrectAggregationSettingsExist(BaseCheck):
@@ -155,6 +158,9 @@ class CrossSectionSameConfigurationCheck(BaseCheck):
             else_="open",
         )
 
+    def get_index_columns(self):
+        return [models.CrossSectionLocation.channel_id]
+
     def get_invalid(self, session):
         # find all tabulated cross sections
         cross_sections_tab = select(
@@ -284,6 +290,9 @@ class ConnectionNodesLength(BaseCheck):
         self.min_distance = min_distance
         self.recommended_distance = recommended_distance
 
+    def get_index_columns(self):
+        return [self.start_node, self.end_node]
+
     def get_invalid(self, session):
         start_node = aliased(models.ConnectionNode)
         end_node = aliased(models.ConnectionNode)
@@ -460,13 +469,14 @@ class OpenChannelsWithNestedNewton(BaseCheck):
         # self.table = table
 
     def get_invalid(self, session: Session) -> List[NamedTuple]:
-        invalids = []
-        for record in self.to_check(session):
-            _, _, configuration = cross_section_configuration_for_record(record)
-
-            if configuration == "closed":
-                invalids.append(record)
-        return invalids
+        ids = np.array(
+            [id for (id,) in self.to_check(session).with_entities(self.table.c.id)],
+            dtype=np.int64,
+        )
+        configurations = CrossSectionCache.for_session(session).get_configurations(
+            session, self.table, ids
+        )
+        return self.get_rows(session, ids[configurations.closed].tolist())
 
     def to_check(self, session: Session):
         return (
@@ -483,43 +493,21 @@ class OpenChannelsWithNestedNewton(BaseCheck):
         )
 
 
-class BoundaryCondition1DObjectNumberCheck(BaseCheck):
+class BoundaryCondition1DObjectNumberCheck(BaseTopologyCheck):
     """Check that the number of connected objects to 1D boundary connections is 1."""
 
+    table_names = LINK_TABLES
+
     def __init__(self, *args, **kwargs):
         super().__init__(
-            column=models.BoundaryCondition1D.connection_node_id, *args, **kwargs
+            column=models.BoundaryCondition1D.connection_node_id,
+            node_column=models.BoundaryCondition1D.connection_node_id,
+            *args,
+            **kwargs,
         )
 
-    def get_invalid(self, session: Session) -> List[NamedTuple]:
-        invalid_ids = []
-        for bc in self.to_check(session).all():
-            total_objects = 0
-            for table in [
-                models.Channel,
-                models.Pipe,
-                models.Culvert,
-                models.Orifice,
-                models.Weir,
-            ]:
-                total_objects += (
-                    session.query(table)
-                    .filter(table.connection_node_id_start == bc.connection_node_id)
-                    .count()
-                )
-                total_objects += (
-                    session.query(table)
-                    .filter(table.connection_node_id_end == bc.connection_node_id)
-                    .count()
-                )
-            if total_objects != 1:
-                invalid_ids.append(bc.id)
-
-        return (
-            self.to_check(session)
-            .filter(models.BoundaryCondition1D.id.in_(invalid_ids))
-            .all()
-        )
+    def is_invalid(self, degrees):
+        return degrees != 1
 
     def description(self) -> str:
         return "1D boundary condition should be connected to exactly one object."
@@ -796,15 +784,15 @@ class FeatureClosedCrossSectionCheck(BaseCheck):
     """
 
     def get_invalid(self, session):
-        invalids = []
-        for record in self.to_check(session):
-            _, _, configuration = cross_section_configuration_for_record(record)
-
-            # Pipes and culverts should generally have a closed cross-section
-            if configuration == "open":
-                invalids.append(record)
-
-        return invalids
+        ids = np.array(
+            [id for (id,) in self.to_check(session).with_entities(self.table.c.id)],
+            dtype=np.int64,
+        )
+        configurations = CrossSectionCache.for_session(session).get_configurations(
+            session, self.table, ids
+        )
+        # Pipes and culverts should generally have a closed cross-section
+        return self.get_rows(session, ids[configurations.open].tolist())
 
     def description(self):
         return f"{self.column_name} has an open cross-section, which is unusual for this feature. Please make sure this is not a mistake."
@@ -820,18 +808,16 @@ class FeatureClosedCrossSectionWithInvalidExchangeCheck(BaseCheck):
         self.invalid_exchange_type = invalid_exchange_type
 
     def get_invalid(self, session):
-        invalids = []
-        for record in self.to_check(session):
-            _, _, configuration = cross_section_configuration_for_record(record)
-
-            # Pipes and culverts should generally have a closed cross-section
-            if (
-                configuration == "closed"
-                and record.exchange_type == self.invalid_exchange_type
-            ):
-                invalids.append(record)
-
-        return invalids
+        records = self.to_check(session).filter(
+            self.table.c.exchange_type == self.invalid_exchange_type
+        )
+        ids = np.array(
+            [id for (id,) in records.with_entities(self.table.c.id)], dtype=np.int64
+        )
+        configurations = CrossSectionCache.for_session(session).get_configurations(
+            session, self.table, ids
+        )
+        return self.get_rows(session, ids[configurations.closed].tolist())
 
     def description(self):
         return f"{self.column_name} has a closed cross-section and exchange type {str(self.invalid_exchange_type)}"
@@ -868,7 +854,10 @@ class BetaColumnsCheck(BaseCheck):
     """Check that no beta columns were used in the database"""
 
     def get_invalid(self, session: Session) -> List[NamedTuple]:
-        return session.query(self.table).filter(self.column.isnot(None)).all()
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session: Session) -> Query:
+        return session.query(self.table).filter(self.column.isnot(None))
 
     def description(self) -> str:
         return f"{self.column_name} is a beta feature, which is still under development; please do not use it yet."
@@ -889,7 +878,10 @@ class BetaValuesCheck(BaseCheck):
         self.values = values
 
     def get_invalid(self, session: Session) -> List[NamedTuple]:
-        return session.query(self.table).filter(self.column.in_(self.values)).all()
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session: Session) -> Query:
+        return session.query(self.table).filter(self.column.in_(self.values))
 
     def description(self) -> str:
         return f"The value you have used for {self.column_name} is still in beta; please do not use it yet."
@@ -1042,22 +1034,11 @@ class MaxOneRecordCheck(BaseCheck):
 
 class TagsValidCheck(BaseCheck):
     def get_invalid(self, session):
-        invalids = []
-        try:
-            for record in self.to_check(session).filter(
-                (self.column != None) & (self.column != "")
-            ):
-                query = f"SELECT id FROM tags WHERE id IN ({getattr(record, self.column.name)})"
-                match_rows = session.connection().execute(text(query)).fetchall()
-                found_idx = {row[0] for row in match_rows}
-                req_idx = {int(x) for x in getattr(record, self.column.name).split(",")}
-                if found_idx != req_idx:
-                    invalids.append(record)
-        except (
-            ValueError
-        ):  # in case of badly formatted tags; handled by ListOfIntsCheck
-            pass
-        return invalids
+        # badly formatted tags are handled by ListOfIntsCheck
+        cache = TagsCache.for_session(session)
+        summary = cache.get(session, self.column)
+        invalid = summary.ids_with_missing_tag(cache.get_tag_ids(session))
+        return self.get_rows(session, invalid.tolist())
 
     def description(self) -> str:
         return f"{self.table.name}.{self.column} refers to tag ids that are not present in Tags, "
@@ -1134,27 +1115,32 @@ class ControlHasSingleMeasureVariable(BaseCheck):
             error_code=error_code,
         )
 
+    def get_index_columns(self):
+        return [models.MeasureMap.control_id, models.MeasureMap.measure_location_id]
+
     def get_invalid(self, session: Session) -> List[NamedTuple]:
-        invalid = []
-        for record in self.to_check(session):
-            res = (
-                session.query(models.MeasureMap)
-                .filter(
-                    models.MeasureMap.control_type == self.control_type_name,
-                    models.MeasureMap.control_id == record.id,
-                )
-                .join(
-                    models.MeasureLocation,
-                    models.MeasureMap.measure_location_id == models.MeasureLocation.id,
-                )
-                .with_entities(models.MeasureLocation.measure_variable)
-            ).all()
-            if len(res) == 0:
-                continue
-            first_measure_variable = res[0].measure_variable
-            if not all(item[0] == first_measure_variable for item in res):
-                invalid.append(record)
-        return invalid
+        return self.get_invalid_query(session).all()
+
+    def get_invalid_query(self, session: Session) -> Query:
+        measure_variable = models.MeasureLocation.measure_variable
+        # controls mapped to more than one measure variable, counting NULL as one
+        invalid_ids = (
+            session.query(models.MeasureMap.control_id)
+            .join(
+                models.MeasureLocation,
+                models.MeasureMap.measure_location_id == models.MeasureLocation.id,
+            )
+            .filter(models.MeasureMap.control_type == self.control_type_name)
+            .group_by(models.MeasureMap.control_id, models.MeasureMap.control_type)
+            .having(
+                func.count(distinct(measure_variable))
+                + case((func.count() > func.count(measure_variable), 1), else_=0)
+                > 1
+            )
+        )
+        return self.to_check(session).filter(
+            self.table.c.id.in_(invalid_ids.scalar_subquery())
+        )
 
     def description(self) -> str:
         return f"{self.table.name} is mapped to measure locations with different measure variables"
@@ -1292,19 +1278,45 @@ class ModelEPSGCheckUnits(BaseCheck):
 
 class GridRefinementPartialOverlap2DBoundaryCheck(BaseCheck):
     def get_invalid(self, session) -> List[NamedTuple]:
-        invalid = []
-        for record in self.to_check(session):
-            # check how many grid refinement areas are crossed by the 2D boundary condition line
-            overlapped_areas = len(
-                session.execute(
-                    select(models.GridRefinementArea).filter(
-                        func.ST_Crosses(models.GridRefinementArea.geom, record.geom)
-                    )
-                ).all()
-            )
-            if overlapped_areas > 0:
-                invalid.append(record)
-        return invalid
+        """
+        The 2D boundary conditions that cross any grid refinement area are found in a
+        single query. It makes use of the spatial index of the grid refinement areas
+        (the rtree of a geopackage or the SpatialIndex of a spatialite, if present), so
+        that ST_Crosses is only computed for overlapping bounding boxes. Without a
+        spatial index (see SpatialIndexCheck) every pair of boundary condition and
+        grid refinement area is compared.
+        """
+        area_table = models.GridRefinementArea.__tablename__
+        bbox_join = "WHERE"
+        for index, (id, minx, maxx, miny, maxy) in (
+            (f"rtree_{area_table}_geom", ("id", "minx", "maxx", "miny", "maxy")),
+            (f"idx_{area_table}_geom", ("pkid", "xmin", "xmax", "ymin", "ymax")),
+        ):
+            has_index = session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+                {"name": index},
+            ).first()
+            if has_index:
+                # the index is looked up once per boundary condition
+                bbox_join = f"""
+                    JOIN {index} AS r ON area.ROWID = r.{id}
+                    WHERE r.{maxx} >= ST_MinX(bc.geom)
+                    AND r.{minx} <= ST_MaxX(bc.geom)
+                    AND r.{maxy} >= ST_MinY(bc.geom)
+                    AND r.{miny} <= ST_MaxY(bc.geom)
+                    AND
+                """
+                break
+        query = text(
+            f"""
+            SELECT DISTINCT bc.id
+            FROM {self.table.name} AS bc, {area_table} AS area
+            {bbox_join} ST_Crosses(area.geom, bc.geom)
+            """
+        )
+        # get ids for invalid rows, then return them with proper WKBElement geometries
+        result_ids = [row.id for row in session.execute(query)]
+        return self.get_rows(session, result_ids)
 
     def description(self):
         return "2D boundary condition overlaps with grid refinement area. Make sure it is either completely contained by (within) or disjoint from the grid refinement polygon."
@@ -1,15 +1,21 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from math import isclose
 from pathlib import Path
 from typing import Dict, Optional, Type
 
 from threedi_schema import models
 
-from threedi_modelchecker.interfaces import GDALRasterInterface, RasterInterface
+from threedi_modelchecker.interfaces import (
+    GDALRasterInterface,
+    RasterInterface,
+    RasterMetadata,
+    RasterMetadataCache,
+    RasterStatisticsStore,
+)
 
 from .base import BaseCheck
 
-# interface_cls.is_valid_geotiff returns False if the dataset is empty
+# raster.is_valid_geotiff returns False if the dataset is empty
 # (such as when the column doesn't reference a file) or the dataset is not a valid geotiff.
 # It's used on every raster check which reads the raster file in any way,
 # to prevent any other code in the check from executing on a bad file.
@@ -17,7 +23,11 @@ from .base import BaseCheck
 
 
 class Context:
-    pass
+    def __post_init__(self):
+        if self.raster_statistics_dir is not None:
+            self.raster_cache.statistics_store = RasterStatisticsStore(
+                self.raster_statistics_dir
+            )
 
 
 @dataclass
@@ -26,6 +36,10 @@ class ServerContext(Context):
     raster_interface: Type[RasterInterface] = GDALRasterInterface
     epsg_ref_code: int = None
     epsg_ref_name: str = ""
+    raster_statistics_dir: Optional[Path] = None
+    raster_cache: RasterMetadataCache = field(
+        default_factory=RasterMetadataCache, repr=False, compare=False
+    )
 
 
 @dataclass
@@ -34,6 +48,10 @@ class LocalContext(Context):
     raster_interface: Type[RasterInterface] = GDALRasterInterface
     epsg_ref_code: int = None
     epsg_ref_name: str = ""
+    raster_statistics_dir: Optional[Path] = None
+    raster_cache: RasterMetadataCache = field(
+        default_factory=RasterMetadataCache, repr=False, compare=False
+    )
 
 
 class BaseRasterCheck(BaseCheck):
@@ -41,6 +59,10 @@ class BaseRasterCheck(BaseCheck):
 
     Because these checks are different on local and server systems, subclasses may
     implement 2 methods: is_valid_local and/or is_valid_local.
+
+    Subclasses that read the raster implement is_valid_raster, which receives the
+    RasterMetadata from the cache on the context. In this way every raster file is
+    only opened once, regardless of the number of checks that inspect it.
     """
 
     def to_check(self, session):
@@ -68,7 +90,10 @@ class BaseRasterCheck(BaseCheck):
         return [
             record
             for (record, path) in zip(records, paths)
-            if path is not None and not self.is_valid(path, raster_interface)
+            if path is not None
+            and not self.is_valid_raster(
+                context.raster_cache.get(path, raster_interface)
+            )
         ]
 
     def get_path_local(self, record, context: LocalContext) -> Optional[str]:
@@ -83,6 +108,10 @@ class BaseRasterCheck(BaseCheck):
             return context.available_rasters.get(self.column.name)
 
     def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
+        """Check a single raster file, without using a cache"""
+        return self.is_valid_raster(RasterMetadata(path, interface_cls))
+
+    def is_valid_raster(self, raster: RasterMetadata):
         return True
 
 
@@ -124,9 +153,8 @@ class RasterExistsCheck(BaseRasterCheck):
 class RasterIsValidCheck(BaseRasterCheck):
     """Check whether a file is a geotiff."""
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
-        with interface_cls(path) as raster:
-            return raster.is_valid_geotiff
+    def is_valid_raster(self, raster: RasterMetadata):
+        return raster.is_valid_geotiff
 
     def description(self):
         return f"The file in {self.column_name} is not a valid GeoTIFF file"
@@ -135,11 +163,10 @@ class RasterIsValidCheck(BaseRasterCheck):
 class RasterHasOneBandCheck(BaseRasterCheck):
     """Check whether a raster has a single band."""
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
-        with interface_cls(path) as raster:
-            if not raster.is_valid_geotiff:
-                return True
-            return raster.band_count == 1
+    def is_valid_raster(self, raster: RasterMetadata):
+        if not raster.is_valid_geotiff:
+            return True
+        return raster.band_count == 1
 
     def description(self):
         return f"The file in {self.column_name} has multiple or no bands."
@@ -164,15 +191,14 @@ class RasterHasMatchingEPSGCheck(BaseRasterCheck):
         self.epsg_ref_code = session.model_checker_context.epsg_ref_code
         return super().get_invalid(session)
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
+    def is_valid_raster(self, raster: RasterMetadata):
         if self.epsg_ref_code is None:
             return True
-        with interface_cls(path) as raster:
-            if not raster.is_valid_geotiff or not raster.has_projection:
-                return True
-            if raster.epsg_code is None:
-                return False
-            return raster.epsg_code == self.epsg_ref_code
+        if not raster.is_valid_geotiff or not raster.has_projection:
+            return True
+        if raster.epsg_code is None:
+            return False
+        return raster.epsg_code == self.epsg_ref_code
 
     def description(self):
         return f"The file in {self.column_name} has no EPSG code or the EPSG code does not match does not match {self.epsg_ref_name}"
@@ -185,14 +211,11 @@ class RasterSquareCellsCheck(BaseRasterCheck):
         super().__init__(*args, **kwargs)
         self.decimals = decimals
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
-        with interface_cls(path) as raster:
-            if not raster.is_valid_geotiff:
-                return True
-            dx, dy = raster.pixel_size
-            return dx is not None and round(dx, self.decimals) == round(
-                dy, self.decimals
-            )
+    def is_valid_raster(self, raster: RasterMetadata):
+        if not raster.is_valid_geotiff:
+            return True
+        dx, dy = raster.pixel_size
+        return dx is not None and round(dx, self.decimals) == round(dy, self.decimals)
 
     def description(self):
         return f"The raster in {self.column_name} has non-square raster cells."
@@ -211,22 +234,21 @@ class RasterGridSizeCheck(BaseRasterCheck):
             return []
         return super().get_invalid(session)
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
-        with interface_cls(path) as raster:
-            if not raster.is_valid_geotiff:
-                return True
-            # the x pixel size is used here,but it is equal to the y pixel size
-            try:
-                return (
-                    isclose(
-                        a=((self.minimum_cell_size / raster.pixel_size[0]) % 2),
-                        b=0,
-                        rel_tol=1e-09,
-                    )
-                ) and (self.minimum_cell_size >= (2 * raster.pixel_size[0]))
-            # if one of the fields is a NoneType it will be caught elsewhere
-            except TypeError:
-                return True
+    def is_valid_raster(self, raster: RasterMetadata):
+        if not raster.is_valid_geotiff:
+            return True
+        # the x pixel size is used here,but it is equal to the y pixel size
+        try:
+            return (
+                isclose(
+                    a=((self.minimum_cell_size / raster.pixel_size[0]) % 2),
+                    b=0,
+                    rel_tol=1e-09,
+                )
+            ) and (self.minimum_cell_size >= (2 * raster.pixel_size[0]))
+        # if one of the fields is a NoneType it will be caught elsewhere
+        except TypeError:
+            return True
 
     def description(self):
         return "model_settings.minimum_cell_size is not a positive even multiple of the raster cell size."
@@ -239,10 +261,11 @@ class RasterPixelCountCheck(BaseRasterCheck):
         super().__init__(*args, **kwargs)
         self.max_pixels = max_pixels
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
-        with interface_cls(path) as raster:
-            width, height = raster.shape
-            return True if width * height <= self.max_pixels else False
+    def is_valid_raster(self, raster: RasterMetadata):
+        if raster.shape is None:
+            return True  # the file could not be opened; checked elsewhere
+        width, height = raster.shape
+        return True if width * height <= self.max_pixels else False
 
     def description(self):
         return f"The file in {self.column_name} exceeds {self.max_pixels} pixels."
@@ -273,14 +296,16 @@ class RasterRangeCheck(BaseRasterCheck):
         self.message = message
         super().__init__(*args, **kwargs)
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
-        with interface_cls(path) as raster:
-            if not raster.is_valid_geotiff:
-                return True
-            try:
-                raster_min, raster_max = raster.min_max
-            except RasterInterface.NoData:
-                return False  # no data in the raster is invalid too
+    def is_valid_raster(self, raster: RasterMetadata):
+        if not raster.is_valid_geotiff:
+            return True
+        try:
+            # reading the raster stops as soon as a value outside the range is found
+            raster_min, raster_max = raster.get_min_max(
+                lower=self.min_value, upper=self.max_value
+            )
+        except RasterInterface.NoData:
+            return False  # no data in the raster is invalid too
 
         if raster_min is None or raster_max is None:
             return False
@@ -311,11 +336,10 @@ class RasterRangeCheck(BaseRasterCheck):
 class RasterCompressionUsedCheck(BaseRasterCheck):
     """Checks whether compression was used for the raster"""
 
-    def is_valid(self, path: str, interface_cls: Type[RasterInterface]):
-        with interface_cls(path) as raster:
-            if not raster.is_valid_geotiff:
-                return True
-            return raster.compression != "NONE"
+    def is_valid_raster(self, raster: RasterMetadata):
+        if not raster.is_valid_geotiff:
+            return True
+        return raster.compression != "NONE"
 
     def description(self):
         return f"Raster {self.column_name} is not compressed. It is recommended to use DEFLATE compression. This speeds up uploading and downloading and reduces storage space."
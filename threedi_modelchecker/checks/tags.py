@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from threedi_schema.domain import models
+
+from .caches import get_session_cache
+
+
+@dataclass(eq=False)
+class IntListColumnSummary:
+    """The parsed comma-separated lists of integers of all (non-empty) records.
+
+    The arrays ``ids``, ``is_list_of_ints`` and ``counts`` are aligned (sorted by
+    id). ``is_list_of_ints`` is False for records that are not a comma-separated
+    list of integers. ``values`` holds the parsed integers of all records, ``counts``
+    the number of integers per record.
+    """
+
+    ids: np.ndarray
+    is_list_of_ints: np.ndarray
+    values: np.ndarray
+    counts: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Construct from (id, value) rows, parsing every value once"""
+        ids, is_list_of_ints, values, counts = [], [], [], []
+        for id, value in rows:
+            ids.append(id)
+            try:
+                parsed = [int(x) for x in value.split(",")]
+            except ValueError:
+                is_list_of_ints.append(False)
+                counts.append(0)
+            else:
+                is_list_of_ints.append(True)
+                values.extend(parsed)
+                counts.append(len(parsed))
+        return cls(
+            ids=np.array(ids, dtype=np.int64),
+            is_list_of_ints=np.array(is_list_of_ints, dtype=bool),
+            values=np.array(values, dtype=np.int64),
+            counts=np.array(counts, dtype=np.int64),
+        )
+
+    def ids_not_list_of_ints(self) -> np.ndarray:
+        """Return the ids of records that are not a comma-separated list of integers"""
+        return self.ids[~self.is_list_of_ints]
+
+    def ids_with_missing_tag(self, tag_ids: np.ndarray) -> np.ndarray:
+        """Return the ids of records that refer to ids that are not in ``tag_ids``"""
+        # per value, whether it is a tag; then per record, whether all are
+        is_missing = ~np.isin(self.values, tag_ids)
+        starts = np.cumsum(self.counts) - self.counts
+        non_empty = self.counts > 0
+        has_missing_tag = np.zeros(len(self.ids), dtype=bool)
+        has_missing_tag[non_empty] = np.logical_or.reduceat(
+            is_missing, starts[non_empty]
+        )
+        return self.ids[has_missing_tag]
+
+
+class TagsCache:
+    """Parsed lists of integers per column, so that every column is parsed once.
+
+    The cache is kept on the session (see ``for_session``) and thus lives as long as
+    a check run. A column is loaded with a single query when it is first requested;
+    the ids of the tags table are also read only once (see ``get_tag_ids``).
+    """
+
+    def __init__(self):
+        self._columns: Dict[Tuple[str, str], IntListColumnSummary] = {}
+        self._tag_ids: Optional[np.ndarray] = None
+
+    @classmethod
+    def for_session(cls, session) -> "TagsCache":
+        return get_session_cache(session, "tags_cache", cls)
+
+    def get_tag_ids(self, session) -> np.ndarray:
+        """Return the (sorted) ids in the tags table"""
+        if self._tag_ids is None:
+            self._tag_ids = np.array(
+                [x for (x,) in session.query(models.Tags.id).order_by(models.Tags.id)],
+                dtype=np.int64,
+            )
+        return self._tag_ids
+
+    def get(self, session, column) -> IntListColumnSummary:
+        key = (column.table.name, column.name)
+        if key not in self._columns:
+            id_column = column.table.c.id
+            query = (
+                session.query(id_column, column)
+                .filter(column != None, column != "")
+                .order_by(id_column)
+            )
+            self._columns[key] = IntListColumnSummary.from_rows(query)
+        return self._columns[key]
+
+    def clear(self):
+        self._columns.clear()
+        self._tag_ids = None
@@ -1,10 +1,17 @@
+from dataclasses import dataclass
 from enum import Enum
+from functools import cached_property
 from itertools import chain
+from typing import Dict, Iterator, List, Tuple
 
+import numpy as np
 from sqlalchemy import func
 from threedi_schema import models
 
 from .base import BaseCheck
+from .caches import get_session_cache
+
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
 
 valid_time_map = {
     "seconds": ["seconds", "second", "sec", "s"],
@@ -29,39 +36,215 @@ class TimeUnits(Enum):
 
 
 def parse_timeseries(timeseries_str):
-    if not timeseries_str:
-        return []
-    output = []
-    for line in timeseries_str.split():
-        timestep, value = line.split(",")
-        timestep = int(timestep.strip())
-        output.append([timestep, float(value.strip())])
-    return output
+    """Parse a timeseries string into a list of [timestep, value] pairs.
+
+    Raises ValueError if the timeseries cannot be parsed.
+    """
+    parsed = ParsedTimeseries.from_string(timeseries_str)
+    if not parsed.is_parsed:
+        raise ValueError(f"Invalid timeseries: {timeseries_str}")
+    return [[int(t), float(v)] for (t, v) in zip(parsed.timesteps, parsed.values)]
 
 
 def compare_timesteps(first_timeseries: str, second_timeseries: str) -> bool:
-    first_timesteps = [pair[0] for pair in parse_timeseries(first_timeseries)]
-    second_timesteps = [pair[0] for pair in parse_timeseries(second_timeseries)]
-    return first_timesteps == second_timesteps
+    first = ParsedTimeseries.from_string(first_timeseries)
+    second = ParsedTimeseries.from_string(second_timeseries)
+    if not (first.is_parsed and second.is_parsed):
+        raise ValueError("Invalid timeseries")
+    return first.has_equal_timesteps(second)
 
 
-class TimeseriesExistenceCheck(BaseCheck):
-    """Check that an empty timeseries has not been provided."""
+def _convert(strings: List[str], dtype) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert strings to an array of dtype, returning (array, mask of invalid).
+
+    All strings are converted at once; only if that fails, they are converted one
+    by one to find out which ones are invalid. Integers outside the range of int64
+    are valid: then an array of Python ints (of object dtype) is returned.
+    """
+    try:
+        return np.array(strings, dtype=dtype), np.zeros(len(strings), dtype=bool)
+    except (ValueError, OverflowError):
+        pass
+    python_type = int if dtype == np.int64 else float
+    result = []
+    invalid = np.zeros(len(strings), dtype=bool)
+    for i, x in enumerate(strings):
+        try:
+            result.append(python_type(x))
+        except (ValueError, OverflowError):
+            result.append(python_type(0))
+            invalid[i] = True
+    if dtype == np.int64 and not all(INT64_MIN <= x <= INT64_MAX for x in result):
+        return np.array(result, dtype=object), invalid
+    return np.array(result, dtype=dtype), invalid
+
+
+@dataclass(eq=False)
+class ParsedTimeseries:
+    """A timeseries string, tokenised and parsed once, with parse diagnostics.
+
+    Every line of the timeseries maps to an element in the (equally long) arrays:
+    timesteps (int64), values (float64) and the boolean masks that flag invalid lines.
+    Timesteps beyond the range of int64 are kept exactly, as an array of Python ints.
+    The timesteps and values can only be used (``is_parsed``) if every line consists
+    of an integer timestep and a float value, separated by a comma.
+    """
+
+    is_empty: bool
+    timesteps: np.ndarray
+    values: np.ndarray
+    malformed: np.ndarray
+    unparsable_timesteps: np.ndarray
+    negative_timesteps: np.ndarray
+    unparsable_values: np.ndarray
+    non_finite_values: np.ndarray
+
+    @classmethod
+    def from_string(cls, timeseries_str) -> "ParsedTimeseries":
+        lines = timeseries_str.split() if timeseries_str else []
+        n = len(lines)
+        # a line consists of 2 elements if it contains exactly 1 comma
+        if n == 0 or (
+            timeseries_str.count(",") == n and all("," in line for line in lines)
+        ):
+            # as many commas as lines and a comma in every line: all lines are fine
+            malformed = np.zeros(n, dtype=bool)
+        else:
+            malformed = np.strings.count(np.array(lines), ",") != 1
+        # split the well formed lines into timesteps and values in one go
+        if malformed.any():
+            lines = [line for (line, bad) in zip(lines, malformed) if not bad]
+            elems = ",".join(lines).split(",") if lines else []
+        else:
+            # in the common case without empty elements, a whitespace split suffices
+            elems = timeseries_str.replace(",", " ").split() if n else []
+            if len(elems) != 2 * n:
+                elems = ",".join(lines).split(",")
+        timesteps, unparsable_timesteps = cls._spread(
+            *_convert(elems[0::2], np.int64), malformed
+        )
+        values, unparsable_values = cls._spread(
+            *_convert(elems[1::2], np.float64), malformed
+        )
+        return cls(
+            is_empty=not timeseries_str,
+            timesteps=timesteps,
+            values=values,
+            malformed=malformed,
+            unparsable_timesteps=unparsable_timesteps,
+            negative_timesteps=~unparsable_timesteps & (timesteps < 0),
+            unparsable_values=unparsable_values,
+            non_finite_values=~unparsable_values & ~np.isfinite(values),
+        )
+
+    @staticmethod
+    def _spread(
+        parsed: np.ndarray, invalid: np.ndarray, malformed: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Map the result for the well formed lines back onto all lines"""
+        if not malformed.any():
+            return parsed, invalid
+        result = np.zeros(len(malformed), dtype=parsed.dtype)
+        result[~malformed] = parsed
+        result_invalid = np.zeros(len(malformed), dtype=bool)
+        result_invalid[~malformed] = invalid
+        return result, result_invalid
+
+    @cached_property
+    def is_parsed(self) -> bool:
+        return not (
+            self.malformed.any()
+            or self.unparsable_timesteps.any()
+            or self.unparsable_values.any()
+        )
+
+    @cached_property
+    def timesteps_hash(self) -> int:
+        if self.timesteps.dtype == object:
+            return hash(tuple(self.timesteps.tolist()))
+        return hash(self.timesteps.tobytes())
+
+    def has_equal_timesteps(self, other: "ParsedTimeseries") -> bool:
+        return (
+            len(self.timesteps) == len(other.timesteps)
+            and self.timesteps_hash == other.timesteps_hash
+            and np.array_equal(self.timesteps, other.timesteps)
+        )
+
+
+class TimeseriesCache:
+    """Parsed timeseries per (table, id), so that every timeseries is parsed once.
+
+    The cache is kept on the session (see ``for_session``) and thus lives as long as
+    a check run. A column is loaded with a single query when it is first requested.
+    """
+
+    def __init__(self):
+        self._tables: Dict[Tuple[str, str], Dict[int, ParsedTimeseries]] = {}
+
+    @classmethod
+    def for_session(cls, session) -> "TimeseriesCache":
+        return get_session_cache(session, "timeseries_cache", cls)
+
+    def get(self, session, column) -> Dict[int, ParsedTimeseries]:
+        """Return the parsed timeseries of a column, as {id: ParsedTimeseries}"""
+        key = (column.table.name, column.name)
+        if key not in self._tables:
+            id_column = column.table.c.id
+            self._tables[key] = {
+                id: ParsedTimeseries.from_string(timeseries)
+                for (id, timeseries) in session.query(id_column, column).order_by(
+                    id_column
+                )
+            }
+        return self._tables[key]
+
+    def clear(self):
+        self._tables.clear()
+
+
+class BaseTimeseriesCheck(BaseCheck):
+    """Baseclass for checks on timeseries columns.
+
+    The timeseries are taken from the TimeseriesCache on the session. Subclasses
+    implement is_valid, which receives a ParsedTimeseries, or override get_invalid.
+    """
+
+    def parsed_timeseries(self, session) -> Iterator[Tuple[int, ParsedTimeseries]]:
+        """Iterate over (id, ParsedTimeseries) of the rows this check is applied to"""
+        parsed = TimeseriesCache.for_session(session).get(session, self.column)
+        if self.filters is None:
+            yield from parsed.items()
+            return
+        ids = {id for (id,) in self.to_check(session).with_entities(self.table.c.id)}
+        yield from ((id, x) for (id, x) in parsed.items() if id in ids)
 
     def get_invalid(self, session):
-        invalid_rows = []
-        for row in self.to_check(session).all():
-            # this will catch False, None, "", and any other falsy value
-            if not row.timeseries:
-                invalid_rows.append(row)
+        return self.get_rows(
+            session,
+            [
+                id
+                for (id, timeseries) in self.parsed_timeseries(session)
+                if not self.is_valid(timeseries)
+            ],
+        )
+
+    def is_valid(self, timeseries: ParsedTimeseries) -> bool:
+        raise NotImplementedError()
+
+
+class TimeseriesExistenceCheck(BaseTimeseriesCheck):
+    """Check that an empty timeseries has not been provided."""
 
-        return invalid_rows
+    def is_valid(self, timeseries):
+        # this will catch False, None, "", and any other falsy value
+        return not timeseries.is_empty
 
     def description(self):
         return f"{self.column_name} contains an empty timeseries; remove the {self.table.name} instance or provide valid timeseries."
 
 
-class TimeSeriesEqualTimestepsCheck(BaseCheck):
+class TimeSeriesEqualTimestepsCheck(BaseTimeseriesCheck):
     """
     Check that the timesteps in all timeseries in a column are equal.
 
@@ -73,30 +256,24 @@ class TimeSeriesEqualTimestepsCheck(BaseCheck):
     """
 
     def get_invalid(self, session):
-        invalid_timeseries = []
-
+        invalid_ids = []
         first_timeseries = None
 
-        for row in self.to_check(session).all():
-            timeseries = row.timeseries
-
-            if not timeseries:
+        for id, timeseries in self.parsed_timeseries(session):
+            if timeseries.is_empty:
                 continue
 
-            if not first_timeseries:
+            if first_timeseries is None:
                 first_timeseries = timeseries
                 continue  # don't compare first timeseries with itself
 
-            try:
-                if not compare_timesteps(
-                    first_timeseries=first_timeseries,
-                    second_timeseries=timeseries,
-                ):
-                    invalid_timeseries.append(row)
-            except Exception:  # other checks will catch these
-                pass
+            # unparsable timeseries are caught by other checks
+            if not (first_timeseries.is_parsed and timeseries.is_parsed):
+                continue
+            if not timeseries.has_equal_timesteps(first_timeseries):
+                invalid_ids.append(id)
 
-        return invalid_timeseries
+        return self.get_rows(session, invalid_ids)
 
     def description(self):
         return (
@@ -105,7 +282,7 @@ class TimeSeriesEqualTimestepsCheck(BaseCheck):
         )
 
 
-class FirstTimeSeriesEqualTimestepsCheck(BaseCheck):
+class FirstTimeSeriesEqualTimestepsCheck(BaseTimeseriesCheck):
     """
     Check that the timesteps in the first timeseries in the boundary condition columns are equal, if they both exist.
 
@@ -119,34 +296,27 @@ class FirstTimeSeriesEqualTimestepsCheck(BaseCheck):
         super().__init__(column=models.BoundaryCondition1D.timeseries, *args, **kwargs)
 
     def get_invalid(self, session):
-        invalid_timeseries = []
-
-        first_1d_timeseries = (
-            session.query(models.BoundaryCondition1D.timeseries.table)
-            .order_by(models.BoundaryCondition1D.id)
-            .limit(1)
-            .all()
+        cache = TimeseriesCache.for_session(session)
+        first_1d_timeseries = next(iter(cache.get(session, self.column).items()), None)
+        first_2d_timeseries = next(
+            iter(cache.get(session, models.BoundaryConditions2D.timeseries).values()),
+            None,
         )
-
-        first_2d_timeseries = (
-            session.query(models.BoundaryConditions2D.timeseries.table)
-            .order_by(models.BoundaryConditions2D.id)
-            .limit(1)
+        if first_1d_timeseries is None or first_2d_timeseries is None:
+            return []
+
+        first_1d_id, first_1d_timeseries = first_1d_timeseries
+        # unparsable timeseries are caught by other checks
+        if not (first_1d_timeseries.is_parsed and first_2d_timeseries.is_parsed):
+            return []
+        if first_1d_timeseries.has_equal_timesteps(first_2d_timeseries):
+            return []
+        return (
+            session.query(models.BoundaryCondition1D.timeseries.table)
+            .filter(models.BoundaryCondition1D.id == first_1d_id)
             .all()
         )
 
-        if first_1d_timeseries and first_2d_timeseries:
-            try:
-                if not compare_timesteps(
-                    first_timeseries=first_1d_timeseries[0].timeseries,
-                    second_timeseries=first_2d_timeseries[0].timeseries,
-                ):
-                    invalid_timeseries.append(first_1d_timeseries[0])
-            except Exception:  # other checks will catch these
-                pass
-
-        return invalid_timeseries
-
     def description(self):
         return (
             "The timesteps for the first boundary_condition_1d.timeseries did not match the timesteps for the first boundary_condition_2d.timeseries. "
@@ -154,22 +324,11 @@ class FirstTimeSeriesEqualTimestepsCheck(BaseCheck):
         )
 
 
-class TimeseriesRowCheck(BaseCheck):
+class TimeseriesRowCheck(BaseTimeseriesCheck):
     """Check that each record in a timeserie contains 2 elements"""
 
-    def get_invalid(self, session):
-        invalid_timeseries = []
-
-        for row in self.to_check(session).all():
-            timeserie = row.timeseries
-
-            if not timeserie:
-                continue
-
-            if any(len(x.split(",")) != 2 for x in timeserie.split()):
-                invalid_timeseries.append(row)
-
-        return invalid_timeseries
+    def is_valid(self, timeseries):
+        return not timeseries.malformed.any()
 
     def description(self):
         return (
@@ -177,33 +336,14 @@ class TimeseriesRowCheck(BaseCheck):
         )
 
 
-class TimeseriesTimestepCheck(BaseCheck):
+class TimeseriesTimestepCheck(BaseTimeseriesCheck):
     """Check that each record in a timeserie starts with an integer >= 0"""
 
-    def get_invalid(self, session):
-        invalid_timeseries = []
-
-        for row in self.to_check(session).all():
-            timeserie = row.timeseries
-
-            if not timeserie:
-                continue
-
-            for timeseries_row in timeserie.split():
-                elems = timeseries_row.split(",")
-                if len(elems) != 2:
-                    continue  # checked elsewhere
-
-                try:
-                    timestep = int(elems[0].strip())
-                except ValueError:
-                    invalid_timeseries.append(row)
-                    continue
-
-                if timestep < 0:
-                    invalid_timeseries.append(row)
-
-        return invalid_timeseries
+    def is_valid(self, timeseries):
+        # lines that do not contain 2 elements are checked elsewhere
+        return not (
+            timeseries.unparsable_timesteps.any() or timeseries.negative_timesteps.any()
+        )
 
     def description(self):
         return (
@@ -211,83 +351,38 @@ class TimeseriesTimestepCheck(BaseCheck):
         )
 
 
-class TimeseriesValueCheck(BaseCheck):
+class TimeseriesValueCheck(BaseTimeseriesCheck):
     """Check that each record in a timeserie ends with a float and is not an invalid or empty string"""
 
-    def get_invalid(self, session):
-        invalid_timeseries = []
-
-        for row in self.to_check(session).all():
-            timeserie = row.timeseries
-
-            if not timeserie:
-                continue
-
-            for timeseries_row in timeserie.split():
-                elems = timeseries_row.split(",")
-                if len(elems) != 2:
-                    continue  # checked elsewhere
-
-                try:
-                    value = float(elems[1].strip())
-                except ValueError:
-                    invalid_timeseries.append(row)
-                    continue
-
-                if str(value) in {"nan", "inf", "-inf"}:
-                    invalid_timeseries.append(row)
-
-        return invalid_timeseries
+    def is_valid(self, timeseries):
+        # lines that do not contain 2 elements are checked elsewhere
+        return not (
+            timeseries.unparsable_values.any() or timeseries.non_finite_values.any()
+        )
 
     def description(self):
         return f"{self.column_name} contains an invalid value, expected a float"
 
 
-class TimeseriesIncreasingCheck(BaseCheck):
+class TimeseriesIncreasingCheck(BaseTimeseriesCheck):
     """The timesteps in a timeseries should increase"""
 
-    def get_invalid(self, session):
-        invalid_timeseries = []
-
-        for row in self.to_check(session).all():
-            timeserie = row.timeseries
-            try:
-                timesteps = [x[0] for x in parse_timeseries(timeserie)]
-            except (ValueError, TypeError):
-                continue  # other checks will catch these
-
-            if len(timesteps) < 2:
-                continue
-
-            if not all(b > a for (a, b) in zip(timesteps[:-1], timesteps[1:])):
-                invalid_timeseries.append(row)
-
-        return invalid_timeseries
+    def is_valid(self, timeseries):
+        if not timeseries.is_parsed:
+            return True  # other checks will catch these
+        return bool(np.all(np.diff(timeseries.timesteps) > 0))
 
     def description(self):
         return f"{self.column_name} should be monotonically increasing"
 
 
-class TimeseriesStartsAtZeroCheck(BaseCheck):
+class TimeseriesStartsAtZeroCheck(BaseTimeseriesCheck):
     """The timesteps in a timeseries should start at 0"""
 
-    def get_invalid(self, session):
-        invalid_timeseries = []
-
-        for row in self.to_check(session).all():
-            timeserie = row.timeseries
-            try:
-                timesteps = [x[0] for x in parse_timeseries(timeserie)]
-            except (ValueError, TypeError):
-                continue  # other checks will catch these
-
-            if len(timesteps) == 0:
-                continue
-
-            if timesteps[0] != 0:
-                invalid_timeseries.append(row)
-
-        return invalid_timeseries
+    def is_valid(self, timeseries):
+        if not timeseries.is_parsed or len(timeseries.timesteps) == 0:
+            return True  # other checks will catch these
+        return bool(timeseries.timesteps[0] == 0)
 
     def description(self):
         return f"{self.column_name} should be start at timestamp 0"
@@ -0,0 +1,242 @@
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+from threedi_schema.domain import constants, models
+
+from .base import BaseCheck
+from .caches import get_session_cache
+
+# The objects that refer to connection nodes: (table, connection node columns)
+NODE_REFERENCES = [
+    (models.Channel, ("connection_node_id_start", "connection_node_id_end")),
+    (models.Pipe, ("connection_node_id_start", "connection_node_id_end")),
+    (models.Culvert, ("connection_node_id_start", "connection_node_id_end")),
+    (models.Weir, ("connection_node_id_start", "connection_node_id_end")),
+    (models.Orifice, ("connection_node_id_start", "connection_node_id_end")),
+    (models.Pump, ("connection_node_id",)),
+    (models.PumpMap, ("connection_node_id_end",)),
+]
+
+# The 1D objects that connect two connection nodes
+LINK_TABLES = frozenset({"channel", "pipe", "culvert", "weir", "orifice"})
+
+
+class TopologyIndex:
+    """The objects that refer to every connection node, in CSR arrays.
+
+    The index is kept on the session (see ``for_session``) and thus lives as long as
+    a check run. It is built with a single query per table in NODE_REFERENCES.
+
+    Nodes are numbered by their position in ``node_ids`` (sorted), which also
+    contains ids that are referred to but do not exist in the connection_node table.
+    The objects referring to node ``i`` are at ``indptr[i]:indptr[i + 1]`` in
+    ``tables`` (an index into ``table_names``) and ``object_ids``. An object that
+    refers to a node twice (e.g. a pipe from and to the same node) is in there twice.
+
+    The start and end node positions of the objects in LINK_TABLES are in ``links``.
+    """
+
+    def __init__(self, session: Session):
+        self.table_names = [model.__tablename__ for (model, _) in NODE_REFERENCES]
+        node_refs = []
+        tables = []
+        object_ids = []
+        link_refs = {}
+        for i, (model, column_names) in enumerate(NODE_REFERENCES):
+            columns = [getattr(model, name) for name in column_names]
+            rows = session.query(model.id, *columns).all()
+            array = np.array(
+                [[x if x is not None else -1 for x in row] for row in rows],
+                dtype=np.int64,
+            ).reshape(len(rows), len(columns) + 1)
+            if model.__tablename__ in LINK_TABLES:
+                link_refs[model.__tablename__] = array
+            for j in range(len(columns)):
+                node_refs.append(array[:, j + 1])
+                tables.append(np.full(len(rows), i, dtype=np.int16))
+                object_ids.append(array[:, 0])
+        node_refs = np.concatenate(node_refs)
+        tables = np.concatenate(tables)
+        object_ids = np.concatenate(object_ids)
+        # references to NULL are not incident to any node
+        mask = node_refs != -1
+        node_refs, tables, object_ids = node_refs[mask], tables[mask], object_ids[mask]
+
+        existing = np.array(
+            [x for (x,) in session.query(models.ConnectionNode.id)], dtype=np.int64
+        )
+        self.node_ids = np.union1d(existing, node_refs)
+        nodes = np.searchsorted(self.node_ids, node_refs)
+        order = np.argsort(nodes, kind="stable")
+        self.indptr = np.zeros(len(self.node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(nodes, minlength=len(self.node_ids)), out=self.indptr[1:])
+        self.nodes = nodes[order]
+        self.tables = tables[order]
+        self.object_ids = object_ids[order]
+        self._degrees: Dict[FrozenSet[str], np.ndarray] = {}
+        # per link table: (ids, start node positions, end node positions)
+        self.links: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {
+            name: (
+                array[:, 0],
+                self._positions(array[:, 1]),
+                self._positions(array[:, 2]),
+            )
+            for (name, array) in link_refs.items()
+        }
+
+    @classmethod
+    def for_session(cls, session) -> "TopologyIndex":
+        return get_session_cache(session, "topology_index", lambda: cls(session))
+
+    def node_index(self, node_ids) -> np.ndarray:
+        """Return the positions of node ids in ``node_ids``, -1 for unknown (or None)"""
+        return self._positions(
+            np.array([x if x is not None else -1 for x in node_ids], dtype=np.int64)
+        )
+
+    def _positions(self, node_ids: np.ndarray) -> np.ndarray:
+        if len(self.node_ids) == 0:
+            return np.full(len(node_ids), -1, dtype=np.int64)
+        idx = np.searchsorted(self.node_ids, node_ids)
+        idx[idx == len(self.node_ids)] = 0
+        return np.where(self.node_ids[idx] == node_ids, idx, -1)
+
+    def get_degrees(self, table_names: Iterable[str]) -> np.ndarray:
+        """Return the number of references to every node from the given tables"""
+        key = frozenset(table_names)
+        if key not in self._degrees:
+            selected = [i for (i, x) in enumerate(self.table_names) if x in key]
+            mask = np.isin(self.tables, selected)
+            self._degrees[key] = np.bincount(
+                self.nodes[mask], minlength=len(self.node_ids)
+            )
+        return self._degrees[key]
+
+    def degree(self, node_ids, table_names: Iterable[str]) -> np.ndarray:
+        """Return the number of references to nodes from the given tables.
+
+        Unknown nodes (and None) have degree 0.
+        """
+        idx = self.node_index(node_ids)
+        degrees = self.get_degrees(table_names)
+        result = np.zeros(len(idx), dtype=np.int64)
+        result[idx != -1] = degrees[idx[idx != -1]]
+        return result
+
+    def get_incident(self, node_id: int) -> List[Tuple[str, int]]:
+        """Return (table name, id) of the objects that refer to a node"""
+        (i,) = self.node_index([node_id])
+        if i == -1:
+            return []
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return [
+            (self.table_names[table], int(object_id))
+            for (table, object_id) in zip(
+                self.tables[start:end], self.object_ids[start:end]
+            )
+        ]
+
+
+class BaseTopologyCheck(BaseCheck):
+    """Base class for checks on the number of objects connected to connection nodes.
+
+    Subclasses give the column with the connection node ids (``node_column``) and the
+    tables to count (``table_names``). Rows are invalid if ``is_invalid`` returns
+    True for their degree.
+    """
+
+    table_names: FrozenSet[str] = frozenset()
+
+    def __init__(self, column, node_column, *args, **kwargs):
+        super().__init__(column, *args, **kwargs)
+        self.node_column = node_column
+
+    def is_invalid(self, degrees: np.ndarray) -> np.ndarray:
+        raise NotImplementedError()
+
+    def get_invalid(self, session: Session) -> List[NamedTuple]:
+        records = (
+            self.to_check(session)
+            .with_entities(self.table.c.id, self.node_column)
+            .all()
+        )
+        ids = np.array([id for (id, _) in records], dtype=np.int64)
+        degrees = TopologyIndex.for_session(session).degree(
+            [node_id for (_, node_id) in records], self.table_names
+        )
+        return self.get_rows(session, ids[self.is_invalid(degrees)].tolist())
+
+
+class ConnectionNodeNotConnectedCheck(BaseTopologyCheck):
+    """Check that isolated connection nodes with a bottom_level are connected to a
+    pipe, channel, culvert, weir, orifice or pump."""
+
+    table_names = frozenset(x.__tablename__ for (x, _) in NODE_REFERENCES)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            column=models.ConnectionNode.id,
+            node_column=models.ConnectionNode.id,
+            *args,
+            **kwargs,
+        )
+
+    def to_check(self, session):
+        return (
+            super()
+            .to_check(session)
+            .filter(
+                models.ConnectionNode.bottom_level != None,
+                models.ConnectionNode.exchange_type
+                == constants.CalculationTypeNode.ISOLATED,
+            )
+        )
+
+    def is_invalid(self, degrees):
+        return degrees == 0
+
+    def description(self) -> str:
+        return "This connection node is not connected to a pipe, channel, culvert, weir, orifice or pumpstation."
+
+
+class PumpNodeNotConnectedCheck(BaseTopologyCheck):
+    """Check that pumps on a connected (not embedded) connection node are connected
+    to a 1D element on that node."""
+
+    table_names = LINK_TABLES
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            column=models.Pump.connection_node_id,
+            node_column=models.Pump.connection_node_id,
+            *args,
+            **kwargs,
+        )
+
+    def to_check(self, session):
+        return (
+            super()
+            .to_check(session)
+            .join(
+                models.ConnectionNode,
+                models.Pump.connection_node_id == models.ConnectionNode.id,
+            )
+            .filter(
+                models.ConnectionNode.exchange_type
+                == constants.CalculationTypeNode.CONNECTED
+            )
+        )
+
+    def is_invalid(self, degrees):
+        return degrees == 0
+
+    def get_index_columns(self):
+        return [models.Pump.connection_node_id]
+
+    def description(self) -> str:
+        return (
+            "pump.connection_node_id refers to a connection node that is not "
+            "embedded but is not connected to any 1D element "
+            "(channel, culvert, pipe, weir, or orifice)"
+        )
@@ -1,4 +1,5 @@
-from typing import List
+import copy
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 from geoalchemy2 import functions as geo_func
 from sqlalchemy import and_, exists, func, or_, true
@@ -54,6 +55,7 @@ from .checks.location import (
     PumpMapLinestringLocationCheck,
     SurfaceMapLinestringLocationCheck,
 )
+from .checks.network import NetworkWithoutOutletCheck, PumpCycleCheck
 from .checks.other import (
     AllPresentVegetationParameters,
     BetaColumnsCheck,
@@ -113,6 +115,10 @@ from .checks.timeseries import (
     TimeUnitsEqualCheck,
     TimeUnitsValidCheck,
 )
+from .checks.topology import (
+    ConnectionNodeNotConnectedCheck,
+    PumpNodeNotConnectedCheck,
+)
 
 TOLERANCE_M = 1.0
 
@@ -1252,33 +1258,7 @@ CHECKS += [
 ## 025x: Connectivity
 
 CHECKS += [
-    QueryCheck(
-        error_code=251,
-        level=CheckLevel.WARNING,
-        column=models.ConnectionNode.id,
-        invalid=Query(models.ConnectionNode)
-        .filter(models.ConnectionNode.bottom_level != None)
-        .filter(
-            models.ConnectionNode.exchange_type
-            == constants.CalculationTypeNode.ISOLATED,
-            models.ConnectionNode.id.notin_(
-                Query(models.Pipe.connection_node_id_start).union_all(
-                    Query(models.Pipe.connection_node_id_end),
-                    Query(models.Channel.connection_node_id_start),
-                    Query(models.Channel.connection_node_id_end),
-                    Query(models.Culvert.connection_node_id_start),
-                    Query(models.Culvert.connection_node_id_end),
-                    Query(models.Weir.connection_node_id_start),
-                    Query(models.Weir.connection_node_id_end),
-                    Query(models.Pump.connection_node_id),
-                    Query(models.PumpMap.connection_node_id_end),
-                    Query(models.Orifice.connection_node_id_start),
-                    Query(models.Orifice.connection_node_id_end),
-                )
-            ),
-        ),
-        message="This connection node is not connected to a pipe, channel, culvert, weir, orifice or pumpstation.",
-    ),
+    ConnectionNodeNotConnectedCheck(error_code=251, level=CheckLevel.WARNING),
     QueryCheck(
         level=CheckLevel.WARNING,
         error_code=252,
@@ -1353,42 +1333,7 @@ CHECKS += [
         message="a pump cannot be connected to itself (pump.connection_node_id must not equal the corresponding pump_map.connection_node_id_end)",
     )
 ]
-CHECKS += [
-    QueryCheck(
-        error_code=254,
-        level=CheckLevel.ERROR,
-        column=models.Pump.connection_node_id,
-        invalid=Query(models.Pump)
-        .join(
-            models.ConnectionNode,
-            models.Pump.connection_node_id == models.ConnectionNode.id,
-        )
-        .filter(
-            models.ConnectionNode.exchange_type
-            == constants.CalculationTypeNode.CONNECTED
-        )
-        .filter(
-            models.Pump.connection_node_id.notin_(
-                Query(models.Channel.connection_node_id_start).union_all(
-                    Query(models.Channel.connection_node_id_end),
-                    Query(models.Culvert.connection_node_id_start),
-                    Query(models.Culvert.connection_node_id_end),
-                    Query(models.Pipe.connection_node_id_start),
-                    Query(models.Pipe.connection_node_id_end),
-                    Query(models.Weir.connection_node_id_start),
-                    Query(models.Weir.connection_node_id_end),
-                    Query(models.Orifice.connection_node_id_start),
-                    Query(models.Orifice.connection_node_id_end),
-                )
-            )
-        ),
-        message=(
-            "pump.connection_node_id refers to a connection node that is not "
-            "embedded but is not connected to any 1D element "
-            "(channel, culvert, pipe, weir, or orifice)"
-        ),
-    )
-]
+CHECKS += [PumpNodeNotConnectedCheck(error_code=254, level=CheckLevel.ERROR)]
 CHECKS += [
     QueryCheck(
         error_code=255,
@@ -1401,6 +1346,10 @@ CHECKS += [
         message="a pump cannot be connected to itself (pump.connection_node_id must not equal pumpmap.connection_node_id_end)",
     )
 ]
+CHECKS += [
+    NetworkWithoutOutletCheck(error_code=256, level=CheckLevel.WARNING),
+    PumpCycleCheck(error_code=257, level=CheckLevel.WARNING),
+]
 
 
 ## 026x: Exchange lines
@@ -3722,81 +3671,155 @@ level_map_fk_check = {
 unique_columns = [models.BoundaryCondition1D.connection_node_id]
 
 
+def generate_id_range_checks(model, **kwargs):
+    return [
+        RangeCheck(
+            column=model.id,
+            min_value=0,
+            max_value=2147483647,
+            message=f"{model.id.name} must be a positive signed 32-bit integer.",
+            **kwargs,
+        )
+    ]
+
+
+# Error codes 1 to 10: checks generated per model by a factory
+# Of these, only the foreign key checks have index columns (see iter_index_checks)
+FOREIGN_KEY_ERROR_CODE = 1
+FACTORY_CHECKS: Dict[int, Callable[[object], List[BaseCheck]]] = {
+    1: lambda model: generate_foreign_key_checks(
+        model.__table__,
+        error_code=1,
+        fk_settings=fk_settings,
+        custom_level_map=level_map_fk_check,
+    ),
+    2: lambda model: generate_unique_checks(
+        model.__table__, error_code=2, extra_unique_columns=unique_columns
+    ),
+    3: lambda model: generate_not_null_checks(
+        model.__table__, error_code=3, extra_not_null_columns=not_null_columns
+    ),
+    4: lambda model: generate_type_checks(model.__table__, error_code=4),
+    5: lambda model: generate_geometry_checks(
+        model.__table__,
+        custom_level_map={
+            "grid_refinement_line.geom": "warning",
+            "grid_refinement_area.geom": "warning",
+            "dem_average_area.geom": "warning",
+            "surface.geom": "warning",
+            "dry_weather_flow.geom": "warning",
+        },
+        error_code=5,
+    ),
+    6: lambda model: generate_geometry_type_checks(model.__table__, error_code=6),
+    7: lambda model: generate_enum_checks(model.__table__, error_code=7),
+    8: lambda model: generate_id_range_checks(model, error_code=8),
+    9: lambda model: generate_epsg_geom_checks(model.__table__, error_code=9),
+    10: lambda model: generate_epsg_raster_checks(
+        model.__table__, RASTER_COLUMNS, error_code=10
+    ),
+}
+
+
 class Config:
     """Collection of checks
 
     Some checks are generated by a factory. These are usually very generic
-    checks which apply to many columns, such as foreign keys."""
+    checks which apply to many columns, such as foreign keys.
+
+    Checks are only created when they are first selected (see iter_checks): the
+    generated checks per model and error code, the other checks one by one. They are
+    kept, so that every check is created only once per Config.
+
+    Checks store state while they are applied (e.g. the EPSG code for their
+    description), so every Config has its own copies of the other checks. Configs
+    can thus be used at the same time, but a single Config cannot.
+    """
 
     def __init__(self, models, allow_beta_features=False):
         self.models = models
-        self.checks = []
         self.allow_beta_features = allow_beta_features
-        self.generate_checks()
+        self._generated: Dict[Tuple[str, int], List[BaseCheck]] = {}
+        self._copies: Dict[int, BaseCheck] = {}
+        self._checks: Optional[List[BaseCheck]] = None
+        self._static_checks = CHECKS
+        if not allow_beta_features:
+            self._static_checks = CHECKS + beta_features_check
+
+    @property
+    def checks(self) -> List[BaseCheck]:
+        """All checks, creating the checks that were not created yet"""
+        if self._checks is None:
+            self.generate_checks()
+        return self._checks
 
     def generate_checks(self):
-        self.checks = []
-        # Error codes 1 to 9: factories
+        self._checks = list(self._iter_all_checks())
+
+    def _get_generated_checks(self, model, error_code: int) -> List[BaseCheck]:
+        key = (model.__table__.name, error_code)
+        if key not in self._generated:
+            self._generated[key] = FACTORY_CHECKS[error_code](model)
+        return self._generated[key]
+
+    def _get_static_check(self, index: int) -> BaseCheck:
+        if index not in self._copies:
+            self._copies[index] = copy.copy(self._static_checks[index])
+        return self._copies[index]
+
+    def _is_selected(self, check, level=None, ignore_checks=None, tables=None):
+        if check.is_beta_check and not self.allow_beta_features:
+            return False
+        if tables is not None and check.table.name not in tables:
+            return False
+        if level is not None and check.level < level:
+            return False
+        return not (
+            ignore_checks and ignore_checks.match(str(check.error_code).zfill(4))
+        )
+
+    def _iter_all_checks(
+        self, level=None, ignore_checks=None, tables=None
+    ) -> Iterator[BaseCheck]:
+        """Iterate over all checks in order, without creating unselected checks.
+
+        Factory checks with an error code matching ``ignore_checks`` or of a table
+        not in ``tables`` (if given) are not generated; the other checks are only
+        copied if they are selected. The factory checks are not filtered otherwise.
+        """
+        if self._checks is not None:
+            yield from self._checks
+            return
         for model in self.models:
-            self.checks += generate_foreign_key_checks(
-                model.__table__,
-                error_code=1,
-                fk_settings=fk_settings,
-                custom_level_map=level_map_fk_check,
-            )
-            self.checks += generate_unique_checks(
-                model.__table__, error_code=2, extra_unique_columns=unique_columns
-            )
-            self.checks += generate_not_null_checks(
-                model.__table__, error_code=3, extra_not_null_columns=not_null_columns
-            )
-            self.checks += generate_type_checks(model.__table__, error_code=4)
-            self.checks += generate_geometry_checks(
-                model.__table__,
-                custom_level_map={
-                    "grid_refinement_line.geom": "warning",
-                    "grid_refinement_area.geom": "warning",
-                    "dem_average_area.geom": "warning",
-                    "surface.geom": "warning",
-                    "dry_weather_flow.geom": "warning",
-                },
-                error_code=5,
-            )
-            self.checks += generate_geometry_type_checks(
-                model.__table__,
-                error_code=6,
-            )
-            self.checks += generate_enum_checks(
-                model.__table__,
-                error_code=7,
-            )
-            self.checks += [
-                RangeCheck(
-                    column=model.id,
-                    error_code=8,
-                    min_value=0,
-                    max_value=2147483647,
-                    message=f"{model.id.name} must be a positive signed 32-bit integer.",
-                )
-            ]
-            self.checks += generate_epsg_geom_checks(model.__table__, error_code=9)
-            self.checks += generate_epsg_raster_checks(
-                model.__table__, RASTER_COLUMNS, error_code=10
-            )
+            if tables is not None and model.__table__.name not in tables:
+                continue
+            for error_code in FACTORY_CHECKS:
+                if ignore_checks and ignore_checks.match(str(error_code).zfill(4)):
+                    continue
+                yield from self._get_generated_checks(model, error_code)
+        for index, check in enumerate(self._static_checks):
+            if self._is_selected(check, level, ignore_checks, tables):
+                yield self._get_static_check(index)
+
+    def iter_checks(self, level=CheckLevel.ERROR, ignore_checks=None, tables=None):
+        """Iterate over checks with at least 'level'
+
+        Optionally, only checks on ``tables`` (a collection of table names) are
+        selected. Checks that are not selected are not created.
+        """
+        level = CheckLevel.get(level)  # normalize
+        for check in self._iter_all_checks(level, ignore_checks, tables):
+            if self._is_selected(check, level, ignore_checks, tables):
+                yield check
 
-        self.checks += CHECKS
-        if not self.allow_beta_features:
-            self.checks += beta_features_check
+    def iter_index_checks(self) -> Iterator[BaseCheck]:
+        """Iterate over the checks that join or look up rows by other columns.
 
-    def iter_checks(self, level=CheckLevel.ERROR, ignore_checks=None):
-        """Iterate over checks with at least 'level'"""
-        level = CheckLevel.get(level)  # normalize
-        for check in self.checks:
-            if check.is_beta_check and not self.allow_beta_features:
-                continue
-            if check.level >= level:
-                if ignore_checks:
-                    if not ignore_checks.match(str(check.error_code).zfill(4)):
-                        yield check
-                else:
-                    yield check
+        These are the checks of which the index columns are added to a snapshot (see
+        snapshot.get_index_columns). Other checks are not created.
+        """
+        for model in self.models:
+            yield from self._get_generated_checks(model, FOREIGN_KEY_ERROR_CODE)
+        for index, check in enumerate(self._static_checks):
+            if check.get_index_columns():
+                yield self._get_static_check(index)
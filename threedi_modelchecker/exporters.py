@@ -7,7 +7,7 @@ from typing import Iterator, NamedTuple, Tuple
 from geoalchemy2.elements import WKBElement
 from geoalchemy2.shape import to_shape
 
-from threedi_modelchecker.checks.base import BaseCheck
+from threedi_modelchecker.checks.base import BaseCheck, InvalidRow
 
 ErrorWithGeom = namedtuple(
     "ErrorWithGeom",
@@ -45,12 +45,21 @@ def export_with_geom(
 ) -> list[ErrorWithGeom]:
     """Process errors into a list that includes the geometry related to the error
 
+    The errors should contain the full rows, see ThreediModelChecker.errors(hydrate=True).
+
     :param errors: iterator of BaseModelError
     :return: A list of ErrorWithGeom named tuples, each containing details about the error,
     including geometry if available
+    :raise TypeError: if the errors contain InvalidRow references instead of full rows
     """
     errors_with_geom = []
     for check, error_row in errors:
+        if isinstance(error_row, InvalidRow):
+            raise TypeError(
+                "export_with_geom requires the full rows, use "
+                "ThreediModelChecker.errors(hydrate=True) or "
+                "model_checks.hydrate_errors"
+            )
         geom = None
         if hasattr(error_row, "geom") and isinstance(error_row.geom, WKBElement):
             geom = error_row.geom
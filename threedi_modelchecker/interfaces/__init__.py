@@ -1,3 +1,5 @@
+from .raster_cache import RasterMetadata, RasterMetadataCache  # NOQA
 from .raster_interface import RasterInterface  # NOQA
 from .raster_interface_gdal import GDALRasterInterface  # NOQA
 from .raster_interface_rasterio import RasterIORasterInterface  # NOQA
+from .raster_statistics import RasterStatisticsStore  # NOQA
@@ -0,0 +1,139 @@
+from typing import Dict, Optional, Tuple, Type
+
+from .raster_interface import RasterInterface
+from .raster_statistics import RasterStatisticsStore
+
+
+class RasterMetadata:
+    """Header properties and statistics of a single raster file.
+
+    The header properties are read when the object is created, opening the raster
+    only once. The (expensive) min_max is computed when it is first requested, unless
+    it is found in the (optional) persistent statistics store.
+
+    Properties that cannot be read because the file could not be opened are None.
+    """
+
+    def __init__(
+        self,
+        path,
+        interface_cls: Type[RasterInterface],
+        statistics_store: Optional[RasterStatisticsStore] = None,
+    ):
+        self.path = str(path)
+        self.interface_cls = interface_cls
+        self.statistics_store = statistics_store
+        self.driver = None
+        self.is_valid_geotiff = False
+        self.band_count = None
+        self.has_projection = None
+        self.is_geographic = None
+        self.epsg_code = None
+        self.pixel_size = (None, None)
+        self.shape = None
+        self.compression = None
+        self._min_max = None
+        self._partial_min_max = None
+        self._no_data = False
+        with interface_cls(self.path) as raster:
+            self._read_header(raster)
+
+    def _read_header(self, raster: RasterInterface):
+        self.driver = raster.driver
+        self.is_valid_geotiff = raster.is_valid_geotiff
+        if self.driver is None:
+            return  # the file could not be opened
+        self.band_count = raster.band_count
+        self.pixel_size = raster.pixel_size
+        self.shape = raster.shape
+        self.compression = raster.compression
+        self.has_projection = raster.has_projection
+        if self.has_projection:
+            self.is_geographic = raster.is_geographic
+            self.epsg_code = raster.epsg_code
+
+    @property
+    def min_max(self) -> Tuple[Optional[float], Optional[float]]:
+        return self.get_min_max()
+
+    def get_min_max(
+        self, lower=None, upper=None
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Return the (min, max) of the raster, computing it if necessary.
+
+        See RasterInterface.compute_min_max for the meaning of lower and upper: the
+        result is exact if it is within [lower, upper].
+        """
+        if self._no_data:
+            raise RasterInterface.NoData()
+        if self._min_max is not None:
+            return self._min_max
+        if _exceeds(self._partial_min_max, lower, upper):
+            return self._partial_min_max
+        if self._load_statistics():
+            return self.get_min_max()
+        with self.interface_cls(self.path) as raster:
+            try:
+                result = raster.compute_min_max(lower=lower, upper=upper)
+            except RasterInterface.NoData:
+                self._no_data = True
+                self._store_statistics()
+                raise
+        if _exceeds(result, lower, upper):
+            self._partial_min_max = result
+        else:
+            self._min_max = result
+            self._store_statistics()
+        return result
+
+    def _load_statistics(self) -> bool:
+        if self.statistics_store is None:
+            return False
+        stored = self.statistics_store.get(self.path)
+        if stored is None:
+            return False
+        raster_min, raster_max, self._no_data = stored
+        if not self._no_data:
+            self._min_max = raster_min, raster_max
+        return True
+
+    def _store_statistics(self):
+        if self.statistics_store is not None:
+            self.statistics_store.put(self.path, self._min_max, no_data=self._no_data)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}: {self.path}>"
+
+
+def _exceeds(min_max, lower, upper) -> bool:
+    if min_max is None or min_max[0] is None:
+        return False
+    return (lower is not None and min_max[0] < lower) or (
+        upper is not None and min_max[1] > upper
+    )
+
+
+class RasterMetadataCache:
+    """Cache of RasterMetadata, so that every raster file is opened only once.
+
+    The cache is kept on the check context, so it lives as long as a check run.
+    Optionally, supply a RasterStatisticsStore to keep statistics between runs.
+    """
+
+    def __init__(self, statistics_store: Optional[RasterStatisticsStore] = None):
+        self.statistics_store = statistics_store
+        self._rasters: Dict[Tuple[Type[RasterInterface], str], RasterMetadata] = {}
+
+    def get(self, path, interface_cls: Type[RasterInterface]) -> RasterMetadata:
+        key = (interface_cls, str(path))
+        if key not in self._rasters:
+            self._rasters[key] = RasterMetadata(
+                path, interface_cls, statistics_store=self.statistics_store
+            )
+        return self._rasters[key]
+
+    def clear(self):
+        self._rasters.clear()
+
+    def __len__(self):
+        return len(self._rasters)
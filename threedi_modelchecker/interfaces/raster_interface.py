@@ -1,5 +1,15 @@
+import threading
 from abc import ABC, abstractmethod, abstractproperty, abstractstaticmethod
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+# Window = (xoff, yoff, xsize, ysize) in pixels
+Window = Tuple[int, int, int, int]
+
+# Strips are read in groups of (at least) this many pixels
+MIN_PIXELS_PER_READ = 1 << 20
 
 
 class RasterInterface(ABC):
@@ -9,6 +19,10 @@ class RasterInterface(ABC):
     class NoData(Exception):
         pass
 
+    # Total number of bytes read by compute_min_max in this process (for profiling)
+    bytes_read = 0
+    _bytes_read_lock = threading.Lock()
+
     def __init__(self, path):
         self.path = str(path)
 
@@ -31,6 +45,11 @@ class RasterInterface(ABC):
     def __exit__(self, *args, **kwargs):
         self._close()
 
+    @abstractproperty
+    def driver(self) -> Optional[str]:
+        """The short name of the driver, or None if the file could not be opened"""
+        pass
+
     @abstractproperty
     def is_valid_geotiff(self) -> bool:
         pass
@@ -67,6 +86,107 @@ class RasterInterface(ABC):
     def shape(self) -> Tuple[int, int]:
         pass
 
+    @abstractproperty
+    def block_size(self) -> Tuple[int, int]:
+        """The native (width, height) of a tile or strip of the first band"""
+        pass
+
+    @abstractproperty
+    def nodata(self) -> Optional[float]:
+        pass
+
+    @abstractmethod
+    def _open_reader(self):
+        """Open a separate dataset, so that blocks can be read from multiple threads"""
+        pass
+
+    @abstractmethod
+    def _close_reader(self, reader):
+        pass
+
+    @abstractmethod
+    def _read_block(self, reader, window: Window) -> np.ndarray:
+        """Read a window of the first band as a 2D array"""
+        pass
+
+    def block_windows(self) -> Iterator[Window]:
+        """Iterate over the native blocks of the first band.
+
+        Strips (blocks spanning the full width) are grouped so that every read covers
+        at least MIN_PIXELS_PER_READ pixels.
+        """
+        height, width = self.shape
+        block_width, block_height = self.block_size
+        if block_width >= width:
+            block_height *= max(1, MIN_PIXELS_PER_READ // (width * block_height))
+        for yoff in range(0, height, block_height):
+            ysize = min(block_height, height - yoff)
+            for xoff in range(0, width, block_width):
+                yield xoff, yoff, min(block_width, width - xoff), ysize
+
+    def compute_min_max(
+        self, lower=None, upper=None, max_workers=None
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Compute the exact minimum and maximum of the first band.
+
+        The raster is read block by block on a pool of threads, each thread having
+        its own dataset. Nodata and NaN values are ignored.
+
+        If lower and/or upper are supplied, reading stops as soon as a value below
+        lower or above upper is found. The returned (min, max) then only covers part
+        of the raster, but it does show that the raster exceeds [lower, upper].
+        In other words, the result is exact if it is within [lower, upper].
+        """
+        if self.band_count == 0:
+            return None, None
+        nodata = self.nodata
+        stop = threading.Event()
+        local = threading.local()
+        readers = []
+        lock = threading.Lock()
+
+        def reduce_block(window):
+            if stop.is_set():
+                return
+            if not hasattr(local, "reader"):
+                local.reader = self._open_reader()
+                with lock:
+                    readers.append(local.reader)
+            data = self._read_block(local.reader, window)
+            with RasterInterface._bytes_read_lock:
+                RasterInterface.bytes_read += data.nbytes
+            mask = np.ones(data.shape, dtype=bool)
+            if nodata is not None and not np.isnan(nodata):
+                mask &= data != nodata
+            if np.issubdtype(data.dtype, np.floating):
+                mask &= ~np.isnan(data)
+            values = data[mask]
+            if values.size == 0:
+                return
+            block_min, block_max = values.min(), values.max()
+            if (lower is not None and block_min < lower) or (
+                upper is not None and block_max > upper
+            ):
+                stop.set()
+            return block_min, block_max
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = [
+                    x
+                    for x in executor.map(reduce_block, self.block_windows())
+                    if x is not None
+                ]
+        finally:
+            for reader in readers:
+                self._close_reader(reader)
+        if not results:
+            raise self.NoData()
+        return (
+            float(min(x[0] for x in results)),
+            float(max(x[1] for x in results)),
+        )
+
     @abstractproperty
     def compression(self) -> str:
         pass
@@ -35,11 +35,15 @@ class GDALRasterInterface(RasterInterface):
         if projection:
             return osr.SpatialReference(projection)
 
+    @property
+    def driver(self):
+        if self._dataset is None:
+            return None
+        return self._dataset.GetDriver().ShortName
+
     @property
     def is_valid_geotiff(self):
-        return (
-            self._dataset is not None and self._dataset.GetDriver().ShortName == "GTiff"
-        )
+        return self.driver == "GTiff"
 
     @property
     def band_count(self):
@@ -69,23 +73,30 @@ class GDALRasterInterface(RasterInterface):
 
     @property
     def min_max(self):
-        if self.band_count == 0:
-            return None, None
-        # usage of approx_ok=False bypasses statistics cache and forces
-        # all pixels to be read
-        # see: https://gdal.org/doxygen/classGDALRasterBand.html#ac7761bab7cf3b8445ed963e4aa85e715
-        try:
-            return self._dataset.GetRasterBand(1).ComputeRasterMinMax(False)
-        except RuntimeError as e:
-            if "no valid pixels found" in str(e):
-                raise self.NoData()
-            else:
-                raise e
+        # all pixels are read; the statistics cache in the file is not used
+        return self.compute_min_max()
 
     @property
     def shape(self):
         return (self._dataset.RasterYSize, self._dataset.RasterXSize)
 
+    @property
+    def block_size(self):
+        return tuple(self._dataset.GetRasterBand(1).GetBlockSize())
+
+    @property
+    def nodata(self):
+        return self._dataset.GetRasterBand(1).GetNoDataValue()
+
+    def _open_reader(self):
+        return gdal.Open(self.path, gdal.GA_ReadOnly)
+
+    def _close_reader(self, reader):
+        pass  # the dataset is closed when it is garbage collected
+
+    def _read_block(self, reader, window):
+        return reader.GetRasterBand(1).ReadAsArray(*window)
+
     @property
     def compression(self) -> str:
         metadata = self._dataset.GetMetadata("IMAGE_STRUCTURE")
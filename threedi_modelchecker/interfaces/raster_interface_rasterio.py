@@ -4,8 +4,9 @@ from .raster_interface import RasterInterface
 
 try:
     import rasterio
+    from rasterio.windows import Window
 except ImportError:
-    rasterio = None
+    rasterio = Window = None
 
 
 class RasterIORasterInterface(RasterInterface):
@@ -18,24 +19,40 @@ class RasterIORasterInterface(RasterInterface):
     def available():
         return rasterio is not None
 
-    def _open(self):
+    def _open_reader(self):
         with rasterio.Env(
             CPL_VSIL_CURL_USE_HEAD="NO",
             GDAL_DISABLE_READDIR_ON_OPEN="YES",
         ):
-            try:
-                self._dataset = rasterio.open(self.path, "r")
-            except rasterio.RasterioIOError:
-                self._dataset = None
+            return rasterio.open(self.path, "r")
+
+    def _close_reader(self, reader):
+        reader.close()
+
+    def _read_block(self, reader, window):
+        xoff, yoff, xsize, ysize = window
+        return reader.read(1, window=Window(xoff, yoff, xsize, ysize))
+
+    def _open(self):
+        try:
+            self._dataset = self._open_reader()
+        except rasterio.RasterioIOError:
+            self._dataset = None
 
     def _close(self):
         if self._dataset is not None:
             self._dataset.close()
             self._dataset = None
 
+    @property
+    def driver(self):
+        if self._dataset is None:
+            return None
+        return self._dataset.driver
+
     @property
     def is_valid_geotiff(self):
-        return self._dataset is not None and self._dataset.driver == "GTiff"
+        return self.driver == "GTiff"
 
     @property
     def band_count(self):
@@ -63,21 +80,24 @@ class RasterIORasterInterface(RasterInterface):
 
     @property
     def min_max(self):
-        if self.band_count == 0:
-            return None, None
-        try:
-            statistics = self._dataset.statistics(1, approx=False, clear_cache=True)
-        except Exception as e:
-            if "no valid pixels found" in str(e).lower():
-                raise self.NoData()
-            else:
-                raise e
-        return statistics.min, statistics.max
+        # all pixels are read; the statistics cache in the file is not used
+        return self.compute_min_max()
 
     @property
     def shape(self):
         return (self._dataset.height, self._dataset.width)
 
+    @property
+    def block_size(self):
+        block_height, block_width = self._dataset.block_shapes[0]
+        return block_width, block_height
+
+    @property
+    def nodata(self):
+        return self._dataset.nodata
+
     @property
     def compression(self) -> str:
-        return self._dataset.compression.value
+        # rasterio returns None for uncompressed rasters; match with GDAL
+        compression = self._dataset.compression
+        return "NONE" if compression is None else compression.value
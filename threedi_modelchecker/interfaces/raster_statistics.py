@@ -0,0 +1,90 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Tuple
+
+# The fingerprint consists of the head and tail of the file (containing the header
+# in case of a GeoTIFF) and a number of evenly spaced samples.
+HEAD_TAIL_BYTES = 1 << 16
+SAMPLE_BYTES = 1 << 12
+N_SAMPLES = 8
+
+
+def file_identity(path) -> Optional[Tuple[int, int, str]]:
+    """Return (size, mtime in ns, fingerprint) of a local file.
+
+    Returns None for non-local files (such as URLs).
+    """
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    if not os.path.isfile(path):
+        return None
+    size = stat.st_size
+    offsets = [0, max(size - HEAD_TAIL_BYTES, 0)]
+    offsets += [(size * (i + 1)) // (N_SAMPLES + 1) for i in range(N_SAMPLES)]
+    fingerprint = hashlib.sha1()
+    with open(path, "rb") as f:
+        for i, offset in enumerate(offsets):
+            f.seek(offset)
+            fingerprint.update(f.read(HEAD_TAIL_BYTES if i < 2 else SAMPLE_BYTES))
+    return size, stat.st_mtime_ns, fingerprint.hexdigest()
+
+
+class RasterStatisticsStore:
+    """Persistent store of raster statistics (min/max) in an SQLite file.
+
+    Statistics are stored per path, together with the size, modification time and
+    fingerprint of the file. They are only returned if the file is unchanged, so
+    that re-checking an unchanged raster does not require reading all pixels.
+    Remote rasters are not stored.
+    """
+
+    FILENAME = "raster_statistics.sqlite"
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / self.FILENAME
+        with closing(self._connect()) as con, con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS statistics ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                "fingerprint TEXT, min REAL, max REAL, no_data INTEGER)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.abspath(path)
+
+    def get(self, path) -> Optional[Tuple[Optional[float], Optional[float], bool]]:
+        """Return (min, max, no_data) of an unchanged raster, or None if unknown"""
+        identity = file_identity(path)
+        if identity is None:
+            return
+        with closing(self._connect()) as con:
+            row = con.execute(
+                "SELECT size, mtime_ns, fingerprint, min, max, no_data "
+                "FROM statistics WHERE path = ?",
+                (self._key(path),),
+            ).fetchone()
+        if row is None or tuple(row[:3]) != identity:
+            return
+        return row[3], row[4], bool(row[5])
+
+    def put(self, path, min_max, no_data=False):
+        identity = file_identity(path)
+        if identity is None:
+            return
+        raster_min, raster_max = (None, None) if no_data else min_max
+        with closing(self._connect()) as con, con:
+            con.execute(
+                "INSERT OR REPLACE INTO statistics VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._key(path), *identity, raster_min, raster_max, int(no_data)),
+            )
@@ -1,10 +1,30 @@
-from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+)
 
+from sqlalchemy import event
 from threedi_schema import models, ThreediDatabase
 
-from .checks.base import BaseCheck, CheckLevel
+from .checks.base import BaseCheck, CheckLevel, InvalidRow
+from .checks.caches import clear_session_caches
+from .checks.fused import FusedTableScan
 from .checks.raster import LocalContext, ServerContext
-from .config import Config
+from .profiling import CheckProfile, ProfileReport
+from .snapshot import get_index_columns, MemorySnapshot
+
+if TYPE_CHECKING:
+    # importing the config declares all checks, defer that until it is needed
+    from .config import Config
 
 __all__ = ["ThreediModelChecker"]
 
@@ -29,19 +49,118 @@ def get_epsg_data_from_raster(session) -> Tuple[int, str]:
                 abs_path = context.available_rasters.get(raster.name)
         else:
             abs_path = context.base_path.joinpath("rasters", raster_files[0])
-        with raster_interface(abs_path) as ro:
-            if ro.epsg_code is not None:
-                epsg_code = ro.epsg_code
-                epsg_source = "model_settings.dem_file"
+        ro = context.raster_cache.get(abs_path, raster_interface)
+        if ro.epsg_code is not None:
+            epsg_code = ro.epsg_code
+            epsg_source = "model_settings.dem_file"
     return epsg_code, epsg_source
 
 
+def _set_query_only(dbapi_connection, connection_record):
+    """Make sure parallel workers never write to the schematisation"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+# State of a process pool worker, set by _init_worker
+_worker = {}
+
+
+def _get_snapshot(
+    db: ThreediDatabase, snapshot: Optional[str], checks=()
+) -> ThreediDatabase:
+    if snapshot is None:
+        return db
+    elif snapshot == "memory":
+        return MemorySnapshot(db, index_columns=get_index_columns(checks))
+    else:
+        raise ValueError(f"Unknown snapshot '{snapshot}'")
+
+
+def _init_worker(
+    path, models, context, allow_beta_features, level, ignore_checks, fused, snapshot
+):
+    """Initialize a worker process with its own (read-only) database session.
+
+    The Config is built from the same models as in the parent process and the same
+    checks are selected, so that checks can be referred to by their position.
+    """
+    from .config import Config
+
+    config = Config(models=models, allow_beta_features=allow_beta_features)
+    _worker["checks"] = list(config.iter_checks(level, ignore_checks))
+    db = _get_snapshot(ThreediDatabase(path), snapshot, config.iter_index_checks())
+    event.listen(db.engine, "connect", _set_query_only)
+    session = db.get_session()
+    session.model_checker_context = context
+    _worker["session"] = session
+    _worker["fused_scan"] = FusedTableScan(_worker["checks"]) if fused else None
+
+
+def _run_check(
+    index: int, profile: bool = False
+) -> Tuple[List[InvalidRow], Dict, Optional[CheckProfile]]:
+    """Apply the check at position ``index`` in the selected checks inside a worker.
+
+    Some checks store information for their description while getting the invalid
+    rows (e.g. the EPSG code). These simple attributes are returned along with
+    the references to the invalid rows so that they can be copied onto the check in
+    the main process. With ``profile``, the CheckProfile is returned as well.
+    """
+    check = _worker["checks"][index]
+    session = _worker["session"]
+    if _worker["fused_scan"] is None:
+        rows = check.iter_invalid_refs(session)
+    else:
+        rows = _worker["fused_scan"].iter_invalid_refs(session, check)
+    report = ProfileReport() if profile else None
+    if report is not None:
+        rows = report.profile(check, rows, session.get_bind())
+    invalid = list(rows)
+    state = {
+        key: value
+        for (key, value) in vars(check).items()
+        if value is None or isinstance(value, (bool, int, float, str))
+    }
+    return invalid, state, report.checks[0] if report is not None else None
+
+
+def hydrate_errors(
+    session,
+    errors: Iterable[Tuple[BaseCheck, NamedTuple]],
+    tables: Dict[str, object],
+    batch_size: int = BaseCheck.BATCH_SIZE,
+) -> Iterator[Tuple[BaseCheck, NamedTuple]]:
+    """Replace the InvalidRow references in (check, row) tuples by the full rows.
+
+    The rows are fetched with one query per table for every ``batch_size`` errors.
+    ``tables`` maps table names to tables. References to rows that cannot be found
+    are yielded as is.
+    """
+    errors = iter(errors)
+    while batch := list(islice(errors, batch_size)):
+        ids = defaultdict(set)
+        for _, row in batch:
+            if isinstance(row, InvalidRow) and row.table in tables:
+                ids[row.table].add(row.id)
+        rows = {}
+        for table_name, table_ids in ids.items():
+            table = tables[table_name]
+            for row in session.query(table).filter(table.c.id.in_(sorted(table_ids))):
+                rows[InvalidRow(table_name, row.id)] = row
+        for check, row in batch:
+            yield check, rows.get(row, row) if isinstance(row, InvalidRow) else row
+
+
 class ThreediModelChecker:
     def __init__(
         self,
         threedi_db: ThreediDatabase,
         context: Optional[Dict] = None,
         allow_beta_features=False,
+        snapshot: Optional[str] = None,
+        config: Optional["Config"] = None,
     ):
         """Initialize the model checker.
 
@@ -51,23 +170,39 @@ class ThreediModelChecker:
         - "raster_interface": a threedi_modelchecker.interfaces.RasterInterface subclass
         - "base_path": (only local) path where to look for rasters (defaults to the db's directory)
         - "available_rasters": (only server) a dict of raster_option -> raster url
+        - "raster_statistics_dir": directory in which to keep raster statistics
+          between runs (default: no persistent statistics)
+
+        Supply ``snapshot="memory"`` to run the checks on an in-memory copy of the
+        database (see MemorySnapshot), which avoids reading from disk during the
+        checks. This helps especially for databases on a network drive. Indexes on
+        the columns that the checks join on are added to the copy.
+
+        A Config may be passed to reuse the checks of an earlier model checker (see
+        batch.check_batch). It is only used if it was built for the same models and
+        with the same ``allow_beta_features``.
         """
+        from .config import Config
+
+        self.snapshot = snapshot
         self.db = threedi_db
         self.schema = self.db.schema
         self.schema.validate_schema()
-        self.config = Config(
-            models=self.models, allow_beta_features=allow_beta_features
-        )
+        if (
+            config is None
+            or config.models != self.models
+            or config.allow_beta_features != allow_beta_features
+        ):
+            config = Config(models=self.models, allow_beta_features=allow_beta_features)
+        self.config = config
+        if snapshot is not None:
+            self.db = _get_snapshot(
+                threedi_db, snapshot, self.config.iter_index_checks()
+            )
+            self.schema = self.db.schema
         context = {} if context is None else context.copy()
         context_type = context.pop("context_type", "local")
         session = self.db.get_session()
-        if self.db.schema.epsg_code is not None:
-            context["epsg_ref_code"] = self.db.schema.epsg_code
-            context["epsg_ref_name"] = self.db.schema.epsg_source
-        else:
-            epsg_ref_code, epsg_ref_name = get_epsg_data_from_raster(session)
-            context["epsg_ref_code"] = epsg_ref_code
-            context["epsg_ref_name"] = epsg_ref_name
 
         if context_type == "local":
             context.setdefault("base_path", self.db.base_path)
@@ -78,6 +213,14 @@ class ThreediModelChecker:
             raise ValueError(f"Unknown context_type '{context_type}'")
 
         session.model_checker_context = self.context
+        if self.db.schema.epsg_code is not None:
+            self.context.epsg_ref_code = self.db.schema.epsg_code
+            self.context.epsg_ref_name = self.db.schema.epsg_source
+        else:
+            # this reads the DEM into the raster cache of the context
+            epsg_ref_code, epsg_ref_name = get_epsg_data_from_raster(session)
+            self.context.epsg_ref_code = epsg_ref_code
+            self.context.epsg_ref_name = epsg_ref_name
 
     @property
     def models(self):
@@ -85,22 +228,102 @@ class ThreediModelChecker:
         return self.schema.declared_models
 
     def errors(
-        self, level=CheckLevel.ERROR, ignore_checks=None
+        self,
+        level=CheckLevel.ERROR,
+        ignore_checks=None,
+        workers=1,
+        fused=True,
+        hydrate=False,
+        profile: Optional[ProfileReport] = None,
     ) -> Iterator[Tuple[BaseCheck, NamedTuple]]:
         """Iterates and applies checks, returning any failing rows.
 
         By default, checks of WARNING and INFO level are ignored.
 
-        :return: Tuple of the applied check and the failing row.
-        """
+        The failing rows are returned as InvalidRow references (table name and id).
+        Supply ``hydrate=True`` to get the full rows (with all column values and the
+        geometry) instead, as required by exporters.export_with_geom. These are
+        fetched in batches with a single query per table.
+
+        With ``fused`` (the default), the simple checks on the columns of a table
+        (such as not null, type, enum and range checks) are applied together in a
+        single query per table, see FusedTableScan.
+
+        Supply ``workers`` > 1 to distribute the checks over a pool of processes,
+        each having its own read-only connection to the database. The results are
+        yielded in the same order as when running serially.
+
+        When running serially, the invalid rows are fetched in batches (see
+        BaseCheck.iter_invalid_refs), so that not all of them are kept in memory at
+        once.
+
+        Supply a ProfileReport as ``profile`` to measure the cost of every check
+        (time, SQL statements, raster bytes read and memory). A CheckProfile is
+        added to the report for every check that has been applied.
 
+        :return: Tuple of the applied check and the failing row (reference).
+        """
         session = self.db.get_session()
         session.model_checker_context = self.context
-        for check in self.checks(level=level, ignore_checks=ignore_checks):
-            model_errors = check.get_invalid(session)
+        if workers > 1:
+            errors = self._errors_parallel(
+                level, ignore_checks, workers, fused, profile
+            )
+        else:
+            errors = self._errors_serial(session, level, ignore_checks, fused, profile)
+        if hydrate:
+            tables = {model.__table__.name: model.__table__ for model in self.models}
+            errors = hydrate_errors(session, errors, tables)
+        try:
+            yield from errors
+        finally:
+            # the caches of the checks (see clear_session_caches) last for one run
+            clear_session_caches(session)
+
+    def _errors_serial(
+        self, session, level, ignore_checks, fused, profile
+    ) -> Iterator[Tuple[BaseCheck, InvalidRow]]:
+        checks = list(self.checks(level=level, ignore_checks=ignore_checks))
+        fused_scan = FusedTableScan(checks) if fused else None
+        for check in checks:
+            if fused_scan is None:
+                model_errors = check.iter_invalid_refs(session)
+            else:
+                model_errors = fused_scan.iter_invalid_refs(session, check)
+            if profile is not None:
+                model_errors = profile.profile(check, model_errors, session.get_bind())
             for error_row in model_errors:
                 yield check, error_row
 
+    def _errors_parallel(
+        self, level, ignore_checks, workers, fused, profile
+    ) -> Iterator[Tuple[BaseCheck, InvalidRow]]:
+        checks = list(self.checks(level=level, ignore_checks=ignore_checks))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                str(self.db.path),
+                self.models,
+                self.context,
+                self.config.allow_beta_features,
+                level,
+                ignore_checks,
+                fused,
+                self.snapshot,
+            ),
+        ) as executor:
+            # executor.map yields the results in order of submission
+            results = executor.map(
+                _run_check, range(len(checks)), repeat(profile is not None)
+            )
+            for check, (model_errors, state, check_profile) in zip(checks, results):
+                vars(check).update(state)
+                if profile is not None:
+                    profile.checks.append(check_profile)
+                for error_row in model_errors:
+                    yield check, error_row
+
     def checks(self, level=CheckLevel.ERROR, ignore_checks=None) -> Iterator[BaseCheck]:
         """Iterates over all configured checks
 
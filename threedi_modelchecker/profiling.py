@@ -0,0 +1,129 @@
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+
+from .checks.base import BaseCheck
+from .interfaces.raster_interface import RasterInterface
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+__all__ = ["CheckProfile", "ProfileReport"]
+
+
+def peak_rss() -> Optional[int]:
+    """Return the peak resident set size of this process in bytes, if available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class CheckProfile:
+    """The cost of applying a single check.
+
+    Only the time spent inside the check is measured, not the time spent by the
+    consumer of the invalid rows. Queries done by the fused table scan on behalf of
+    other checks are attributed to the check that triggered the scan.
+
+    The peak RSS delta is the increase of the peak memory use of the process during
+    the check (None if unavailable on this platform).
+    """
+
+    error_code: int
+    level: str
+    check: str
+    column: str
+    description: str = ""
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    sql_statements: int = 0
+    invalid_rows: int = 0
+    raster_bytes: int = 0
+    peak_rss_delta: Optional[int] = None
+
+    @classmethod
+    def for_check(cls, check: BaseCheck) -> "CheckProfile":
+        return cls(
+            error_code=check.error_code,
+            level=check.level.name,
+            check=check.__class__.__name__,
+            column=check.column_name,
+        )
+
+
+class ProfileReport:
+    """Per-check profile of a check run, see ThreediModelChecker.errors.
+
+    Use ``profile`` to measure a check while iterating over its invalid rows.
+    """
+
+    def __init__(self):
+        self.checks: List[CheckProfile] = []
+        self._current: Optional[CheckProfile] = None
+
+    def _count_statement(self, *args, **kwargs):
+        if self._current is not None:
+            self._current.sql_statements += 1
+
+    def profile(self, check: BaseCheck, rows: Iterator, engine) -> Iterator:
+        """Iterate over the invalid rows of a check, measuring the check.
+
+        The SQL statements are counted on ``engine``.
+        """
+        result = CheckProfile.for_check(check)
+        self.checks.append(result)
+        rss_before = peak_rss()
+        rows = iter(rows)
+        event.listen(engine, "before_cursor_execute", self._count_statement)
+        try:
+            while True:
+                wall_start = time.perf_counter()
+                cpu_start = time.process_time()
+                raster_start = RasterInterface.bytes_read
+                self._current = result
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    break
+                finally:
+                    self._current = None
+                    result.wall_time += time.perf_counter() - wall_start
+                    result.cpu_time += time.process_time() - cpu_start
+                    result.raster_bytes += RasterInterface.bytes_read - raster_start
+                result.invalid_rows += 1
+                yield row
+        finally:
+            event.remove(engine, "before_cursor_execute", self._count_statement)
+            result.description = check.description()
+            if rss_before is not None:
+                result.peak_rss_delta = peak_rss() - rss_before
+
+    def sorted(self) -> List[CheckProfile]:
+        """Return the check profiles, most expensive (wall time) first"""
+        return sorted(self.checks, key=lambda x: x.wall_time, reverse=True)
+
+    def to_dict(self):
+        return {
+            "total": {
+                "checks": len(self.checks),
+                "wall_time": sum(x.wall_time for x in self.checks),
+                "cpu_time": sum(x.cpu_time for x in self.checks),
+                "sql_statements": sum(x.sql_statements for x in self.checks),
+                "invalid_rows": sum(x.invalid_rows for x in self.checks),
+                "raster_bytes": sum(x.raster_bytes for x in self.checks),
+            },
+            "checks": [asdict(x) for x in self.sorted()],
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
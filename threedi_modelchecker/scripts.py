@@ -6,8 +6,8 @@ from threedi_schema.domain.models import DECLARED_MODELS
 
 from threedi_modelchecker import exporters
 from threedi_modelchecker.checks.base import CheckLevel
-from threedi_modelchecker.config import Config
 from threedi_modelchecker.model_checks import ThreediModelChecker
+from threedi_modelchecker.profiling import ProfileReport
 
 
 @click.group()
@@ -43,7 +43,42 @@ def cli():
     help="Regex pattern; check codes matching this pattern are ignored.",
     default=None,
 )
-def check(sqlite, file, level, allow_beta, ignore_checks):
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes to run the checks with.",
+)
+@click.option(
+    "--raster-statistics-dir",
+    type=click.Path(file_okay=False, writable=True),
+    help="Directory to cache raster statistics in, to speed up subsequent checks.",
+    default=None,
+)
+@click.option(
+    "--in-memory",
+    is_flag=True,
+    default=False,
+    help="Copy the database into memory before checking it.",
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the time, SQL statements, etc. per check as JSON to this file.",
+    default=None,
+)
+def check(
+    sqlite,
+    file,
+    level,
+    allow_beta,
+    ignore_checks,
+    jobs,
+    raster_statistics_dir,
+    in_memory,
+    profile,
+):
     """Checks the threedi-model for errors / warnings / info messages"""
     db = ThreediDatabase(sqlite, echo=False)
     """Checks the threedi model schematisation for errors."""
@@ -60,17 +95,358 @@ def check(sqlite, file, level, allow_beta, ignore_checks):
     if ignore_checks:
         ignore_checks = re.compile(ignore_checks)
 
-    mc = ThreediModelChecker(threedi_db=db, allow_beta_features=allow_beta)
-    model_errors = mc.errors(level=level, ignore_checks=ignore_checks)
+    context = {}
+    if raster_statistics_dir:
+        context["raster_statistics_dir"] = raster_statistics_dir
+    mc = ThreediModelChecker(
+        threedi_db=db,
+        context=context,
+        allow_beta_features=allow_beta,
+        snapshot="memory" if in_memory else None,
+    )
+    report = ProfileReport() if profile else None
+    model_errors = mc.errors(
+        level=level, ignore_checks=ignore_checks, workers=jobs, profile=report
+    )
 
     if file:
         exporters.export_to_file(model_errors, file)
     else:
         exporters.print_errors(model_errors)
+    if report is not None:
+        report.write_json(profile)
+        click.echo("Profile written to %s" % profile)
 
     click.echo("Finished processing model")
 
 
+@cli.command("check-batch")
+@click.argument("paths", nargs=-1, required=True)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the results as JSON lines to this file, instead of stdout.",
+    default=None,
+)
+@click.option(
+    "-l",
+    "--level",
+    type=click.Choice([x.name for x in CheckLevel], case_sensitive=False),
+    default="ERROR",
+    help="Minimum check level.",
+)
+@click.option(
+    "--allow-beta",
+    is_flag=True,
+    default=False,
+    help="Don't check whether beta features were used in the database.",
+)
+@click.option(
+    "--ignore-checks",
+    type=str,
+    help="Regex pattern; check codes matching this pattern are ignored.",
+    default=None,
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes, each checking one file at a time.",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Maximum time in seconds to check a single file.",
+)
+@click.option(
+    "--raster-statistics-dir",
+    type=click.Path(file_okay=False, writable=True),
+    help="Directory to cache raster statistics in, to speed up subsequent checks.",
+    default=None,
+)
+@click.option(
+    "--in-memory",
+    is_flag=True,
+    default=False,
+    help="Copy every database into memory before checking it.",
+)
+def check_batch(
+    paths,
+    output,
+    level,
+    allow_beta,
+    ignore_checks,
+    jobs,
+    timeout,
+    raster_statistics_dir,
+    in_memory,
+):
+    """Checks many schematisations (paths or glob patterns), writing JSON lines
+
+    Every line holds the result of one file, written as soon as it is finished.
+    """
+    from threedi_modelchecker import batch
+
+    paths = batch.expand_paths(paths)
+    context = {}
+    if raster_statistics_dir:
+        context["raster_statistics_dir"] = raster_statistics_dir
+    results = batch.check_batch(
+        paths,
+        workers=jobs,
+        timeout=timeout,
+        level=level.upper(),
+        ignore_checks=re.compile(ignore_checks) if ignore_checks else None,
+        allow_beta_features=allow_beta,
+        context=context,
+        snapshot="memory" if in_memory else None,
+    )
+    counts = {"ok": 0, "error": 0, "timeout": 0}
+    with click.open_file(output or "-", "w") as f:
+        for result in results:
+            counts[result.status] += 1
+            f.write(result.to_json() + "\n")
+            f.flush()
+    click.echo(
+        "Checked %d files: %d ok, %d failed, %d timed out"
+        % (len(paths), counts["ok"], counts["error"], counts["timeout"]),
+        err=True,
+    )
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Host to bind to.")
+@click.option("--port", type=int, default=8000, show_default=True, help="Port.")
+@click.option(
+    "--socket",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Listen on this unix socket, instead of on a host and port.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="Maximum number of check jobs to run at the same time.",
+)
+@click.option(
+    "--raster-statistics-dir",
+    type=click.Path(file_okay=False, writable=True),
+    help="Directory to keep raster statistics in (default: a temporary directory).",
+    default=None,
+)
+@click.option("-v", "--verbose", is_flag=True, default=False, help="Log requests.")
+def serve(host, port, socket, jobs, raster_statistics_dir, verbose):
+    """Run a local HTTP service that checks schematisations on request
+
+    POST a job as JSON to /check, for example {"path": "model.gpkg", "level":
+    "warning"}. The errors are streamed back as JSON lines.
+    """
+    from threedi_modelchecker.service import CheckService, make_server
+
+    service = CheckService(workers=jobs, raster_statistics_dir=raster_statistics_dir)
+    server = make_server(
+        service, host=host, port=port, socket_path=socket, verbose=verbose
+    )
+    click.echo("Serving on %s" % (socket if socket else "http://%s:%d" % (host, port)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+@cli.group()
+def bench():
+    """Benchmark the checks on synthetic schematisations"""
+
+
+@bench.command("run")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the results as JSON to this file.",
+    required=True,
+)
+@click.option(
+    "--scale",
+    type=click.Choice(["1k", "10k", "100k", "1M"]),
+    multiple=True,
+    default=["1k", "10k"],
+    show_default=True,
+    help="Number of connection nodes, repeat the option to run multiple scales.",
+)
+@click.option(
+    "--workdir",
+    type=click.Path(file_okay=False, writable=True),
+    default="benchmark",
+    show_default=True,
+    help="Directory to keep the generated schematisations (and rasters) in.",
+)
+@click.option(
+    "--category",
+    type=click.Choice(["factory", "raster", "timeseries", "spatial", "cross-section"]),
+    multiple=True,
+    help="Categories of checks to time separately (default: all).",
+)
+@click.option(
+    "--timeseries-length",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Number of timesteps of the lateral timeseries.",
+)
+@click.option(
+    "--raster-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Width and height of the DEM in pixels.",
+)
+@click.option(
+    "--grid-refinement-areas",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of grid refinement areas covering the schematisation.",
+)
+@click.option(
+    "--boundary-conditions-2d",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of 2D boundary conditions on the grid refinement areas.",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of times to repeat every run; the fastest is reported.",
+)
+@click.option(
+    "--regenerate",
+    is_flag=True,
+    default=False,
+    help="Generate the schematisations again, even if they exist in the workdir.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes to run the checks with.",
+)
+@click.option(
+    "--in-memory",
+    is_flag=True,
+    default=False,
+    help="Copy the database into memory before checking it.",
+)
+def bench_run(
+    output,
+    scale,
+    workdir,
+    category,
+    timeseries_length,
+    raster_size,
+    grid_refinement_areas,
+    boundary_conditions_2d,
+    repeat,
+    regenerate,
+    jobs,
+    in_memory,
+):
+    """Time all checks and every category of checks on synthetic schematisations"""
+    from threedi_modelchecker import benchmark
+
+    results = []
+    for name in scale:
+        spec = benchmark.SchematisationSpec(
+            connection_nodes=benchmark.SCALES[name],
+            timeseries_length=timeseries_length,
+            raster_size=raster_size,
+            grid_refinement_areas=grid_refinement_areas,
+            boundary_conditions_2d=boundary_conditions_2d,
+        )
+        click.echo("Benchmarking %s connection nodes" % name)
+        result = benchmark.run_benchmark(
+            spec,
+            workdir,
+            level="INFO",
+            categories=category or None,
+            repeat=repeat,
+            regenerate=regenerate,
+            snapshot="memory" if in_memory else None,
+            workers=jobs,
+        )
+        result["scale"] = name
+        for run in result["runs"]:
+            click.echo("  %-15s %8.3f s" % (run["name"], run["wall_time"]))
+        results.append(result)
+    benchmark.write_json(results, output)
+    click.echo("Results written to %s" % output)
+
+
+@bench.command("compare")
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.argument("current", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--factor",
+    type=click.FloatRange(min=1.0),
+    default=1.2,
+    show_default=True,
+    help="Maximum ratio of current to baseline time or SQL statements.",
+)
+@click.option(
+    "--min-time",
+    type=click.FloatRange(min=0.0),
+    default=0.01,
+    show_default=True,
+    help="Ignore wall times shorter than this (in seconds).",
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="Number of regressions to list.",
+)
+@click.pass_context
+def bench_compare(ctx, baseline, current, factor, min_time, top):
+    """Compare benchmark (or profile) results, exit with 1 on regressions"""
+    from threedi_modelchecker import benchmark
+    from threedi_modelchecker.config import Config
+
+    comparisons = benchmark.compare(
+        benchmark.load_measurements(baseline),
+        benchmark.load_measurements(current),
+        factor=factor,
+        min_time=min_time,
+    )
+    regressions = [x for x in comparisons if x.regressed]
+    click.echo(
+        "Compared %d measurements: %d regressions"
+        % (len(comparisons), len(regressions))
+    )
+    checks = {
+        (check.error_code, check.__class__.__name__, check.column_name): check
+        for check in Config(models=DECLARED_MODELS).checks
+    }
+    for comparison in regressions[:top]:
+        click.echo(benchmark.format_comparison(comparison, checks))
+    if regressions:
+        ctx.exit(1)
+
+
 @cli.command()
 @click.option("-f", "--file", help="Write output to file, instead of stdout")
 @click.option(
@@ -82,6 +458,8 @@ def check(sqlite, file, level, allow_beta, ignore_checks):
 )
 def export_checks(file, format):
     """Export formatted checks summary to insert in documentation or use elsewhere"""
+    from threedi_modelchecker.config import Config
+
     checks = Config(models=DECLARED_MODELS).checks
 
     if format.lower() == "rst":
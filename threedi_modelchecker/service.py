@@ -0,0 +1,301 @@
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.event import listen
+from sqlalchemy.pool import QueuePool
+from threedi_schema import ThreediDatabase
+from threedi_schema.application.threedi_database import load_spatialite
+from threedi_schema.domain.models import DECLARED_MODELS
+
+from .config import Config
+from .interfaces import GDALRasterInterface, RasterIORasterInterface
+from .model_checks import ThreediModelChecker
+
+__all__ = ["CheckService", "JobError", "make_server"]
+
+RASTER_INTERFACES = {"gdal": GDALRasterInterface, "rasterio": RasterIORasterInterface}
+
+
+class JobError(ValueError):
+    """A check job is invalid"""
+
+
+class PooledDatabase(ThreediDatabase):
+    """ThreediDatabase keeping its connections (with spatialite loaded) in a pool.
+
+    ThreediDatabase opens a new connection, loading spatialite, for every session.
+    A long-running service checks the same databases over and over, so it keeps a
+    few connections open instead.
+    """
+
+    POOL_SIZE = 2
+
+    def get_engine(self, get_seperate_engine=False):
+        if self._engine is None or get_seperate_engine:
+            engine = create_engine(
+                f"sqlite:///{self.path}",
+                echo=self.echo,
+                poolclass=QueuePool,
+                pool_size=self.POOL_SIZE,
+                connect_args={"check_same_thread": False},
+            )
+            listen(engine, "connect", load_spatialite)
+            if get_seperate_engine:
+                return engine
+            self._engine = engine
+        return self._engine
+
+
+class CheckService:
+    """Applies check jobs, keeping the checks and databases between jobs.
+
+    There are ``workers`` slots, each with its own (lazily built) Config per value of
+    ``allow_beta_features``, as the checks keep state while they are applied (see
+    Config). Jobs wait for a free slot, so at most ``workers`` jobs run at the same
+    time.
+
+    Databases are kept open (see PooledDatabase) for the last ``max_databases``
+    files; a database is opened again when its file has changed. Raster files are
+    opened again for every job, but their statistics are kept in
+    ``raster_statistics_dir`` (by default a temporary directory that lives as long
+    as the service), see RasterStatisticsStore.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        raster_statistics_dir: Optional[str] = None,
+        max_databases: int = 16,
+    ):
+        self.workers = workers
+        self.max_databases = max_databases
+        self._slots = queue.Queue()
+        for _ in range(workers):
+            self._slots.put({})
+        # build one Config upfront, so that the first job is fast as well
+        slot = self._slots.get()
+        self._get_config(slot, False)
+        self._slots.put(slot)
+        self._temporary_dir = None
+        if raster_statistics_dir is None:
+            self._temporary_dir = tempfile.TemporaryDirectory()
+            raster_statistics_dir = self._temporary_dir.name
+        self.raster_statistics_dir = raster_statistics_dir
+        self._databases: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._busy = 0
+
+    @staticmethod
+    def _get_config(slot: Dict, allow_beta_features: bool) -> Config:
+        if allow_beta_features not in slot:
+            slot[allow_beta_features] = Config(
+                models=DECLARED_MODELS, allow_beta_features=allow_beta_features
+            )
+        return slot[allow_beta_features]
+
+    def _get_database(self, path) -> ThreediDatabase:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._databases:
+                self._databases.move_to_end(key)
+                return self._databases[key]
+            db = self._databases[key] = PooledDatabase(path)
+            while len(self._databases) > self.max_databases:
+                _, old = self._databases.popitem(last=False)
+                if old._engine is not None:
+                    old._engine.dispose()
+        return db
+
+    def _get_context(self, context: Optional[Dict]) -> Dict:
+        context = {} if context is None else dict(context)
+        if "raster_interface" in context:
+            try:
+                context["raster_interface"] = RASTER_INTERFACES[
+                    context["raster_interface"]
+                ]
+            except KeyError:
+                raise JobError(
+                    f"Unknown raster_interface '{context['raster_interface']}'"
+                )
+        context.setdefault("raster_statistics_dir", self.raster_statistics_dir)
+        return context
+
+    @property
+    def status(self) -> Dict:
+        return {"status": "ok", "workers": self.workers, "busy": self._busy}
+
+    def validate_job(self, job: Dict):
+        """Raise JobError if a job is invalid"""
+        if not isinstance(job, dict) or not isinstance(job.get("path"), str):
+            raise JobError("A job should be an object with a 'path'")
+        if not os.path.isfile(job["path"]):
+            raise JobError(f"File not found: {job['path']}")
+        if job.get("ignore_checks"):
+            try:
+                re.compile(job["ignore_checks"])
+            except re.error as e:
+                raise JobError(f"Invalid ignore_checks pattern: {e}")
+        self._get_context(job.get("context"))
+
+    def run_job(self, job: Dict) -> Iterator[Dict]:
+        """Apply the checks of a job, yielding messages as the checks find errors.
+
+        A job has a "path" and optionally a "level" (default "ERROR"), an
+        "ignore_checks" pattern, "allow_beta" and a "context" (see
+        ThreediModelChecker, with "raster_interface" as "gdal" or "rasterio").
+
+        Yields a message with "type": "error" for every invalid row and ends with
+        a message with "type": "done" (or "failed", with a "message").
+        """
+        self.validate_job(job)
+        allow_beta_features = bool(job.get("allow_beta", False))
+        ignore_checks = job.get("ignore_checks")
+        slot = self._slots.get()
+        with self._lock:
+            self._busy += 1
+        start = time.perf_counter()
+        count = 0
+        try:
+            model_checker = ThreediModelChecker(
+                self._get_database(job["path"]),
+                context=self._get_context(job.get("context")),
+                allow_beta_features=allow_beta_features,
+                config=self._get_config(slot, allow_beta_features),
+            )
+            for check, row in model_checker.errors(
+                level=job.get("level", "ERROR"),
+                ignore_checks=re.compile(ignore_checks) if ignore_checks else None,
+            ):
+                count += 1
+                yield {
+                    "type": "error",
+                    "error_code": check.error_code,
+                    "level": check.level.name,
+                    "table": check.table.name,
+                    "column": check.column.name,
+                    "id": row.id,
+                    "description": check.description(),
+                }
+        except Exception as e:
+            yield {"type": "failed", "message": f"{e.__class__.__name__}: {e}"}
+        else:
+            yield {
+                "type": "done",
+                "errors": count,
+                "duration": time.perf_counter() - start,
+            }
+        finally:
+            with self._lock:
+                self._busy -= 1
+            self._slots.put(slot)
+
+    def close(self):
+        with self._lock:
+            for db in self._databases.values():
+                if db._engine is not None:
+                    db._engine.dispose()
+            self._databases.clear()
+        if self._temporary_dir is not None:
+            self._temporary_dir.cleanup()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Handles GET /status and POST /check (a job as JSON, see CheckService.run_job).
+
+    The results of a check are streamed as NDJSON in a chunked response.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> CheckService:
+        return self.server.service
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._send_json(200, self.service.status)
+        else:
+            self._send_json(404, {"message": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/check":
+            self._send_json(404, {"message": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length) or b"null")
+            self.service.validate_job(job)
+        except (ValueError, JobError) as e:
+            self._send_json(400, {"message": str(e)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        messages = self.service.run_job(job)
+        try:
+            for message in messages:
+                self._write_chunk(json.dumps(message).encode() + b"\n")
+            self._write_chunk(b"")
+        finally:
+            # release the worker slot, also if the client went away
+            messages.close()
+
+    def address_string(self):
+        # the client address of a unix socket is an empty string
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ""
+
+
+def make_server(
+    service: CheckService,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    socket_path: Optional[str] = None,
+    verbose: bool = False,
+):
+    """Return an HTTP server for a CheckService, on a unix socket if ``socket_path``.
+
+    Use ``serve_forever`` to run it.
+    """
+    if socket_path is not None:
+        server = _ThreadingUnixHTTPServer(socket_path, _RequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
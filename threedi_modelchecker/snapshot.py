@@ -0,0 +1,113 @@
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Set, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from threedi_schema import ThreediDatabase
+from threedi_schema.application.threedi_database import load_spatialite
+
+__all__ = ["MemorySnapshot", "get_index_columns"]
+
+# PRAGMAs of the in-memory copy, which is only read from
+READ_PRAGMAS = {
+    "query_only": "ON",
+    "cache_size": -65536,  # in KiB
+    "temp_store": "MEMORY",
+}
+# Memory-map the source database while copying it
+SOURCE_MMAP_SIZE = 1 << 28
+
+
+def get_index_columns(checks) -> List[Tuple[str, str]]:
+    """Return the (table, column) names that the checks join or look up rows by.
+
+    Primary keys are left out, as these are indexed already.
+    """
+    result = {}
+    for check in checks:
+        for column in check.get_index_columns():
+            if not column.primary_key:
+                result[(column.table.name, column.name)] = None
+    return list(result)
+
+
+def _unindexed_columns(con: sqlite3.Connection, table: str) -> Set[str]:
+    """Return the columns of a table that are not the first column of an index"""
+    columns = {row[1] for row in con.execute(f'PRAGMA table_info("{table}")')}
+    for index in con.execute(f'PRAGMA index_list("{table}")').fetchall():
+        first = con.execute(f'PRAGMA index_info("{index[1]}")').fetchone()
+        if first is not None:
+            columns.discard(first[2])
+    return columns
+
+
+def create_indexes(con: sqlite3.Connection, index_columns: Iterable[Tuple[str, str]]):
+    """Create indexes on (table, column) names that are not indexed yet and ANALYZE.
+
+    Unknown tables and columns are skipped.
+    """
+    unindexed = {}
+    for table, column in index_columns:
+        if table not in unindexed:
+            unindexed[table] = _unindexed_columns(con, table)
+        if column not in unindexed[table]:
+            continue
+        con.execute(
+            f'CREATE INDEX "modelchecker_{table}_{column}" ON "{table}" ("{column}")'
+        )
+        unindexed[table].discard(column)
+    con.execute("ANALYZE")
+
+
+def copy_to_memory(path, index_columns=()) -> sqlite3.Connection:
+    """Copy an SQLite database into an in-memory connection with spatialite loaded.
+
+    The copy is made page by page with the SQLite backup API, so that it includes
+    the spatial metadata and the spatial index (rtree) tables of both spatialite
+    and geopackage files. The source file is opened read-only.
+
+    Indexes are added to the copy on ``index_columns`` (see create_indexes).
+    """
+    target = sqlite3.connect(":memory:", check_same_thread=False)
+    load_spatialite(target, None)
+    source = sqlite3.connect(f"{Path(path).absolute().as_uri()}?mode=ro", uri=True)
+    try:
+        source.execute(f"PRAGMA mmap_size={SOURCE_MMAP_SIZE}")
+        source.backup(target)
+    finally:
+        source.close()
+    create_indexes(target, index_columns)
+    for name, value in READ_PRAGMAS.items():
+        target.execute(f"PRAGMA {name}={value}")
+    return target
+
+
+class MemorySnapshot(ThreediDatabase):
+    """Read-only, in-memory copy of a ThreediDatabase.
+
+    The database is copied when the snapshot is created (see copy_to_memory). All
+    sessions share the single in-memory connection, so that checks do not read from
+    disk (or from a network drive) anymore. The path of the source database is kept,
+    so that rasters are still found relative to it.
+
+    Supply ``index_columns`` (see get_index_columns) to add indexes to the copy,
+    for the duration of the check run. The source file is never changed.
+    """
+
+    def __init__(self, source: ThreediDatabase, index_columns=()):
+        super().__init__(source.path, echo=source.echo)
+        self.connection = copy_to_memory(source.path, index_columns=index_columns)
+
+    def get_engine(self, get_seperate_engine=False):
+        if self._engine is None or get_seperate_engine:
+            engine = create_engine(
+                "sqlite://",
+                creator=lambda: self.connection,
+                poolclass=StaticPool,
+                echo=self.echo,
+            )
+            if get_seperate_engine:
+                return engine
+            self._engine = engine
+        return self._engine
@@ -342,6 +342,14 @@ class PotentialBreachFactory(BaseFactory):
     geom = DEFAULT_LINE
 
 
+class ExchangeLineFactory(BaseFactory):
+    class Meta:
+        model = models.ExchangeLine
+        sqlalchemy_session = None
+
+    geom = DEFAULT_LINE
+
+
 class VegetationDragFactory(BaseFactory):
     class Meta:
         model = models.VegetationDrag2D
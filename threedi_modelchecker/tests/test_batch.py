@@ -0,0 +1,82 @@
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from threedi_modelchecker import batch
+from threedi_modelchecker.batch import check_batch, check_file, expand_paths, FileResult
+from threedi_modelchecker.scripts import cli
+
+requires_fork = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="patching the worker requires the fork start method",
+)
+
+
+def test_expand_paths(tmp_path):
+    for name in ("b.sqlite", "a.sqlite", "c.gpkg"):
+        (tmp_path / name).touch()
+    assert expand_paths([str(tmp_path / "*.sqlite"), "missing.gpkg"]) == [
+        str(tmp_path / "a.sqlite"),
+        str(tmp_path / "b.sqlite"),
+        "missing.gpkg",
+    ]
+
+
+def test_check_file(threedi_db):
+    result = check_file(threedi_db.path)
+    assert result.status == "ok"
+    assert result.path == str(threedi_db.path)
+
+
+def test_check_batch_error(tmp_path):
+    paths = [str(tmp_path / "a.sqlite"), str(tmp_path / "b.sqlite")]
+    results = list(check_batch(paths, workers=2))
+    assert sorted(x.path for x in results) == paths
+    assert all(x.status == "error" and x.message for x in results)
+
+
+def test_check_batch_empty():
+    assert list(check_batch([])) == []
+
+
+def _fake_check_file(path, **kwargs):
+    if path == "slow":
+        time.sleep(10)
+    elif path == "crash":
+        os._exit(3)
+    return FileResult(path=path, status="ok", duration=0.0)
+
+
+@requires_fork
+def test_check_batch_timeout(monkeypatch):
+    monkeypatch.setattr(batch, "check_file", _fake_check_file)
+    results = list(check_batch(["slow", "a", "b"], workers=1, timeout=0.5))
+    assert [(x.path, x.status) for x in results] == [
+        ("slow", "timeout"),
+        ("a", "ok"),
+        ("b", "ok"),
+    ]
+
+
+@requires_fork
+def test_check_batch_worker_crash(monkeypatch):
+    monkeypatch.setattr(batch, "check_file", _fake_check_file)
+    results = list(check_batch(["crash", "a"], workers=1))
+    assert [(x.path, x.status) for x in results] == [("crash", "error"), ("a", "ok")]
+    assert results[0].message == "Worker exited with code 3"
+
+
+@requires_fork
+def test_check_batch_command(monkeypatch, tmp_path):
+    monkeypatch.setattr(batch, "check_file", _fake_check_file)
+    output = tmp_path / "results.jsonl"
+    result = CliRunner().invoke(cli, ["check-batch", "a", "b", "-o", str(output)])
+    assert result.exit_code == 0
+    with open(output) as f:
+        lines = [json.loads(line) for line in f]
+    assert sorted(x["path"] for x in lines) == ["a", "b"]
+    assert "Checked 2 files: 2 ok, 0 failed, 0 timed out" in result.output
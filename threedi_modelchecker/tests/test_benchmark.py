@@ -0,0 +1,179 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from threedi_schema import models
+from threedi_schema.domain.models import DECLARED_MODELS
+
+from threedi_modelchecker.benchmark import (
+    CATEGORIES,
+    compare,
+    format_comparison,
+    generate_schematisation,
+    get_categories,
+    load_measurements,
+    run_benchmark,
+    SchematisationSpec,
+    write_json,
+)
+from threedi_modelchecker.benchmark.generate import _Grid
+from threedi_modelchecker.benchmark.run import _ignore_other_codes
+from threedi_modelchecker.checks.other import (
+    GridRefinementPartialOverlap2DBoundaryCheck,
+)
+from threedi_modelchecker.config import Config
+from threedi_modelchecker.scripts import cli
+
+
+def test_grid():
+    grid = _Grid(10)
+    assert grid.columns == 4
+    assert grid.position(1) == (140000.0, 460000.0)
+    assert grid.position(6) == (140050.0, 460050.0)
+    # no links between the last node of a row and the first node of the next row
+    assert list(grid.links()) == [1, 2, 3, 5, 6, 7, 9]
+
+
+def test_categories():
+    checks = Config(models=DECLARED_MODELS).checks
+    by_category = {name: [] for name in CATEGORIES}
+    for check in checks:
+        for name in get_categories(check):
+            by_category[name].append(check)
+    assert all(by_category.values())
+    assert {x.error_code for x in by_category["timeseries"]} >= {1200, 1201}
+
+
+def test_ignore_other_codes():
+    pattern = _ignore_other_codes([3, 1200])
+    assert not pattern.match("0003")
+    assert not pattern.match("1200")
+    assert pattern.match("0001")
+    assert pattern.match("12000")
+
+
+@pytest.fixture
+def spec():
+    return SchematisationSpec(connection_nodes=20, timeseries_length=5, raster_size=8)
+
+
+def test_generate_schematisation(tmp_path, spec):
+    db = generate_schematisation(tmp_path / "bench.sqlite", spec)
+    session = db.get_session()
+    assert session.query(models.ConnectionNode).count() == 20
+    assert session.query(models.Channel).count() > 0
+    assert session.query(models.CrossSectionLocation).count() == (
+        session.query(models.Channel).count()
+    )
+    lateral = session.query(models.Lateral1D).first()
+    assert len(lateral.timeseries.split("\n")) == 5
+
+
+def test_generate_schematisation_grid_refinement(tmp_path):
+    spec = SchematisationSpec(
+        connection_nodes=20,
+        timeseries_length=5,
+        raster_size=8,
+        grid_refinement_areas=16,
+        boundary_conditions_2d=4,
+    )
+    assert spec.name == "bench_20_5_8_0_16_4"
+    db = generate_schematisation(tmp_path / "bench.sqlite", spec)
+    session = db.get_session()
+    assert session.query(models.GridRefinementArea).count() == 16
+    assert session.query(models.BoundaryConditions2D).count() == 4
+    # every other boundary condition crosses the edge of a grid refinement area
+    check = GridRefinementPartialOverlap2DBoundaryCheck(
+        column=models.BoundaryConditions2D.id
+    )
+    assert [x.id for x in check.get_invalid(session)] == [1, 3]
+
+
+def test_run_benchmark(tmp_path, spec):
+    result = run_benchmark(spec, tmp_path, categories=["factory", "timeseries"])
+    assert [x["name"] for x in result["runs"]] == ["full", "factory", "timeseries"]
+    assert result["schematisation"]["connection_nodes"] == 20
+    full, factory, _ = result["runs"]
+    assert len(factory["checks"]) < len(full["checks"])
+    assert all(x["error_code"] <= 10 for x in factory["checks"])
+
+    write_json([result], tmp_path / "bench.json")
+    with open(tmp_path / "bench.json") as f:
+        data = json.load(f)
+    assert data["benchmarks"][0]["runs"][0]["name"] == "full"
+    assert "python" in data["environment"]
+
+
+def _benchmark_json(path, wall_times, check_time, sql_statements=3):
+    run = {
+        "name": "full",
+        "wall_time": min(wall_times),
+        "wall_times": wall_times,
+        "sql_statements": sql_statements,
+        "checks": [
+            {
+                "error_code": 3,
+                "level": "ERROR",
+                "check": "NotNullCheck",
+                "column": "connection_node.geom",
+                "description": "connection_node.geom cannot be null",
+                "wall_time": check_time,
+                "sql_statements": sql_statements,
+            }
+        ],
+    }
+    with open(path, "w") as f:
+        json.dump({"benchmarks": [{"schematisation": {"name": "x"}, "runs": [run]}]}, f)
+    return path
+
+
+def test_compare(tmp_path):
+    baseline = load_measurements(_benchmark_json(tmp_path / "a.json", [1.0], 0.5))
+    current = load_measurements(
+        _benchmark_json(tmp_path / "b.json", [1.1], 0.8, sql_statements=4)
+    )
+    assert set(baseline) == {
+        ("x", "full"),
+        (
+            "x",
+            3,
+            "NotNullCheck",
+            "connection_node.geom",
+            "connection_node.geom cannot be null",
+        ),
+    }
+
+    comparisons = compare(baseline, current, factor=1.2)
+    regressed = {(x.key[1], x.metric) for x in comparisons if x.regressed}
+    assert regressed == {
+        (3, "wall_time"),
+        (3, "sql_statements"),
+        ("full", "sql_statements"),
+    }
+    assert format_comparison(comparisons[0]).startswith(
+        "E0003 NotNullCheck on connection_node.geom: wall_time 0.500s -> 0.800s (x1.60"
+    )
+
+
+def test_compare_noise(tmp_path):
+    # the spread in the repeated runs widens the threshold to 1.2 * 1.5 = 1.8
+    baseline = load_measurements(_benchmark_json(tmp_path / "a.json", [1.0, 1.5], 0.5))
+    current = load_measurements(_benchmark_json(tmp_path / "b.json", [1.1], 0.8))
+    assert not any(x.regressed for x in compare(baseline, current, factor=1.2))
+
+
+def test_compare_min_time(tmp_path):
+    baseline = load_measurements(_benchmark_json(tmp_path / "a.json", [1.0], 0.001))
+    current = load_measurements(_benchmark_json(tmp_path / "b.json", [1.0], 0.005))
+    assert not any(x.regressed for x in compare(baseline, current, min_time=0.01))
+
+
+def test_bench_compare_command(tmp_path):
+    baseline = _benchmark_json(tmp_path / "a.json", [1.0], 0.5)
+    current = _benchmark_json(tmp_path / "b.json", [1.0], 0.8)
+    runner = CliRunner()
+    result = runner.invoke(cli, ["bench", "compare", str(baseline), str(baseline)])
+    assert result.exit_code == 0
+    result = runner.invoke(cli, ["bench", "compare", str(baseline), str(current)])
+    assert result.exit_code == 1
+    assert "E0003 NotNullCheck on connection_node.geom" in result.output
@@ -1,7 +1,7 @@
 import factory
 import pytest
-from sqlalchemy import func
-from sqlalchemy.orm import Query
+from sqlalchemy import event, func
+from sqlalchemy.orm import Query, Session
 from threedi_schema import constants, custom_types, models
 
 from threedi_modelchecker.checks.base import (
@@ -12,6 +12,7 @@ from threedi_modelchecker.checks.base import (
     ForeignKeyCheck,
     GeometryCheck,
     GeometryTypeCheck,
+    InvalidRow,
     ListOfIntsCheck,
     NotNullCheck,
     QueryCheck,
@@ -19,6 +20,11 @@ from threedi_modelchecker.checks.base import (
     TypeCheck,
     UniqueCheck,
 )
+from threedi_modelchecker.checks.caches import (
+    _clear_session_caches,
+    clear_session_caches,
+    get_session_cache,
+)
 
 from . import factories
 
@@ -45,6 +51,86 @@ def test_base_extra_filters_err(session):
     assert len(invalid_rows) == 1
 
 
+def test_iter_invalid(session):
+    for i in range(1, 6):
+        factories.ConnectionNodeFactory(id=i, storage_area=None if i % 2 else 1.0)
+
+    null_check = NotNullCheck(column=models.ConnectionNode.storage_area)
+    assert null_check.get_invalid_query(session) is not None
+    invalid_rows = list(null_check.iter_invalid(session, batch_size=2))
+    assert [row.id for row in invalid_rows] == [1, 3, 5]
+    assert invalid_rows == null_check.get_invalid(session)
+
+
+def _channel_with_exchange_lines_check(session):
+    """A check joining a channel with its two exchange lines (see check 0260)"""
+    factories.ChannelFactory(id=1, exchange_type=constants.CalculationType.ISOLATED)
+    factories.ExchangeLineFactory(id=1, channel_id=1)
+    factories.ExchangeLineFactory(id=2, channel_id=1)
+    return QueryCheck(
+        column=models.Channel.id,
+        invalid=Query(models.Channel).join(
+            models.ExchangeLine, models.Channel.id == models.ExchangeLine.channel_id
+        ),
+        message="",
+    )
+
+
+def test_iter_invalid_joined(session):
+    check = _channel_with_exchange_lines_check(session)
+    invalid_rows = list(check.iter_invalid(session, batch_size=1))
+    assert [row.id for row in invalid_rows] == [1]
+    assert [row.id for row in check.get_invalid(session)] == [1]
+
+
+def test_iter_invalid_refs_joined(session):
+    check = _channel_with_exchange_lines_check(session)
+    assert list(check.iter_invalid_refs(session, batch_size=1)) == [
+        InvalidRow("channel", 1)
+    ]
+
+
+def test_iter_invalid_not_a_query(session):
+    factories.ConnectionNodeFactory(id=1, code="foo,bar")
+
+    check = ListOfIntsCheck(column=models.ConnectionNode.code)
+    assert check.get_invalid_query(session) is None
+    assert list(check.iter_invalid(session)) == check.get_invalid(session)
+
+
+def test_iter_invalid_refs(session):
+    factories.ConnectionNodeFactory(id=1, storage_area=None, code="foo")
+    factories.ConnectionNodeFactory(id=2, storage_area=1.0, code="1,2")
+
+    null_check = NotNullCheck(column=models.ConnectionNode.storage_area)
+    query_check = QueryCheck(
+        column=models.ConnectionNode.id,
+        invalid=Query(models.ConnectionNode).filter(
+            models.ConnectionNode.storage_area != None
+        ),
+        message="",
+    )
+    list_check = ListOfIntsCheck(column=models.ConnectionNode.code)
+    assert list(null_check.iter_invalid_refs(session)) == [
+        InvalidRow("connection_node", 1)
+    ]
+    assert list(query_check.iter_invalid_refs(session)) == [
+        InvalidRow("connection_node", 2)
+    ]
+    assert list(list_check.iter_invalid_refs(session)) == [
+        InvalidRow("connection_node", 1)
+    ]
+
+
+def test_iter_rows(session):
+    for i in range(1, 6):
+        factories.ConnectionNodeFactory(id=i)
+
+    check = NotNullCheck(column=models.ConnectionNode.storage_area)
+    rows = list(check.iter_rows(session, [5, 1, 3, 1], batch_size=2))
+    assert [row.id for row in rows] == [1, 3, 5]
+
+
 def test_fk_check(session):
     factories.ConnectionNodeFactory(id=1)
     factories.PumpFactory(connection_node_id=1)
@@ -608,3 +694,28 @@ def test_epsg_geom_check(session, ref_epsg, valid):
     check = EPSGGeomCheck(column=models.ConnectionNode.geom)
     invalids = check.get_invalid(session)
     assert (len(invalids) == 0) == valid
+
+
+def test_session_caches_dropped_on_change(session):
+    factories.DryWeatherFlowFactory(id=1, tags="1")
+    check = ListOfIntsCheck(column=models.DryWeatherFlow.tags)
+    assert check.get_invalid(session) == []
+    assert "tags_cache" in session.info
+
+    factories.DryWeatherFlowFactory(id=2, tags="1;2")
+    assert "tags_cache" not in session.info
+    assert [x.id for x in check.get_invalid(session)] == [2]
+
+    clear_session_caches(session)
+    assert "tags_cache" not in session.info
+
+
+def test_session_cache_watches_only_its_session():
+    session, other = Session(), Session()
+    cache = get_session_cache(session, "tags_cache", dict)
+    assert get_session_cache(session, "tags_cache", dict) is cache
+    assert event.contains(session, "after_attach", _clear_session_caches)
+    assert not event.contains(other, "after_attach", _clear_session_caches)
+    assert not event.contains(Session, "after_attach", _clear_session_caches)
+    with pytest.raises(ValueError):
+        get_session_cache(session, "unknown", dict)
@@ -1,3 +1,6 @@
+from unittest import mock
+
+import numpy as np
 import pytest
 from threedi_schema import constants, models
 
@@ -5,6 +8,8 @@ from threedi_modelchecker.checks.cross_section_definitions import (
     cross_section_configuration_for_record,
     cross_section_configuration_not_tabulated,
     cross_section_configuration_tabulated,
+    cross_section_configurations,
+    CrossSectionCache,
     CrossSectionCSVFormatCheck,
     CrossSectionExpectEmptyCheck,
     CrossSectionFirstElementNonZeroCheck,
@@ -26,6 +31,7 @@ from threedi_modelchecker.checks.cross_section_definitions import (
     get_widths_heights_for_tabulated_record,
     OpenIncreasingCrossSectionConveyanceFrictionCheck,
     OpenIncreasingCrossSectionVariableCheck,
+    ParsedCrossSection,
 )
 
 from . import factories
@@ -84,7 +90,7 @@ def test_parse_cross_section_table(session, cross_section_table, col_idx, expect
     )
     values = list(check.parse_cross_section_table(session=session, col_idx=col_idx))
     if expected:
-        assert values[0][1] == expected
+        assert np.array_equal(values[0][1], expected)
     else:
         assert not values
 
@@ -700,3 +706,131 @@ def test_get_widths_heights_for_tabulated_record_raise(session):
     records = list(check.to_check(session))
     with pytest.raises(ValueError):
         get_widths_heights_for_tabulated_record(records[0])
+
+
+@pytest.mark.parametrize(
+    "table, columns, errors",
+    [
+        (None, (None, None), (False, False)),
+        ("0,1\n2,3", ([0, 2], [1, 3]), (False, False)),
+        ("0\n2", ([0, 2], None), (False, True)),
+        ("0,foo", ([0], None), (False, True)),
+    ],
+)
+def test_parsed_cross_section(table, columns, errors):
+    record = mock.Mock(
+        cross_section_shape=constants.CrossSectionShape.TABULATED_YZ,
+        cross_section_width=None,
+        cross_section_height=None,
+        cross_section_table=table,
+    )
+    parsed = ParsedCrossSection.from_record(record)
+    for column, expected in zip(parsed.columns, columns):
+        if expected is None:
+            assert column is None
+        else:
+            assert column.tolist() == expected
+    assert tuple(error is not None for error in parsed.errors) == errors
+
+
+@pytest.mark.parametrize(
+    "shape, kwargs, expected",
+    [
+        (
+            constants.CrossSectionShape.TABULATED_YZ,
+            {"cross_section_table": "0,1\n1,2\n2,3\n0,4"},
+            (2, 3, "open"),
+        ),
+        (
+            constants.CrossSectionShape.TABULATED_RECTANGLE,
+            {"cross_section_table": "0,1\n1,2\n2,0"},
+            (2, 2, "closed"),
+        ),
+        (
+            constants.CrossSectionShape.TABULATED_YZ,
+            {"cross_section_table": "0,foo"},
+            (None, None, None),
+        ),
+        (
+            constants.CrossSectionShape.CLOSED_RECTANGLE,
+            {"cross_section_width": 1, "cross_section_height": 2},
+            (1, 2, "closed"),
+        ),
+        (None, {}, (None, None, None)),
+    ],
+)
+def test_parsed_cross_section_configuration(session, shape, kwargs, expected):
+    factories.CrossSectionLocationFactory(cross_section_shape=shape, **kwargs)
+    parsed = CrossSectionCache.for_session(session).get(
+        session, models.CrossSectionLocation.__table__
+    )
+    assert list(parsed.values())[0].configuration == expected
+
+
+def test_cross_section_cache_parses_once(session):
+    factories.CrossSectionLocationFactory(
+        cross_section_shape=constants.CrossSectionShape.TABULATED_YZ,
+        cross_section_table="0,1\n1,0\n2,1",
+    )
+    factories.CrossSectionLocationFactory(
+        cross_section_shape=constants.CrossSectionShape.TABULATED_YZ,
+        cross_section_table="0,1\n1,-1\n0,1",
+    )
+    column = models.CrossSectionLocation.cross_section_table
+    checks = [
+        CrossSectionYZHeightCheck(column=column),
+        CrossSectionYZCoordinateCountCheck(column=column),
+        CrossSectionYZIncreasingWidthIfOpenCheck(column=column),
+        CrossSectionMinimumDiameterCheck(column=column),
+    ]
+    with mock.patch.object(
+        ParsedCrossSection,
+        "from_record",
+        side_effect=ParsedCrossSection.from_record,
+    ) as from_record:
+        invalid = [check.get_invalid(session) for check in checks]
+    assert from_record.call_count == 2
+    assert [len(x) for x in invalid] == [1, 1, 0, 0]
+
+
+def test_cross_section_configurations():
+    shape = constants.CrossSectionShape
+    cross_sections = [
+        ParsedCrossSection.from_record(
+            mock.Mock(
+                cross_section_shape=shape,
+                cross_section_width=width,
+                cross_section_height=height,
+                cross_section_table=table,
+            )
+        )
+        for (shape, width, height, table) in [
+            (None, 1.0, 1.0, None),
+            (shape.CIRCLE, 0.5, None, None),
+            (shape.EGG, 1.0, None, None),
+            (shape.RECTANGLE, 2.0, None, None),
+            (shape.CLOSED_RECTANGLE, 2.0, None, None),
+            (shape.TABULATED_RECTANGLE, None, None, "0,1\n1,2\n2,0"),
+            (shape.TABULATED_TRAPEZIUM, None, None, "0,1\n1,3\n2,2"),
+            (shape.TABULATED_TRAPEZIUM, None, None, "0,1\n1,-1"),
+            (shape.TABULATED_YZ, None, None, "0,1\n1,0\n2.1,1.2"),
+            (shape.TABULATED_YZ, None, None, "0,1\n1,0\n0,1"),
+            (shape.TABULATED_YZ, None, None, "0,foo"),
+        ]
+    ]
+    configurations = cross_section_configurations(cross_sections)
+    np.testing.assert_equal(
+        configurations.max_width,
+        [np.nan, 0.5, 1.0, 2.0, 2.0, 2.0, 3.0, 1.0, 2.1, 1.0, np.nan],
+    )
+    np.testing.assert_equal(
+        configurations.max_height,
+        [np.nan, 0.5, 1.5, np.nan, 0.0, 2.0, 2.0, 1.0, 1.2, 1.0, np.nan],
+    )
+    assert configurations.closed.tolist() == [0, 1, 1, 0, 1, 1, 0, 0, 0, 1, 0]
+    assert configurations.open.tolist() == [0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 0]
+
+
+def test_cross_section_configurations_empty():
+    configurations = cross_section_configurations([])
+    assert all(len(x) == 0 for x in configurations)
@@ -0,0 +1,65 @@
+from threedi_schema import constants, models
+
+from threedi_modelchecker.checks.base import (
+    EnumCheck,
+    NotNullCheck,
+    QueryCheck,
+    RangeCheck,
+)
+from threedi_modelchecker.checks.fused import FusedTableScan, get_fused_clause
+
+from . import factories
+
+
+def test_get_fused_clause(session):
+    check = NotNullCheck(column=models.ConnectionNode.storage_area)
+    assert get_fused_clause(check, session) is not None
+
+
+def test_get_fused_clause_other_table(session):
+    check = RangeCheck(
+        column=models.Channel.exchange_thickness,
+        min_value=0,
+        filters=models.Channel.connection_node_id_start == models.ConnectionNode.id,
+    )
+    assert get_fused_clause(check, session) is None
+
+
+def test_get_fused_clause_query_check(session):
+    check = QueryCheck(
+        column=models.ConnectionNode.id,
+        invalid=session.query(models.ConnectionNode),
+        message="",
+    )
+    assert get_fused_clause(check, session) is None
+
+
+def test_fused_table_scan(session):
+    factories.ConnectionNodeFactory(id=1, storage_area=3.0)
+    factories.ConnectionNodeFactory(id=2, storage_area=None)
+    factories.ConnectionNodeFactory(id=3, storage_area=-1.0)
+    factories.ConnectionNodeFactory(id=4, storage_area=-2.0)
+    checks = [
+        NotNullCheck(column=models.ConnectionNode.storage_area),
+        RangeCheck(column=models.ConnectionNode.storage_area, min_value=0),
+        RangeCheck(
+            column=models.ConnectionNode.storage_area,
+            min_value=0,
+            filters=models.ConnectionNode.id != 3,
+        ),
+        EnumCheck(column=models.Channel.exchange_type),
+    ]
+    expected = [[row.id for row in check.get_invalid(session)] for check in checks]
+
+    fused_scan = FusedTableScan(checks)
+    actual = [[row.id for row in fused_scan.get_invalid(session, c)] for c in checks]
+
+    assert expected == [[2], [3, 4], [4], []]
+    assert actual == expected
+
+
+def test_fused_table_scan_returns_rows(session):
+    factories.ChannelFactory(id=1, exchange_type=constants.ExchangeTypeChannel.ISOLATED)
+    check = EnumCheck(column=models.Channel.exchange_type)
+    fused_scan = FusedTableScan([check])
+    assert fused_scan.get_invalid(session, check) == check.get_invalid(session)
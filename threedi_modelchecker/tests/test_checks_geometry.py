@@ -0,0 +1,94 @@
+from unittest import mock
+
+import numpy as np
+from threedi_schema import models
+
+from threedi_modelchecker.checks.base import (
+    EPSGGeomCheck,
+    GeometryCheck,
+    GeometryTypeCheck,
+)
+from threedi_modelchecker.checks.geometry import (
+    GeometryColumnCache,
+    GeometryColumnSummary,
+    invalid_ids_from_rows,
+)
+
+from . import factories
+
+
+def test_geometry_column_summary():
+    summary = GeometryColumnSummary.from_rows(
+        [
+            (1, "POINT", 28992),
+            (2, "LINESTRING", 28992),
+            (3, "POINT", 4326),
+            (4, None, None),
+            (5, "POINT", -1),
+        ]
+    )
+    assert summary.ids_with_other_type("POINT").tolist() == [2]
+    assert summary.ids_with_other_type("POLYGON").tolist() == [1, 2, 3, 5]
+    assert summary.ids_with_other_srid(28992).tolist() == [3, 5]
+
+
+def test_geometry_column_summary_empty():
+    summary = GeometryColumnSummary.from_rows([])
+    assert summary.ids.dtype == np.int64
+    assert summary.ids_with_other_type("POINT").tolist() == []
+    assert summary.ids_with_other_srid(28992).tolist() == []
+
+
+def test_invalid_ids_from_rows():
+    rows = [(1, 1), (2, 0), (3, -1), (4, None), (5, True)]
+    assert invalid_ids_from_rows(rows).tolist() == [2, 3]
+    assert invalid_ids_from_rows([]).dtype == np.int64
+
+
+def test_geometry_column_cache_reads_once(session):
+    factories.ConnectionNodeFactory(id=1)
+    factories.ConnectionNodeFactory(id=2)
+    session.model_checker_context.epsg_ref_code = 4326
+    checks = [
+        GeometryCheck(models.ConnectionNode.geom),
+        GeometryTypeCheck(models.ConnectionNode.geom),
+        EPSGGeomCheck(column=models.ConnectionNode.geom),
+    ]
+    with mock.patch.object(
+        GeometryColumnSummary,
+        "from_rows",
+        side_effect=GeometryColumnSummary.from_rows,
+    ) as from_rows:
+        results = [check.get_invalid(session) for check in checks]
+        results += [check.get_invalid(session) for check in checks]
+    assert from_rows.call_count == 1
+    assert [[row.id for row in rows] for rows in results] == [[], [], [1, 2]] * 2
+    summary = GeometryColumnCache.for_session(session).get(
+        session, models.ConnectionNode.geom
+    )
+    assert summary.ids.tolist() == [1, 2]
+
+
+def test_geometry_column_cache_validity_lazy(session):
+    factories.ConnectionNodeFactory(id=1)
+    cache = GeometryColumnCache.for_session(session)
+    with mock.patch(
+        "threedi_modelchecker.checks.geometry.invalid_ids_from_rows",
+        side_effect=invalid_ids_from_rows,
+    ) as from_rows:
+        GeometryTypeCheck(models.ConnectionNode.geom).get_invalid(session)
+        assert from_rows.call_count == 0
+        GeometryCheck(models.ConnectionNode.geom).get_invalid(session)
+        GeometryCheck(models.ConnectionNode.geom).get_invalid(session)
+        assert from_rows.call_count == 1
+    assert cache.get_invalid_ids(session, models.ConnectionNode.geom).tolist() == []
+
+
+def test_geometry_check_filters(session):
+    factories.ConnectionNodeFactory(id=1)
+    factories.ConnectionNodeFactory(id=2)
+    session.model_checker_context.epsg_ref_code = 4326
+    check = EPSGGeomCheck(
+        column=models.ConnectionNode.geom, filters=models.ConnectionNode.id == 2
+    )
+    assert [row.id for row in check.get_invalid(session)] == [2]
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from threedi_schema import constants
+
+from threedi_modelchecker.checks.network import (
+    connected_components,
+    NetworkIndex,
+    NetworkWithoutOutletCheck,
+    PumpCycleCheck,
+)
+from threedi_modelchecker.tests import factories
+
+
+@pytest.mark.parametrize(
+    "n,starts,ends,expected",
+    [
+        (0, [], [], []),
+        (3, [], [], [0, 1, 2]),
+        (6, [3, 1, 5], [1, 0, 4], [0, 0, 2, 0, 4, 4]),
+        (4, [0, 1, 2, 3], [1, 2, 3, 0], [0, 0, 0, 0]),
+    ],
+)
+def test_connected_components(n, starts, ends, expected):
+    labels = connected_components(
+        n, np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+    )
+    assert labels.tolist() == expected
+
+
+def _isolated_node(id, **kwargs):
+    return factories.ConnectionNodeFactory(
+        id=id, exchange_type=constants.CalculationTypeNode.ISOLATED, **kwargs
+    )
+
+
+def _standalone_channel(id, start, end):
+    return factories.ChannelFactory(
+        id=id,
+        connection_node_id_start=start,
+        connection_node_id_end=end,
+        exchange_type=constants.CalculationType.STANDALONE,
+    )
+
+
+def test_network_index(session):
+    for i in range(1, 7):
+        _isolated_node(i)
+    _standalone_channel(1, 1, 2)
+    _standalone_channel(2, 2, 3)
+    factories.PumpFactory(id=1, connection_node_id=4)
+    factories.PumpMapFactory(id=1, pump_id=1, connection_node_id_end=5)
+    factories.BoundaryConditions1DFactory(id=1, connection_node_id=5)
+
+    network = NetworkIndex.for_session(session)
+    assert network.component_sizes() == {1: 3, 4: 2}
+    assert network.has_boundary.tolist() == [False] * 3 + [True] + [False] * 2
+
+
+def test_network_without_outlet(session):
+    for i in range(1, 10):
+        _isolated_node(i, storage_area=1.0 if i == 6 else None)
+    # no boundary condition, storage or exchange
+    _standalone_channel(1, 2, 1)
+    # a boundary condition
+    _standalone_channel(2, 3, 4)
+    factories.BoundaryConditions1DFactory(id=1, connection_node_id=4)
+    # storage
+    _standalone_channel(3, 5, 6)
+    # exchange with 2D through a channel
+    factories.ChannelFactory(
+        id=4,
+        connection_node_id_start=7,
+        connection_node_id_end=8,
+        exchange_type=constants.CalculationType.CONNECTED,
+    )
+    # node 9 is not connected at all (see check 0251)
+
+    check = NetworkWithoutOutletCheck()
+    invalid = check.get_invalid(session)
+    assert [x.id for x in invalid] == [1]
+    assert check.description().endswith(
+        "Number of connection nodes per network (by its connection node): 1: 2."
+    )
+
+
+def test_pump_cycle(session):
+    for i in range(1, 6):
+        _isolated_node(i)
+    # 1 -> 2 -> 3 -> 1 is a cycle, 3 -> 4 and 5 -> 1 are not on it
+    for id, (start, end) in enumerate([(1, 2), (2, 3), (3, 1), (3, 4), (5, 1)], 1):
+        factories.PumpFactory(id=id, connection_node_id=start)
+        factories.PumpMapFactory(id=id, pump_id=id, connection_node_id_end=end)
+    # pumping to its own node is a different check (0255)
+    factories.PumpFactory(id=6, connection_node_id=4)
+    factories.PumpMapFactory(id=6, pump_id=6, connection_node_id_end=4)
+
+    invalid = PumpCycleCheck().get_invalid(session)
+    assert [x.id for x in invalid] == [1, 2, 3]
@@ -1,7 +1,7 @@
 from unittest import mock
 
 import pytest
-from sqlalchemy import select, text
+from sqlalchemy import event, select, text
 from threedi_schema import constants, models, ThreediDatabase
 from threedi_schema.beta_features import BETA_COLUMNS, BETA_VALUES
 
@@ -929,6 +929,41 @@ def test_control_has_single_measure_variable(session, measure_variables, valid):
     assert (len(invalids) == 0) == valid
 
 
+@pytest.mark.parametrize("nof_controls", [1, 50])
+def test_control_has_single_measure_variable_query_count(session, nof_controls):
+    for i in range(1, nof_controls + 1):
+        factories.MemoryControlFactory(id=i)
+        factories.MeasureLocationFactory(
+            id=i,
+            measure_variable=(
+                constants.MeasureVariables.waterlevel
+                if i % 2
+                else constants.MeasureVariables.volume
+            ),
+        )
+        for measure_location_id in (1, i):
+            factories.MeasureMapFactory(
+                control_id=i,
+                measure_location_id=measure_location_id,
+                control_type="memory",
+            )
+    session.flush()
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        check = ControlHasSingleMeasureVariable(control_model=models.MemoryControl)
+        invalids = check.get_invalid(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert [x.id for x in invalids] == list(range(2, nof_controls + 1, 2))
+    assert len(statements) == 1
+
+
 @pytest.mark.parametrize(
     "measure_map_data, expected_invalid_count",
     [
@@ -16,6 +16,10 @@ from threedi_modelchecker.checks.raster import (
     RasterSquareCellsCheck,
     ServerContext,
 )
+from threedi_modelchecker.interfaces import (
+    RasterMetadataCache,
+    RasterStatisticsStore,
+)
 from threedi_modelchecker.interfaces.raster_interface_gdal import GDALRasterInterface
 from threedi_modelchecker.interfaces.raster_interface_rasterio import (
     RasterIORasterInterface,
@@ -34,7 +38,7 @@ import pytest
 
 @pytest.fixture
 def mocked_check():
-    with mock.patch.object(BaseRasterCheck, "is_valid", return_value=True):
+    with mock.patch.object(BaseRasterCheck, "is_valid_raster", return_value=True):
         yield BaseRasterCheck(column=models.ModelSettings.dem_file)
 
 
@@ -61,11 +65,20 @@ def session_server(session, context_server):
 
 
 def create_geotiff(
-    path, epsg=28992, width=3, height=2, bands=1, dx=0.5, dy=0.5, value=None
+    path,
+    epsg=28992,
+    width=3,
+    height=2,
+    bands=1,
+    dx=0.5,
+    dy=0.5,
+    value=None,
+    data=None,
+    options=None,
 ):
     path.parent.mkdir(exist_ok=True)
     ds = gdal.GetDriverByName("GTiff").Create(
-        str(path), width, height, bands, gdal.GDT_Byte
+        str(path), width, height, bands, gdal.GDT_Byte, options=options or []
     )
     if epsg is not None:
         if isinstance(epsg, int):
@@ -76,7 +89,9 @@ def create_geotiff(
     ds.SetGeoTransform((155000.0, dx, 0, 463000.0, 0, -dy))
     band = ds.GetRasterBand(1)
     band.SetNoDataValue(255)
-    if value is None:
+    if data is not None:
+        pass
+    elif value is None:
         data = np.arange(height * width).reshape(height, width)
     else:
         data = np.full((height, width), fill_value=value, dtype=int)
@@ -119,31 +134,31 @@ def test_base_to_check_ignores_none(session):
 def test_base_get_invalid_local(mocked_check, session_local, invalid_geotiff):
     factories.ModelSettingsFactory(dem_file="raster.tiff")
     assert mocked_check.get_invalid(session_local) == []
-    mocked_check.is_valid.assert_called_once_with(
-        invalid_geotiff, session_local.model_checker_context.raster_interface
-    )
+    (raster,) = mocked_check.is_valid_raster.call_args[0]
+    assert raster.path == invalid_geotiff
+    assert raster.interface_cls is session_local.model_checker_context.raster_interface
 
 
 def test_base_get_invalid_local_no_file(mocked_check, session_local):
     factories.ModelSettingsFactory(dem_file="somefile")
     assert mocked_check.get_invalid(session_local) == []
-    assert not mocked_check.is_valid.called
+    assert not mocked_check.is_valid_raster.called
 
 
 def test_base_get_invalid_server(mocked_check, context_server, session_server):
     factories.ModelSettingsFactory(dem_file="somefile")
     context_server.available_rasters = {"dem_file": "http://tempurl"}
     assert mocked_check.get_invalid(session_server) == []
-    mocked_check.is_valid.assert_called_once_with(
-        "http://tempurl", session_server.model_checker_context.raster_interface
-    )
+    (raster,) = mocked_check.is_valid_raster.call_args[0]
+    assert raster.path == "http://tempurl"
+    assert raster.interface_cls is session_server.model_checker_context.raster_interface
 
 
 def test_base_get_invalid_server_no_file(mocked_check, context_server, session_server):
     factories.ModelSettingsFactory(dem_file="somefile")
     context_server.available_rasters = {"other": "http://tempurl"}
     assert mocked_check.get_invalid(session_server) == []
-    assert not mocked_check.is_valid.called
+    assert not mocked_check.is_valid_raster.called
 
 
 def test_base_get_invalid_server_available_set(
@@ -152,7 +167,7 @@ def test_base_get_invalid_server_available_set(
     factories.ModelSettingsFactory(dem_file="somefile")
     context_server.available_rasters = {"dem_file"}
     assert mocked_check.get_invalid(session_server) == []
-    assert not mocked_check.is_valid.called
+    assert not mocked_check.is_valid_raster.called
 
 
 def test_base_no_gdal(mocked_check, session_local):
@@ -162,7 +177,7 @@ def test_base_no_gdal(mocked_check, session_local):
         return_value=False,
     ):
         assert mocked_check.get_invalid(session_local) == []
-        assert not mocked_check.is_valid.called
+        assert not mocked_check.is_valid_raster.called
 
 
 def test_exists_local_ok(session_local, invalid_geotiff):
@@ -404,3 +419,241 @@ def test_gdal_check_err(session_local):
     ):
         check = GDALAvailableCheck(column=models.ModelSettings.dem_file)
         assert check.get_invalid(session_local)
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+def test_raster_cache_header(valid_geotiff, interface_cls):
+    raster = RasterMetadataCache().get(valid_geotiff, interface_cls)
+    assert raster.driver == "GTiff"
+    assert raster.is_valid_geotiff
+    assert raster.band_count == 1
+    assert raster.has_projection
+    assert not raster.is_geographic
+    assert raster.epsg_code == 28992
+    assert raster.pixel_size == (0.5, 0.5)
+    assert raster.shape == (2, 3)
+    assert raster.compression == "NONE"
+    assert raster.min_max == (0, 5)
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+def test_raster_cache_invalid_file(invalid_geotiff, interface_cls):
+    raster = RasterMetadataCache().get(invalid_geotiff, interface_cls)
+    assert raster.driver is None
+    assert not raster.is_valid_geotiff
+    assert raster.shape is None
+
+
+def test_raster_cache_opens_once(valid_geotiff):
+    cache = RasterMetadataCache()
+    with mock.patch.object(
+        GDALRasterInterface,
+        "_open",
+        autospec=True,
+        side_effect=GDALRasterInterface._open,
+    ) as _open:
+        first = cache.get(valid_geotiff, GDALRasterInterface)
+        second = cache.get(valid_geotiff, GDALRasterInterface)
+        assert _open.call_count == 1
+        assert first.min_max == second.min_max
+        assert first.min_max == (0, 5)
+        # the statistics require reading the pixels, which is done once
+        assert _open.call_count == 2
+    assert first is second
+    assert len(cache) == 1
+
+
+def test_raster_cache_no_data(tmp_path):
+    path = create_geotiff(tmp_path / "raster.tiff", value=255)
+    raster = RasterMetadataCache().get(path, GDALRasterInterface)
+    with pytest.raises(GDALRasterInterface.NoData):
+        raster.min_max
+    with pytest.raises(GDALRasterInterface.NoData):
+        raster.min_max
+
+
+def test_raster_checks_share_cache(session_local, valid_geotiff):
+    factories.ModelSettingsFactory(dem_file="raster.tiff")
+    checks = [
+        RasterIsValidCheck(column=models.ModelSettings.dem_file),
+        RasterHasOneBandCheck(column=models.ModelSettings.dem_file),
+        RasterSquareCellsCheck(column=models.ModelSettings.dem_file),
+        RasterRangeCheck(column=models.ModelSettings.dem_file, min_value=0),
+    ]
+    with mock.patch.object(
+        GDALRasterInterface,
+        "_open",
+        autospec=True,
+        side_effect=GDALRasterInterface._open,
+    ) as _open:
+        for check in checks:
+            assert check.get_invalid(session_local) == []
+        # once for the header and once for the statistics
+        assert _open.call_count == 2
+    assert len(session_local.model_checker_context.raster_cache) == 1
+
+
+@pytest.fixture
+def tiled_geotiff(tmp_path):
+    # 4 x 3 tiles; nodata (255) everywhere except for 2 pixels in different tiles
+    data = np.full((40, 64), fill_value=255, dtype=np.uint8)
+    data[3, 5] = 10
+    data[35, 60] = 200
+    return create_geotiff(
+        tmp_path / "tiled.tiff",
+        width=64,
+        height=40,
+        data=data,
+        options=["TILED=YES", "BLOCKXSIZE=16", "BLOCKYSIZE=16"],
+    )
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+def test_block_windows_tiled(tiled_geotiff, interface_cls):
+    with interface_cls(tiled_geotiff) as raster:
+        assert raster.block_size == (16, 16)
+        windows = list(raster.block_windows())
+    assert len(windows) == 12
+    assert windows[0] == (0, 0, 16, 16)
+    assert windows[-1] == (48, 32, 16, 8)
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+def test_block_windows_strips_grouped(tmp_path, interface_cls):
+    path = create_geotiff(
+        tmp_path / "strips.tiff", width=64, height=40, options=["BLOCKYSIZE=1"]
+    )
+    with interface_cls(path) as raster:
+        windows = list(raster.block_windows())
+    assert windows == [(0, 0, 64, 40)]
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_compute_min_max(tiled_geotiff, interface_cls, max_workers):
+    with interface_cls(tiled_geotiff) as raster:
+        assert raster.compute_min_max(max_workers=max_workers) == (10.0, 200.0)
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+def test_compute_min_max_stops_early(tiled_geotiff, interface_cls):
+    with interface_cls(tiled_geotiff) as raster:
+        # the first tile exceeds the upper bound; the last one is not read
+        assert raster.compute_min_max(upper=5, max_workers=1) == (10.0, 10.0)
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+def test_compute_min_max_no_data(tmp_path, interface_cls):
+    path = create_geotiff(tmp_path / "raster.tiff", value=255)
+    with interface_cls(path) as raster:
+        with pytest.raises(interface_cls.NoData):
+            raster.compute_min_max()
+
+
+def test_raster_cache_partial_min_max(tiled_geotiff):
+    raster = RasterMetadataCache().get(tiled_geotiff, GDALRasterInterface)
+    assert raster.get_min_max(upper=5) == (10.0, 10.0)
+    # the partial result is enough to show that the raster exceeds [0, 5]
+    assert raster.get_min_max(lower=0, upper=5) == (10.0, 10.0)
+    # for another range, the raster is read completely
+    assert raster.get_min_max(upper=300) == (10.0, 200.0)
+    assert raster.min_max == (10.0, 200.0)
+
+
+@pytest.mark.parametrize(
+    "interface_cls", [GDALRasterInterface, RasterIORasterInterface]
+)
+def test_raster_range_tiled(tiled_geotiff, interface_cls):
+    check = RasterRangeCheck(column=models.ModelSettings.dem_file, max_value=100)
+    assert not check.is_valid(tiled_geotiff, interface_cls)
+    check = RasterRangeCheck(column=models.ModelSettings.dem_file, min_value=10)
+    assert check.is_valid(tiled_geotiff, interface_cls)
+
+
+@pytest.fixture
+def statistics_store(tmp_path):
+    return RasterStatisticsStore(tmp_path / "cache")
+
+
+def test_statistics_store_roundtrip(statistics_store, valid_geotiff):
+    assert statistics_store.get(valid_geotiff) is None
+    statistics_store.put(valid_geotiff, (0.0, 5.0))
+    assert statistics_store.get(valid_geotiff) == (0.0, 5.0, False)
+    # a new store in the same directory reads the same file
+    assert RasterStatisticsStore(statistics_store.directory).get(valid_geotiff) == (
+        0.0,
+        5.0,
+        False,
+    )
+
+
+def test_statistics_store_changed_file(statistics_store, tmp_path):
+    path = create_geotiff(tmp_path / "raster.tiff", value=5)
+    statistics_store.put(path, (5.0, 5.0))
+    create_geotiff(path, value=7)
+    assert statistics_store.get(path) is None
+
+
+def test_statistics_store_no_data(statistics_store, valid_geotiff):
+    statistics_store.put(valid_geotiff, None, no_data=True)
+    assert statistics_store.get(valid_geotiff) == (None, None, True)
+
+
+def test_statistics_store_remote(statistics_store):
+    path = "http://tiles/raster.tiff"
+    statistics_store.put(path, (0.0, 5.0))
+    assert statistics_store.get(path) is None
+
+
+def test_raster_cache_uses_statistics_store(statistics_store, valid_geotiff):
+    raster = RasterMetadataCache(statistics_store).get(
+        valid_geotiff, GDALRasterInterface
+    )
+    assert raster.min_max == (0, 5)
+    # a new check run does not read the pixels again
+    raster = RasterMetadataCache(statistics_store).get(
+        valid_geotiff, GDALRasterInterface
+    )
+    with mock.patch.object(GDALRasterInterface, "compute_min_max") as compute_min_max:
+        assert raster.min_max == (0, 5)
+    assert not compute_min_max.called
+
+
+def test_raster_cache_statistics_store_no_data(statistics_store, tmp_path):
+    path = create_geotiff(tmp_path / "raster.tiff", value=255)
+    raster = RasterMetadataCache(statistics_store).get(path, GDALRasterInterface)
+    with pytest.raises(GDALRasterInterface.NoData):
+        raster.min_max
+    raster = RasterMetadataCache(statistics_store).get(path, GDALRasterInterface)
+    with mock.patch.object(GDALRasterInterface, "compute_min_max") as compute_min_max:
+        with pytest.raises(GDALRasterInterface.NoData):
+            raster.min_max
+    assert not compute_min_max.called
+
+
+def test_raster_cache_partial_not_stored(statistics_store, tiled_geotiff):
+    raster = RasterMetadataCache(statistics_store).get(
+        tiled_geotiff, GDALRasterInterface
+    )
+    raster.get_min_max(upper=5)
+    assert statistics_store.get(tiled_geotiff) is None
+
+
+def test_context_raster_statistics_dir(tmp_path):
+    context = LocalContext(base_path=tmp_path, raster_statistics_dir=tmp_path / "c")
+    assert context.raster_cache.statistics_store.directory == tmp_path / "c"
+    assert LocalContext(base_path=tmp_path).raster_cache.statistics_store is None
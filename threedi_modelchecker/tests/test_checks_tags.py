@@ -0,0 +1,46 @@
+import numpy as np
+from threedi_schema import models
+
+from threedi_modelchecker.checks.base import ListOfIntsCheck
+from threedi_modelchecker.checks.other import TagsValidCheck
+from threedi_modelchecker.checks.tags import IntListColumnSummary, TagsCache
+from threedi_modelchecker.tests import factories
+
+
+def test_int_list_column_summary():
+    summary = IntListColumnSummary.from_rows(
+        [(1, "1,2"), (2, "1.0,2"), (3, "3"), (4, "foo"), (5, " 1, 2")]
+    )
+    assert summary.ids_not_list_of_ints().tolist() == [2, 4]
+    assert summary.ids_with_missing_tag(np.array([1, 2])).tolist() == [3]
+    no_tags = np.array([], dtype=np.int64)
+    assert summary.ids_with_missing_tag(no_tags).tolist() == [1, 3, 5]
+
+
+def test_int_list_column_summary_empty():
+    summary = IntListColumnSummary.from_rows([])
+    assert summary.ids_not_list_of_ints().tolist() == []
+    assert summary.ids_with_missing_tag(np.array([1])).tolist() == []
+
+
+def test_tags_checked_only_by_tags_valid_check(session):
+    # the tags table is only read by the check that asks for it, whatever the name
+    # of the column
+    factories.DryWeatherFlowFactory(id=1, tags="1")
+    assert ListOfIntsCheck(column=models.DryWeatherFlow.tags).get_invalid(session) == []
+    assert TagsCache.for_session(session)._tag_ids is None
+
+
+def test_tags_checks_share_cache(session):
+    factories.TagsFactory(id=1, description="foo")
+    factories.DryWeatherFlowFactory(id=1, tags="1")
+    factories.DryWeatherFlowFactory(id=2, tags="1,2")
+    factories.DryWeatherFlowFactory(id=3, tags="1;2")
+    factories.DryWeatherFlowFactory(id=4, tags="")
+
+    format_check = ListOfIntsCheck(column=models.DryWeatherFlow.tags)
+    tags_check = TagsValidCheck(column=models.DryWeatherFlow.tags)
+    assert [x.id for x in format_check.get_invalid(session)] == [3]
+    assert [x.id for x in tags_check.get_invalid(session)] == [2]
+    cache = TagsCache.for_session(session)
+    assert list(cache._columns) == [("dry_weather_flow", "tags")]
@@ -1,9 +1,16 @@
+from unittest import mock
+
+import numpy as np
 import pytest
-from threedi_schema import models
+from threedi_schema import constants, models
 
 from threedi_modelchecker.checks.timeseries import (
+    compare_timesteps,
     FirstTimeSeriesEqualTimestepsCheck,
     FirstTimeUnitsEqualCheck,
+    parse_timeseries,
+    ParsedTimeseries,
+    TimeseriesCache,
     TimeSeriesEqualTimestepsCheck,
     TimeseriesExistenceCheck,
     TimeseriesIncreasingCheck,
@@ -128,7 +135,15 @@ def test_timeseries_row_check_error(session, timeseries):
 
 # Note: Invalid rows are 'valid' for this check
 @pytest.mark.parametrize(
-    "timeseries", ["0,foo", "0,-0.5\n59,-0.5\n60,-0.5", "0,-0.5,14", "", None]
+    "timeseries",
+    [
+        "0,foo",
+        "0,-0.5\n59,-0.5\n60,-0.5",
+        "0,-0.5,14",
+        "",
+        None,
+        "0,-0.5\n99999999999999999999,-0.5",
+    ],
 )
 def test_timeseries_timestep_check_ok(session, timeseries):
     BoundaryConditions2DFactory(timeseries=timeseries)
@@ -308,3 +323,134 @@ def test_first_time_units_equal_check(
     check = FirstTimeUnitsEqualCheck()
     invalid = check.get_invalid(session)
     assert len(invalid) == expected_invalid
+
+
+@pytest.mark.parametrize(
+    "timeseries,expected",
+    [
+        (None, dict(is_empty=True)),
+        ("", dict(is_empty=True)),
+        ("0,-0.5 \n59, -0.5", dict(malformed=[0, 0, 1])),
+        ("0,-0.5 \n59,-0.5\n   ", dict(timesteps=[0, 59], values=[-0.5, -0.5])),
+        ("0,-0.5,14\n1,2", dict(malformed=[1, 0], timesteps=[0, 1])),
+        ("foo,1\n-1,2", dict(unparsable_timesteps=[1, 0], negative_timesteps=[0, 1])),
+        ("0,foo\n1,inf\n2,nan", dict(unparsable_values=[1, 0, 0])),
+        ("0,foo\n1,inf\n2,nan", dict(non_finite_values=[0, 1, 1])),
+        ("1,\n,2", dict(unparsable_timesteps=[0, 1], unparsable_values=[1, 0])),
+    ],
+)
+def test_parsed_timeseries(timeseries, expected):
+    parsed = ParsedTimeseries.from_string(timeseries)
+    assert parsed.is_empty == expected.pop("is_empty", False)
+    for key, value in expected.items():
+        assert getattr(parsed, key).tolist() == value
+
+
+def test_parsed_timeseries_dtypes():
+    parsed = ParsedTimeseries.from_string("0,1\n60,2")
+    assert parsed.is_parsed
+    assert parsed.timesteps.dtype == np.int64
+    assert parsed.values.dtype == np.float64
+
+
+@pytest.mark.parametrize(
+    "timeseries", ["0,1\n60,foo", "0,1\n60", "0,1\n1.5,2", "0,1\n2,3,4"]
+)
+def test_parsed_timeseries_not_parsed(timeseries):
+    assert not ParsedTimeseries.from_string(timeseries).is_parsed
+
+
+def test_parsed_timeseries_large():
+    timesteps = np.arange(100_000, dtype=np.int64) * 60
+    values = np.linspace(-5.0, 5.0, len(timesteps))
+    timeseries = "\n".join(f"{t},{float(v)!r}" for (t, v) in zip(timesteps, values))
+    parsed = ParsedTimeseries.from_string(timeseries)
+    assert parsed.is_parsed
+    assert np.array_equal(parsed.timesteps, timesteps)
+    assert np.array_equal(parsed.values, values)
+
+
+@pytest.mark.parametrize(
+    "timeseries, timesteps",
+    [
+        ("0,1\n9223372036854775807,2", [0, 9223372036854775807]),
+        ("0,1\n99999999999999999999,2", [0, 99999999999999999999]),
+        ("-99999999999999999999,1\n0,2", [-99999999999999999999, 0]),
+    ],
+)
+def test_parsed_timeseries_beyond_int64(timeseries, timesteps):
+    # timesteps outside the range of int64 are parsed exactly, like int() does
+    parsed = ParsedTimeseries.from_string(timeseries)
+    assert parsed.is_parsed
+    assert parsed.timesteps.tolist() == timesteps
+    assert parsed.negative_timesteps.tolist() == [t < 0 for t in timesteps]
+    assert parse_timeseries(timeseries) == [[timesteps[0], 1.0], [timesteps[1], 2.0]]
+
+
+@pytest.mark.parametrize(
+    "first,second,expected",
+    [
+        ("0,1\n60,2", "0,3\n60,4", True),
+        ("0,1\n99999999999999999999,2", "0,3\n99999999999999999999,4", True),
+        ("0,1\n99999999999999999999,2", "0,3\n99999999999999999998,4", False),
+        ("0,1\n60,2", "0,1\n59,2", False),
+        ("0,1\n60,2", "0,1", False),
+        ("", "0,1", False),
+        ("", None, True),
+    ],
+)
+def test_has_equal_timesteps(first, second, expected):
+    first = ParsedTimeseries.from_string(first)
+    second = ParsedTimeseries.from_string(second)
+    assert first.has_equal_timesteps(second) is expected
+
+
+def test_compare_timesteps():
+    assert compare_timesteps("0,1\n60,2", "0,3\n60,4")
+    assert not compare_timesteps("0,1\n60,2", "0,1")
+    with pytest.raises(ValueError):
+        compare_timesteps("0,1\n60,2", "0,foo")
+
+
+def test_parse_timeseries():
+    assert parse_timeseries("0,1.5\n60,-2") == [[0, 1.5], [60, -2.0]]
+    assert parse_timeseries(None) == []
+    with pytest.raises(ValueError):
+        parse_timeseries("0,1.5,3")
+
+
+def test_timeseries_cache_parses_once(session):
+    BoundaryConditions2DFactory(timeseries="0,1.0\n60,2.0")
+    BoundaryConditions2DFactory(timeseries="0,1.0\n59,2.0")
+    checks = [
+        check_cls(models.BoundaryConditions2D.timeseries)
+        for check_cls in (
+            TimeseriesExistenceCheck,
+            TimeseriesRowCheck,
+            TimeseriesTimestepCheck,
+            TimeseriesValueCheck,
+            TimeseriesIncreasingCheck,
+            TimeseriesStartsAtZeroCheck,
+            TimeSeriesEqualTimestepsCheck,
+        )
+    ]
+    with mock.patch.object(
+        ParsedTimeseries, "from_string", side_effect=ParsedTimeseries.from_string
+    ) as from_string:
+        invalid = [check.get_invalid(session) for check in checks]
+    assert from_string.call_count == 2
+    assert [len(x) for x in invalid] == [0, 0, 0, 0, 0, 0, 1]
+    assert TimeseriesCache.for_session(session) is TimeseriesCache.for_session(session)
+
+
+def test_timeseries_check_filters(session):
+    velocity = constants.BoundaryType.VELOCITY
+    BoundaryConditions2DFactory(timeseries="1,1.0")
+    expected = BoundaryConditions2DFactory(timeseries="1,1.0", type=velocity.value)
+    check = TimeseriesStartsAtZeroCheck(
+        models.BoundaryConditions2D.timeseries,
+        filters=models.BoundaryConditions2D.type == velocity,
+    )
+    invalid = check.get_invalid(session)
+    assert len(invalid) == 1
+    assert invalid[0].id == expected.id
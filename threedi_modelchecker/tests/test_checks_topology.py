@@ -0,0 +1,104 @@
+from threedi_schema import constants, models
+
+from threedi_modelchecker.checks.other import BoundaryCondition1DObjectNumberCheck
+from threedi_modelchecker.checks.topology import (
+    ConnectionNodeNotConnectedCheck,
+    LINK_TABLES,
+    PumpNodeNotConnectedCheck,
+    TopologyIndex,
+)
+from threedi_modelchecker.tests import factories
+
+
+def test_topology_index(session):
+    for i in range(1, 5):
+        factories.ConnectionNodeFactory(id=i)
+    factories.ChannelFactory(id=1, connection_node_id_start=1, connection_node_id_end=2)
+    factories.WeirFactory(id=1, connection_node_id_start=2, connection_node_id_end=2)
+    factories.PumpFactory(id=1, connection_node_id=3)
+    # a reference to a node that does not exist
+    factories.CulvertFactory(id=1, connection_node_id_start=1, connection_node_id_end=9)
+
+    index = TopologyIndex.for_session(session)
+    assert index.node_ids.tolist() == [1, 2, 3, 4, 9]
+    assert sorted(index.get_incident(2)) == [("channel", 1), ("weir", 1), ("weir", 1)]
+    assert index.get_incident(4) == []
+    assert index.get_incident(5) == []
+    assert index.degree([1, 2, 3, 4, 9, 5, None], LINK_TABLES).tolist() == [
+        2,
+        3,
+        0,
+        0,
+        1,
+        0,
+        0,
+    ]
+    assert index.degree([3], {"pump"}).tolist() == [1]
+    assert TopologyIndex.for_session(session) is index
+
+
+def test_topology_index_empty(session):
+    index = TopologyIndex.for_session(session)
+    assert index.degree([1, None], LINK_TABLES).tolist() == [0, 0]
+
+
+def test_boundary_condition_1d_object_number(session):
+    for i in range(1, 4):
+        factories.ConnectionNodeFactory(id=i)
+    factories.ChannelFactory(id=1, connection_node_id_start=1, connection_node_id_end=2)
+    factories.WeirFactory(id=1, connection_node_id_start=2, connection_node_id_end=3)
+    factories.BoundaryConditions1DFactory(id=1, connection_node_id=1)
+    factories.BoundaryConditions1DFactory(id=2, connection_node_id=2)
+    factories.BoundaryConditions1DFactory(id=3, connection_node_id=4)
+
+    check = BoundaryCondition1DObjectNumberCheck()
+    invalid = check.get_invalid(session)
+    assert [x.id for x in invalid] == [2, 3]
+
+
+def test_connection_node_not_connected(session):
+    factories.ConnectionNodeFactory(
+        id=1,
+        bottom_level=0.0,
+        exchange_type=constants.CalculationTypeNode.ISOLATED,
+    )
+    factories.ConnectionNodeFactory(
+        id=2,
+        bottom_level=0.0,
+        exchange_type=constants.CalculationTypeNode.ISOLATED,
+    )
+    factories.ConnectionNodeFactory(
+        id=3,
+        bottom_level=0.0,
+        exchange_type=constants.CalculationTypeNode.ISOLATED,
+    )
+    factories.ConnectionNodeFactory(
+        id=4, exchange_type=constants.CalculationTypeNode.ISOLATED
+    )
+    factories.PumpFactory(id=1, connection_node_id=5)
+    factories.PumpMapFactory(id=1, pump_id=1, connection_node_id_end=2)
+
+    check = ConnectionNodeNotConnectedCheck()
+    invalid = check.get_invalid(session)
+    assert [x.id for x in invalid] == [1, 3]
+
+
+def test_pump_node_not_connected(session):
+    factories.ConnectionNodeFactory(
+        id=1, exchange_type=constants.CalculationTypeNode.CONNECTED
+    )
+    factories.ConnectionNodeFactory(
+        id=2, exchange_type=constants.CalculationTypeNode.CONNECTED
+    )
+    factories.ConnectionNodeFactory(
+        id=3, exchange_type=constants.CalculationTypeNode.EMBEDDED
+    )
+    factories.ChannelFactory(id=1, connection_node_id_start=2, connection_node_id_end=3)
+    factories.PumpFactory(id=1, connection_node_id=1)
+    factories.PumpFactory(id=2, connection_node_id=2)
+    factories.PumpFactory(id=3, connection_node_id=3)
+
+    check = PumpNodeNotConnectedCheck()
+    invalid = check.get_invalid(session)
+    assert [x.id for x in invalid] == [1]
+    assert check.get_index_columns() == [models.Pump.connection_node_id]
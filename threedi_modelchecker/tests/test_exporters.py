@@ -4,7 +4,7 @@ import pytest
 from geoalchemy2.elements import WKBElement
 from threedi_schema.domain.constants import InflowType
 
-from threedi_modelchecker.checks.base import CheckLevel
+from threedi_modelchecker.checks.base import CheckLevel, InvalidRow
 from threedi_modelchecker.exporters import (
     export_with_geom,
     generate_csv_table,
@@ -136,3 +136,8 @@ def test_export_with_geom(fake_check_error):
     assert result[1].geom == error_row_geom.geom
     assert result[2].value == "wkt"
     assert result[3].value == "No inflow"
+
+
+def test_export_with_geom_invalid_row(fake_check_error):
+    with pytest.raises(TypeError):
+        export_with_geom([(fake_check_error, InvalidRow("channel", 1))])
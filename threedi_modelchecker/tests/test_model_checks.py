@@ -1,15 +1,25 @@
+import shutil
 from unittest import mock
 
 import pytest
-from threedi_schema import ThreediDatabase
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from threedi_schema import constants, models, ThreediDatabase
+from threedi_schema.domain.models import DECLARED_MODELS
 
-from threedi_modelchecker.config import CHECKS
+from threedi_modelchecker.config import CHECKS, Config
 from threedi_modelchecker.model_checks import (
     BaseCheck,
+    CheckLevel,
     get_epsg_data_from_raster,
+    hydrate_errors,
+    InvalidRow,
     LocalContext,
+    MemorySnapshot,
     ThreediModelChecker,
 )
+from threedi_modelchecker.profiling import ProfileReport
+from threedi_modelchecker.snapshot import get_index_columns
 from threedi_modelchecker.tests import factories
 from threedi_modelchecker.tests.test_checks_raster import create_geotiff
 
@@ -56,6 +66,117 @@ def test_get_model_error_iterator(model_checker):
     assert len(errors) == 0
 
 
+@pytest.fixture
+def mocked_schema():
+    # the mocked schema has to be picklable for the worker processes
+    with mock.patch.object(ThreediDatabase, "schema") as schema:
+        schema.declared_models = DECLARED_MODELS
+        schema.epsg_code = 28992
+        schema.epsg_source = "connection_node.geom"
+        yield schema
+
+
+@pytest.fixture
+def invalid_db(threedi_db, mocked_schema, tmp_path):
+    """A copy of the database with some invalid rows"""
+    path = tmp_path / "copy.sqlite"
+    shutil.copyfile(threedi_db.path, path)
+    db = ThreediDatabase(path)
+    session = db.get_session()
+    factories.inject_session(session)
+    try:
+        factories.ConnectionNodeFactory(id=1, storage_area=-1.0)
+        factories.ChannelFactory(
+            id=1,
+            connection_node_id_start=5,
+            connection_node_id_end=6,
+            exchange_thickness=-1.0,
+        )
+        factories.ChannelFactory(
+            id=2, connection_node_id_start=7, connection_node_id_end=8
+        )
+        # check 0260 joins this channel with both of its exchange lines
+        factories.ChannelFactory(id=3, exchange_type=constants.CalculationType.ISOLATED)
+        factories.ExchangeLineFactory(id=1, channel_id=3)
+        factories.ExchangeLineFactory(id=2, channel_id=3)
+        session.commit()
+    finally:
+        factories.inject_session(None)
+        session.close()
+    return db
+
+
+def _get_errors(model_checker, **kwargs):
+    return [
+        (check.error_code, row.id, check.description())
+        for (check, row) in model_checker.errors(level="info", **kwargs)
+    ]
+
+
+@pytest.mark.parametrize(
+    "checker_kwargs, errors_kwargs",
+    [
+        ({}, {"workers": 2}),
+        ({}, {"fused": False}),
+        ({"snapshot": "memory"}, {}),
+        ({"snapshot": "memory"}, {"workers": 2, "fused": False}),
+    ],
+    ids=["parallel", "unfused", "memory", "memory-parallel-unfused"],
+)
+def test_errors_equal_default(invalid_db, checker_kwargs, errors_kwargs):
+    """Parallel, unfused and memory snapshot runs report the same as the default"""
+    expected = _get_errors(ThreediModelChecker(invalid_db))
+    model_checker = ThreediModelChecker(invalid_db, **checker_kwargs)
+    if "snapshot" in checker_kwargs:
+        assert isinstance(model_checker.db, MemorySnapshot)
+    assert len(expected) > 0
+    # a row is reported once, also if it matches several joined rows
+    assert [x[:2] for x in expected].count((260, 3)) == 1
+    assert _get_errors(model_checker, **errors_kwargs) == expected
+
+
+def test_memory_snapshot_read_only(threedi_db):
+    with threedi_db.get_session() as session:
+        expected = session.query(models.ConnectionNode).count()
+    snapshot = MemorySnapshot(threedi_db)
+    assert snapshot.base_path == threedi_db.base_path
+    with snapshot.get_session() as session:
+        assert session.query(models.ConnectionNode).count() == expected
+        with pytest.raises(OperationalError):
+            session.execute(text("DELETE FROM connection_node"))
+
+
+def test_unknown_snapshot(threedi_db, mocked_schema):
+    with pytest.raises(ValueError):
+        ThreediModelChecker(threedi_db, snapshot="foo")
+
+
+def test_errors_profile(model_checker):
+    report = ProfileReport()
+    errors = list(model_checker.errors(level="info", profile=report))
+    checks = list(model_checker.checks(level="info"))
+    assert len(report.checks) == len(checks)
+    assert sum(x.invalid_rows for x in report.checks) == len(errors)
+    assert sum(x.sql_statements for x in report.checks) > 0
+
+
+def test_hydrate_errors(session):
+    factories.ConnectionNodeFactory(id=1, code="foo")
+    factories.ConnectionNodeFactory(id=2, code="bar")
+    check = mock.Mock()
+    errors = [
+        (check, InvalidRow("connection_node", 2)),
+        (check, InvalidRow("connection_node", 3)),
+        (check, InvalidRow("connection_node", 1)),
+    ]
+    tables = {"connection_node": models.ConnectionNode.__table__}
+    hydrated = list(hydrate_errors(session, errors, tables, batch_size=2))
+    assert [row.id for (_, row) in hydrated] == [2, 3, 1]
+    assert hydrated[0][1].code == "bar"
+    assert hydrated[1][1] == InvalidRow("connection_node", 3)  # not found
+    assert hydrated[2][1].code == "foo"
+
+
 def id_func(param):
     if isinstance(param, BaseCheck):
         return "check {}-".format(param.error_code)
@@ -85,3 +206,36 @@ def test_get_epsg_data_from_raster(session, threedi_db, tmp_path):
     assert epsg_code == 28992
     assert epsg_name == "model_settings.dem_file"
     session.model_checker_context.base_path = old_context_path
+
+
+def test_config_iter_checks_tables():
+    config = Config(models=DECLARED_MODELS)
+    checks = list(config.iter_checks(level="info", tables={"pump"}))
+    assert checks
+    assert {check.table.name for check in checks} == {"pump"}
+    # only the checks of the selected table are created
+    assert {table_name for (table_name, _) in config._generated} == {"pump"}
+    assert len(config._copies) < len(config._static_checks)
+    assert {config._static_checks[i].table.name for i in config._copies} == {"pump"}
+
+
+def test_config_lazy_checks_equal_all_checks():
+    config = Config(models=DECLARED_MODELS)
+    lazy = list(config.iter_checks(level="info"))
+    assert lazy == [x for x in config.checks if x.level >= CheckLevel.INFO]
+
+
+def test_config_own_checks():
+    # checks keep state while they are applied, so Configs do not share them
+    checks = Config(models=DECLARED_MODELS).checks
+    other = Config(models=DECLARED_MODELS).checks
+    assert len(checks) == len(other)
+    assert not {id(x) for x in checks} & {id(x) for x in other}
+
+
+def test_config_iter_index_checks():
+    config = Config(models=DECLARED_MODELS)
+    index_columns = get_index_columns(config.iter_index_checks())
+    assert index_columns
+    assert config._checks is None
+    assert index_columns == get_index_columns(Config(models=DECLARED_MODELS).checks)
@@ -0,0 +1,64 @@
+import json
+
+from sqlalchemy import create_engine, text
+from threedi_schema import models
+
+from threedi_modelchecker.checks.base import NotNullCheck
+from threedi_modelchecker.interfaces.raster_interface import RasterInterface
+from threedi_modelchecker.profiling import ProfileReport
+
+
+def make_rows(engine, n_statements, n_rows, raster_bytes=0):
+    with engine.connect() as connection:
+        for _ in range(n_statements):
+            connection.execute(text("SELECT 1"))
+    RasterInterface.bytes_read += raster_bytes
+    yield from range(n_rows)
+
+
+def test_profile():
+    engine = create_engine("sqlite://")
+    check = NotNullCheck(column=models.ConnectionNode.storage_area, error_code=3)
+    report = ProfileReport()
+    rows = list(report.profile(check, make_rows(engine, 3, 2, 1024), engine))
+    assert rows == [0, 1]
+    (profile,) = report.checks
+    assert profile.error_code == 3
+    assert profile.level == "ERROR"
+    assert profile.check == "NotNullCheck"
+    assert profile.column == "connection_node.storage_area"
+    assert profile.description == check.description()
+    assert profile.sql_statements == 3
+    assert profile.invalid_rows == 2
+    assert profile.raster_bytes == 1024
+    assert profile.wall_time > 0
+    assert profile.cpu_time >= 0
+
+
+def test_profile_statements_outside_check_not_counted():
+    engine = create_engine("sqlite://")
+    check = NotNullCheck(column=models.ConnectionNode.storage_area)
+    report = ProfileReport()
+    for _ in report.profile(check, make_rows(engine, 1, 2), engine):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert report.checks[0].sql_statements == 1
+
+
+def test_profile_report_json(tmp_path):
+    engine = create_engine("sqlite://")
+    report = ProfileReport()
+    for n_statements in (1, 20, 5):
+        check = NotNullCheck(column=models.ConnectionNode.storage_area)
+        list(report.profile(check, make_rows(engine, n_statements, 1), engine))
+    path = tmp_path / "profile.json"
+    report.write_json(path)
+    with open(path) as f:
+        result = json.load(f)
+    assert result["total"]["checks"] == 3
+    assert result["total"]["sql_statements"] == 26
+    assert result["total"]["invalid_rows"] == 3
+    wall_times = [x["wall_time"] for x in result["checks"]]
+    assert wall_times == sorted(wall_times, reverse=True)
@@ -0,0 +1,100 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from threedi_modelchecker.service import CheckService, JobError, make_server
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = CheckService(workers=1)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def server(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(server, method, path, body=None):
+    connection = http.client.HTTPConnection(*server.server_address)
+    connection.request(method, path, body=json.dumps(body) if body else None)
+    response = connection.getresponse()
+    return response.status, response.read().decode()
+
+
+@pytest.mark.parametrize(
+    "job,message",
+    [
+        (None, "A job should be an object with a 'path'"),
+        ({"path": "/does/not/exist.gpkg"}, "File not found"),
+    ],
+)
+def test_validate_job(service, job, message):
+    with pytest.raises(JobError, match=message):
+        service.validate_job(job)
+
+
+def test_validate_job_ignore_checks(service, tmp_path):
+    (tmp_path / "model.gpkg").touch()
+    with pytest.raises(JobError, match="Invalid ignore_checks"):
+        service.validate_job(
+            {"path": str(tmp_path / "model.gpkg"), "ignore_checks": "("}
+        )
+
+
+def test_run_job(service, threedi_db):
+    messages = list(service.run_job({"path": str(threedi_db.path), "level": "info"}))
+    assert messages[-1]["type"] == "done"
+    assert messages[-1]["errors"] == len(messages) - 1
+
+
+def test_run_jobs_concurrently(threedi_db):
+    service = CheckService(workers=2)
+    job = {"path": str(threedi_db.path), "level": "info"}
+    results = [None, None]
+
+    def run(i):
+        results[i] = list(service.run_job(job))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        service.close()
+    assert [messages[-1]["type"] for messages in results] == ["done", "done"]
+    assert results[0][:-1] == results[1][:-1]
+
+
+def test_status(server):
+    status, body = _request(server, "GET", "/status")
+    assert status == 200
+    assert json.loads(body) == {"status": "ok", "workers": 1, "busy": 0}
+
+
+def test_check_invalid_job(server):
+    status, body = _request(server, "POST", "/check", {"path": "/does/not/exist"})
+    assert status == 400
+    assert "File not found" in json.loads(body)["message"]
+
+
+def test_check_streams_ndjson(server, tmp_path):
+    path = tmp_path / "model.gpkg"
+    path.write_text("not a database")
+    status, body = _request(server, "POST", "/check", {"path": str(path)})
+    assert status == 200
+    messages = [json.loads(line) for line in body.splitlines()]
+    assert messages[-1]["type"] == "failed"
+    # the worker slot is released again
+    assert json.loads(_request(server, "GET", "/status")[1])["busy"] == 0
@@ -0,0 +1,93 @@
+import sqlite3
+from unittest import mock
+
+import pytest
+from threedi_schema import models, ThreediDatabase
+
+from threedi_modelchecker.checks.base import ForeignKeyCheck, NotNullCheck
+from threedi_modelchecker.checks.location import LinestringLocationCheck
+from threedi_modelchecker.snapshot import (
+    copy_to_memory,
+    create_indexes,
+    get_index_columns,
+    MemorySnapshot,
+)
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "source.sqlite"
+    con = sqlite3.connect(path)
+    con.executescript(
+        """
+        CREATE TABLE node (id INTEGER PRIMARY KEY, code TEXT);
+        CREATE TABLE link (id INTEGER PRIMARY KEY, start_id INTEGER, end_id INTEGER);
+        CREATE INDEX link_end ON link (end_id, start_id);
+        CREATE VIRTUAL TABLE rtree_node_geom USING rtree(id, minx, maxx);
+        INSERT INTO node VALUES (1, 'a'), (2, 'b');
+        INSERT INTO link VALUES (1, 1, 2);
+        INSERT INTO rtree_node_geom VALUES (1, 0.0, 1.0);
+        """
+    )
+    con.commit()
+    con.close()
+    return path
+
+
+def test_get_index_columns():
+    checks = [
+        ForeignKeyCheck(
+            models.ConnectionNode.id, column=models.Pipe.connection_node_id_start
+        ),
+        LinestringLocationCheck(
+            column=models.Channel.geom,
+            ref_column_start=models.Channel.connection_node_id_start,
+            ref_column_end=models.Channel.connection_node_id_end,
+            ref_table_start=models.ConnectionNode,
+            ref_table_end=models.ConnectionNode,
+            max_distance=1.0,
+        ),
+        NotNullCheck(column=models.Channel.connection_node_id_start),
+    ]
+    assert get_index_columns(checks) == [
+        ("pipe", "connection_node_id_start"),
+        ("channel", "connection_node_id_start"),
+        ("channel", "connection_node_id_end"),
+    ]
+
+
+def test_create_indexes(database):
+    con = sqlite3.connect(database)
+    create_indexes(
+        con,
+        [("link", "start_id"), ("link", "end_id"), ("link", "foo"), ("bar", "id")],
+    )
+    indexes = [row[1] for row in con.execute("PRAGMA index_list(link)")]
+    assert sorted(indexes) == ["link_end", "modelchecker_link_start_id"]
+    assert con.execute("SELECT count(*) FROM sqlite_stat1").fetchone()[0] > 0
+
+
+@mock.patch("threedi_modelchecker.snapshot.load_spatialite")
+def test_copy_to_memory(load_spatialite, database):
+    con = copy_to_memory(database, index_columns=[("link", "start_id")])
+    load_spatialite.assert_called_once_with(con, None)
+    assert con.execute("SELECT code FROM node ORDER BY id").fetchall() == [
+        ("a",),
+        ("b",),
+    ]
+    assert con.execute("SELECT * FROM rtree_node_geom").fetchall() == [(1, 0.0, 1.0)]
+    assert con.execute("PRAGMA query_only").fetchone() == (1,)
+    assert con.execute("PRAGMA temp_store").fetchone() == (2,)
+    with pytest.raises(sqlite3.OperationalError):
+        con.execute("DELETE FROM node")
+    # the index is only added to the copy
+    source = sqlite3.connect(database)
+    assert [row[1] for row in source.execute("PRAGMA index_list(link)")] == ["link_end"]
+
+
+@mock.patch("threedi_modelchecker.snapshot.load_spatialite")
+def test_memory_snapshot(load_spatialite, database):
+    snapshot = MemorySnapshot(ThreediDatabase(database))
+    assert snapshot.base_path == database.parent
+    with snapshot.get_session() as session:
+        assert session.connection().connection.dbapi_connection is snapshot.connection